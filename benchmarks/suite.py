@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+from typing import Callable
+
+import numpy as np
+
+from dataframes.addresses import column_name, decode_address, decode_addresses
+from dataframes.journal import Journal
+from dataframes.models import Spreadsheet
+from dataframes.recalc import RecalculationEngine
+
+from . import workbooks
+
+
+BASELINES = os.path.join(os.path.dirname(__file__), 'baselines.json')
+THRESHOLD = 0.5
+REPEAT = 3
+
+# each benchmark prepares its data for a scale and returns the callable that is timed
+BENCHMARKS: dict[str, Callable[[float], Callable[[], object]]] = {}
+
+
+def benchmark(function: Callable[[float], Callable[[], object]]):
+    BENCHMARKS[function.__name__] = function
+    return function
+
+
+def _size(count: int, scale: float) -> int:
+    return max(int(count * scale), 1)
+
+
+@benchmark
+def parse_addresses(scale: float):
+    count = _size(1_000_000, scale)
+    addresses = np.array([f'{column_name(i % 16384)}{i % 1048576 + 1}' for i in range(count)])
+    return lambda: decode_addresses(addresses)
+
+
+@benchmark
+def parse_address(scale: float):
+    addresses = [f'{column_name(i % 702)}{i + 1}' for i in range(_size(100_000, scale))]
+
+    def run():
+        decode_address.cache_clear()
+        for address in addresses:
+            decode_address(address)
+
+    return run
+
+
+@benchmark
+def build_dense(scale: float):
+    frame = workbooks.dense_numeric(_size(1_000_000, scale), 6)
+    return lambda: Spreadsheet(data=frame)
+
+
+@benchmark
+def iterate_dense(scale: float):
+    spreadsheet = workbooks.dense_spreadsheet(_size(1_000_000, scale), 6)
+    return lambda: sum(1 for _ in spreadsheet.iter_rows())
+
+
+@benchmark
+def iterate_sparse(scale: float):
+    spreadsheet = workbooks.sparse_spreadsheet(_size(1_000_000, scale), 6)
+    return lambda: sum(1 for _ in spreadsheet.iter_items())
+
+
+@benchmark
+def load_formula_chain(scale: float):
+    spreadsheet = workbooks.formula_chain(_size(50_000, scale))
+    return lambda: RecalculationEngine(spreadsheet)
+
+
+@benchmark
+def edit_formula_chain(scale: float):
+    engine = RecalculationEngine(workbooks.formula_chain(_size(50_000, scale)))
+    values = iter(range(1, 1 << 30))
+    return lambda: engine.set_value(0, 0, next(values))
+
+
+@benchmark
+def load_wide_sums(scale: float):
+    spreadsheet = workbooks.wide_sums(_size(100_000, scale), _size(1_000, scale))
+    return lambda: RecalculationEngine(spreadsheet)
+
+
+@benchmark
+def load_lookups(scale: float):
+    spreadsheet = workbooks.lookup_table(_size(500_000, scale), _size(10_000, scale))
+    return lambda: RecalculationEngine(spreadsheet)
+
+
+@benchmark
+def edit_lookup_table(scale: float):
+    engine = RecalculationEngine(workbooks.lookup_table(_size(500_000, scale), _size(10_000, scale)))
+    values = iter(range(1, 1 << 30))
+    return lambda: engine.set_value(0, 0, -next(values))
+
+
+@benchmark
+def recalculate_criteria(scale: float):
+    engine = RecalculationEngine(workbooks.criteria_dashboard(_size(1_000_000, scale), _size(300, scale)))
+    return lambda: engine.recalculate()
+
+
+@benchmark
+def undo_paste(scale: float):
+    # a paste of 100k cells and its undo, both should cost about the same
+    rows = _size(50_000, scale)
+    journal = Journal(RecalculationEngine(Spreadsheet(2, rows)))
+    block = np.ones((rows, 2))
+
+    def run():
+        journal.set_block(0, 0, block)
+        journal.undo()
+
+    return run
+
+
+@benchmark
+def import_csv(scale: float):
+    from dataframes.importers import read_chunks
+
+    rows = _size(1_000_000, scale)
+    # the generated file is deterministic, so it is kept and reused between runs
+    filename = os.path.join(tempfile.gettempdir(), f'spreadsheet-benchmark-{rows}.csv')
+    if not os.path.exists(filename):
+        workbooks.write_csv(filename, rows, 6)
+
+    def run():
+        spreadsheet = Spreadsheet(0, 0)
+        for chunk, _ in read_chunks(filename):
+            spreadsheet.append(Spreadsheet(data=chunk, sparse=False))
+        spreadsheet.compact()
+        return spreadsheet
+
+    return run
+
+
+@benchmark
+def render_table(scale: float):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+
+    from components.TableView import TableView
+
+    application = QApplication.instance() or QApplication([])
+    spreadsheet = workbooks.dense_spreadsheet(_size(100_000, scale), 20)
+    view = TableView(spreadsheet)
+    view.resize(1920, 1080)
+    # the view keeps the application alive for as long as it is timed
+    view.application = application
+    return lambda: view.grab()
+
+
+def run(names: list[str] | None = None, scale: float = 1.0, repeat: int = REPEAT) -> dict[str, float]:
+    results = {}
+    for name in names or BENCHMARKS:
+        function = BENCHMARKS[name](scale)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        results[name] = min(timings)
+    return results
+
+
+def load_baselines(filename: str = BASELINES) -> dict:
+    if not os.path.exists(filename):
+        return {'scale': 1.0, 'results': {}}
+    with open(filename) as file:
+        return json.load(file)
+
+
+def save_baselines(results: dict[str, float], scale: float, filename: str = BASELINES):
+    baselines = load_baselines(filename)
+    if baselines['scale'] != scale:
+        baselines = {'scale': scale, 'results': {}}
+    baselines['results'].update({name: round(seconds, 6) for name, seconds in results.items()})
+    baselines['machine'] = {'python': platform.python_version(), 'processor': platform.machine()}
+    with open(filename, 'w') as file:
+        json.dump(baselines, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def regressions(results: dict[str, float], baselines: dict, threshold: float = THRESHOLD) -> dict[str, tuple]:
+    found = {}
+    for name, seconds in results.items():
+        baseline = baselines['results'].get(name)
+        if baseline is not None and seconds > baseline * (1 + threshold):
+            found[name] = (baseline, seconds)
+    return found
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Run the performance benchmarks.')
+    parser.add_argument('names', nargs='*', help='benchmarks to run, all by default')
+    parser.add_argument('-s', '--scale', type=float, help='size of the generated workbooks, baseline scale by default')
+    parser.add_argument('-r', '--repeat', type=int, default=REPEAT)
+    parser.add_argument('-t', '--threshold', type=float, default=THRESHOLD, help='allowed slowdown, 0.5 is 50%%')
+    parser.add_argument('-u', '--update', action='store_true', help='store the results as the new baselines')
+    args = parser.parse_args(argv)
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f'unknown benchmarks: {", ".join(sorted(unknown))}, choose from {", ".join(BENCHMARKS)}')
+
+    baselines = load_baselines()
+    scale = args.scale or baselines['scale']
+    results = run(args.names, scale, args.repeat)
+    found = regressions(results, baselines, args.threshold) if scale == baselines['scale'] else {}
+    for name, seconds in results.items():
+        baseline = baselines['results'].get(name)
+        line = f'{name:24} {seconds:10.4f}s'
+        if baseline is not None and scale == baselines['scale']:
+            line += f' {seconds / baseline:8.2f}x'
+        print(line + ('  REGRESSION' if name in found else ''))
+    if args.update:
+        save_baselines(results, scale)
+    return 1 if found and not args.update else 0
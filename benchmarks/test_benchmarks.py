@@ -0,0 +1,20 @@
+import os
+
+import pytest
+
+from .suite import BENCHMARKS, THRESHOLD, load_baselines, regressions, run
+
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get('RUN_BENCHMARKS'), reason='set RUN_BENCHMARKS=1 to check the performance baselines')
+
+
+@pytest.mark.parametrize('name', list(BENCHMARKS))
+def test_benchmark(name):
+    baselines = load_baselines()
+    if name not in baselines['results']:
+        pytest.skip(f'no baseline for {name}, record one with python -m benchmarks --update')
+    results = run([name], baselines['scale'])
+    threshold = float(os.environ.get('BENCHMARK_THRESHOLD', THRESHOLD))
+    assert not regressions(results, baselines, threshold), (
+        f'{name} took {results[name]:.4f}s, baseline {baselines["results"][name]:.4f}s')
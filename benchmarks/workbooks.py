@@ -0,0 +1,82 @@
+import numpy as np
+from pandas import DataFrame
+
+from dataframes.addresses import column_name
+from dataframes.models import Spreadsheet, TypedColumn
+
+
+SEED = 2024
+
+
+def dense_numeric(rows: int, cols: int) -> DataFrame:
+    rng = np.random.default_rng(SEED)
+    data = {column_name(col): rng.integers(-1000, 1000, rows) for col in range(cols // 2)}
+    data.update({column_name(col): rng.random(rows) * 1000 for col in range(cols // 2, cols)})
+    return DataFrame(data)
+
+
+def dense_spreadsheet(rows: int, cols: int) -> Spreadsheet:
+    frame = dense_numeric(rows, cols)
+    return Spreadsheet.from_columns([TypedColumn.from_array(frame[name].to_numpy()) for name in frame], rows)
+
+
+def sparse_spreadsheet(rows: int, cols: int, density: float = 0.01) -> Spreadsheet:
+    rng = np.random.default_rng(SEED)
+    spreadsheet = Spreadsheet(cols, rows, sparse=True)
+    for col in range(cols):
+        filled = np.sort(rng.choice(rows, int(rows * density), replace=False))
+        for row, value in zip(filled.tolist(), rng.integers(0, 1000, len(filled)).tolist()):
+            spreadsheet.set_value(row, col, value)
+    return spreadsheet
+
+
+def formula_chain(rows: int) -> Spreadsheet:
+    # B1 = A1 + 0, Bn = B(n-1) + An: every edit of A1 recalculates the whole chain
+    spreadsheet = Spreadsheet(2, rows)
+    spreadsheet.set_block(0, 0, np.arange(rows).reshape(-1, 1))
+    spreadsheet.set_block(0, 1, [['+ A1 C1']] + [[f'+ B{row} A{row + 1}'] for row in range(1, rows)])
+    return spreadsheet
+
+
+def wide_sums(rows: int, formulas: int) -> Spreadsheet:
+    spreadsheet = Spreadsheet(2, rows)
+    spreadsheet.set_block(0, 0, np.random.default_rng(SEED).integers(0, 100, rows).reshape(-1, 1))
+    spreadsheet.set_block(0, 1, [[f'sum A{row + 1} A{rows}'] for row in range(formulas)])
+    return spreadsheet
+
+
+def lookup_table(rows: int, lookups: int) -> Spreadsheet:
+    # A:B is a keyed table, column D looks up the keys of column C in it
+    spreadsheet = Spreadsheet(4, rows)
+    spreadsheet.set_block(0, 0, np.column_stack([np.arange(rows) * 3, np.arange(rows)]))
+    keys = np.random.default_rng(SEED).integers(0, rows * 3, min(lookups, rows))
+    spreadsheet.set_block(0, 2, keys.reshape(-1, 1))
+    spreadsheet.set_block(0, 3, [[f'vlookup C{row + 1} A1:B{rows} 2'] for row in range(len(keys))])
+    return spreadsheet
+
+
+def criteria_dashboard(rows: int, formulas: int) -> Spreadsheet:
+    # regions, product codes and amounts in A:C, column D holds conditional totals over all of them
+    rng = np.random.default_rng(SEED)
+    regions = np.array(['north', 'south', 'east', 'west', 'centre'], dtype=object)
+    columns = [
+        TypedColumn.from_array(regions[rng.integers(0, len(regions), rows)]),
+        TypedColumn.from_array(rng.integers(0, 100, rows)),
+        TypedColumn.from_array(rng.random(rows) * 1000),
+        TypedColumn(rows),
+    ]
+    spreadsheet = Spreadsheet.from_columns(columns, rows)
+    templates = [
+        'sumifs C1:C{rows} A1:A{rows} {region} B1:B{rows} >={code}',
+        'countif A1:A{rows} {region}',
+        'averageifs C1:C{rows} B1:B{rows} <{code}',
+    ]
+    spreadsheet.set_block(0, 3, [
+        [templates[row % len(templates)].format(rows=rows, region=regions[row % len(regions)], code=row % 100)]
+        for row in range(min(formulas, rows))
+    ])
+    return spreadsheet
+
+
+def write_csv(filename: str, rows: int, cols: int):
+    dense_numeric(rows, cols).to_csv(filename, index=False)
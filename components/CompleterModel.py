@@ -0,0 +1,43 @@
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+from PyQt5.QtWidgets import QWidget
+
+from dataframes.distinct import DistinctValues, value_text
+
+
+class CompleterModel(QAbstractListModel):
+    def __init__(self, values: DistinctValues, parent: QWidget | None = None):
+        super(CompleterModel, self).__init__(parent)
+        self.values = values
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.values)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        return self.values[index.row()]
+
+    def replace(self, old, new):
+        if value_text(old) == value_text(new):
+            return
+        # distinct values are kept sorted, a row comes or goes only when the first or the last cell holds its text
+        self.discard(old)
+        self.add(new)
+
+    def add(self, value):
+        if value_text(value) is None or self.values.count(value):
+            self.values.add(value)
+            return
+        row = self.values.position(value)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.values.add(value)
+        self.endInsertRows()
+
+    def discard(self, value):
+        if self.values.count(value) != 1:
+            self.values.discard(value)
+            return
+        row = self.values.position(value)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.values.discard(value)
+        self.endRemoveRows()
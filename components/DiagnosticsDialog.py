@@ -0,0 +1,56 @@
+import json
+
+from PyQt5.QtWidgets import (
+    QDialog, QFileDialog, QHBoxLayout, QMessageBox, QPlainTextEdit, QPushButton, QVBoxLayout, QWidget,
+)
+
+from dataframes.profiling import profiler
+
+
+class DiagnosticsDialog(QDialog):
+    def __init__(self, parent: QWidget | None = None):
+        super(DiagnosticsDialog, self).__init__(parent)
+        self.setWindowTitle('Диагностика')
+        self.resize(640, 480)
+        self.summary = QPlainTextEdit(self)
+        self.summary.setReadOnly(True)
+
+        refreshButton = QPushButton('Обновить', self)
+        refreshButton.clicked.connect(self.refresh)
+        resetButton = QPushButton('Сбросить', self)
+        resetButton.clicked.connect(self.reset)
+        jsonButton = QPushButton('Экспорт JSON', self)
+        jsonButton.clicked.connect(lambda: self.export(chromeTrace=False))
+        traceButton = QPushButton('Экспорт Chrome trace', self)
+        traceButton.clicked.connect(lambda: self.export(chromeTrace=True))
+        closeButton = QPushButton('Закрыть', self)
+        closeButton.clicked.connect(self.accept)
+
+        buttonsLayout = QHBoxLayout()
+        for button in (refreshButton, resetButton, jsonButton, traceButton):
+            buttonsLayout.addWidget(button)
+        buttonsLayout.addStretch(1)
+        buttonsLayout.addWidget(closeButton)
+        mainLayout = QVBoxLayout()
+        mainLayout.addWidget(self.summary)
+        mainLayout.addLayout(buttonsLayout)
+        self.setLayout(mainLayout)
+        self.refresh()
+
+    def refresh(self):
+        self.summary.setPlainText(json.dumps(profiler.summary(), indent=2, ensure_ascii=False))
+
+    def reset(self):
+        profiler.reset()
+        self.refresh()
+
+    def export(self, chromeTrace: bool):
+        filename, _ = QFileDialog.getSaveFileName(self, 'Сохранить профиль', '', 'JSON (*.json)')
+        if not filename:
+            return
+        if not filename.endswith('.json'):
+            filename += '.json'
+        try:
+            profiler.save(filename, chrome_trace=chromeTrace)
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Произошла ошибка при сохранении файла: {e}")
@@ -0,0 +1,56 @@
+import os
+
+from PyQt5.QtCore import QObject, QThread, Qt, pyqtSignal
+
+from dataframes.exporters import export_chunks
+from dataframes.models import Spreadsheet
+from dataframes.profiling import profiler
+from dataframes.recalc import RecalculationEngine
+
+
+class ExportWorker(QObject):
+    progress = pyqtSignal(int)
+    failed = pyqtSignal(str)
+    finished = pyqtSignal()
+
+    def __init__(self, spreadsheet: Spreadsheet, engine: RecalculationEngine, filename: str):
+        super(ExportWorker, self).__init__()
+        self.spreadsheet = spreadsheet
+        self.engine = engine
+        self.filename = filename
+        self.thread = QThread()
+        self.moveToThread(self.thread)
+        self.thread.started.connect(self.run)
+        self.finished.connect(self.thread.quit)
+
+    def start(self):
+        # the sheet is read in place, the engine refuses writes until the file is written
+        self.engine.lock()
+        self.thread.start()
+
+    def cancel(self):
+        self.thread.requestInterruption()
+
+    def cancelOn(self, *signals):
+        # run() holds the worker thread, a queued cancel would only arrive once it is done
+        for signal in signals:
+            signal.connect(self.cancel, Qt.DirectConnection)
+
+    def run(self):
+        rows = self.spreadsheet.shape[0]
+        with profiler.span('export', 'export', filename=self.filename, rows=rows):
+            try:
+                chunks = export_chunks(self.spreadsheet, self.filename, self.engine)
+                for progress in chunks:
+                    if self.thread.isInterruptionRequested():
+                        # a cancelled export leaves no partial file behind
+                        chunks.close()
+                        if os.path.exists(self.filename):
+                            os.remove(self.filename)
+                        break
+                    self.progress.emit(int(progress * 100))
+            except Exception as e:
+                self.failed.emit(str(e))
+            finally:
+                self.engine.unlock()
+        self.finished.emit()
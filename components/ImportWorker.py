@@ -0,0 +1,44 @@
+from PyQt5.QtCore import QObject, QThread, Qt, pyqtSignal
+
+from dataframes.importers import read_chunks
+from dataframes.models import Spreadsheet
+from dataframes.profiling import profiler
+
+
+class ImportWorker(QObject):
+    chunkRead = pyqtSignal(object)
+    progress = pyqtSignal(int)
+    failed = pyqtSignal(str)
+    finished = pyqtSignal()
+
+    def __init__(self, filename: str):
+        super(ImportWorker, self).__init__()
+        self.filename = filename
+        self.thread = QThread()
+        self.moveToThread(self.thread)
+        self.thread.started.connect(self.run)
+        self.finished.connect(self.thread.quit)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        self.thread.requestInterruption()
+
+    def cancelOn(self, *signals):
+        # run() holds the worker thread, a queued cancel would only arrive once it is done
+        for signal in signals:
+            signal.connect(self.cancel, Qt.DirectConnection)
+
+    def run(self):
+        with profiler.span('import', 'import', filename=self.filename, rows=0) as args:
+            try:
+                for chunk, progress in read_chunks(self.filename):
+                    if self.thread.isInterruptionRequested():
+                        break
+                    self.chunkRead.emit(Spreadsheet(data=chunk, sparse=False))
+                    self.progress.emit(int(progress * 100))
+                    args['rows'] += len(chunk)
+            except Exception as e:
+                self.failed.emit(str(e))
+        self.finished.emit()
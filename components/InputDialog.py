@@ -1,5 +1,6 @@
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QDialog, QLabel, QComboBox, QLineEdit, QPushButton, QVBoxLayout, QHBoxLayout, QGroupBox
+from dataframes.addresses import column_name
 from dataframes.models import Coordinates
 from visuals.spreadsheetitem import SpreadSheetItem
 from components.TableWidget import TableWidget
@@ -15,7 +16,7 @@ class InputDialog(QDialog):
         for r in range(table.rowCount()):
             rows.append(str(r + 1))
         for c in range(table.columnCount()):
-            cols.append(chr(ord('A') + c))
+            cols.append(column_name(c))
         self.setWindowTitle(title)
         group = QGroupBox(title, self)
         group.setMinimumSize(250, 100)
@@ -0,0 +1,96 @@
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+from PyQt5.QtWidgets import QWidget
+
+from dataframes.addresses import column_name
+from dataframes.models import Spreadsheet
+from dataframes.profiling import profiler
+from dataframes.recalc import RecalculationEngine
+from visuals.spreadsheetitem import DATE_FORMATS, display_value, parse_date, text_alignment, text_color
+
+
+class SpreadsheetModel(QAbstractTableModel):
+    valuesChanged = pyqtSignal(object)
+
+    def __init__(self, spreadsheet: Spreadsheet, parent: QWidget | None = None,
+                 engine: RecalculationEngine | None = None):
+        super(SpreadsheetModel, self).__init__(parent)
+        self.spreadsheet = spreadsheet
+        self.engine = engine or RecalculationEngine(spreadsheet)
+        self.dateFormat = DATE_FORMATS[0]
+
+    def setDateFormat(self, dateFormat: str):
+        if dateFormat == self.dateFormat:
+            return
+        self.dateFormat = dateFormat
+        rows, columns = self.spreadsheet.shape
+        if rows and columns:
+            self.dataChanged.emit(self.index(0, 0), self.index(rows - 1, columns - 1), [Qt.DisplayRole])
+
+    def resetSpreadsheet(self, spreadsheet: Spreadsheet):
+        self.beginResetModel()
+        self.spreadsheet = spreadsheet
+        self.engine = RecalculationEngine(spreadsheet)
+        self.endResetModel()
+
+    def appendSpreadsheet(self, spreadsheet: Spreadsheet):
+        rows, columns = self.spreadsheet.shape
+        added_rows, added_columns = spreadsheet.shape
+        if not added_rows:
+            return
+        if added_columns > columns:
+            self.beginInsertColumns(QModelIndex(), columns, added_columns - 1)
+            self.spreadsheet.append(Spreadsheet(added_columns, 0))
+            self.endInsertColumns()
+        self.beginInsertRows(QModelIndex(), rows, rows + added_rows - 1)
+        self.spreadsheet.append(spreadsheet)
+        self.endInsertRows()
+        for row, col in self.engine.load_rows(rows, rows + added_rows - 1):
+            if row < rows:
+                changed = self.index(row, col)
+                self.dataChanged.emit(changed, changed)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self.spreadsheet.shape[0]
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self.spreadsheet.shape[1]
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if role in (Qt.EditRole, Qt.StatusTipRole):
+            # dates are edited in the format they are shown in, setData reads them back with it
+            value = display_value(self.spreadsheet.get_value(row, col), self.dateFormat)
+            return None if value is None else str(value)
+        if role == Qt.DisplayRole:
+            if profiler.enabled:
+                profiler.count('cells evaluated')
+            return display_value(self.engine.value(row, col), self.dateFormat)
+        if role == Qt.TextColorRole:
+            return text_color(self.engine.value(row, col))
+        if role == Qt.TextAlignmentRole:
+            return text_alignment(self.engine.value(row, col))
+        return None
+
+    def setData(self, index: QModelIndex, value, role: int = Qt.EditRole) -> bool:
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        if isinstance(value, str):
+            value = parse_date(value, self.dateFormat) or value
+        cells = self.engine.set_value(index.row(), index.column(), value)
+        for row, col in cells:
+            changed = self.index(row, col)
+            self.dataChanged.emit(changed, changed)
+        self.valuesChanged.emit(cells)
+        return True
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return column_name(section)
+        return str(section + 1)
@@ -0,0 +1,29 @@
+from PyQt5.QtWidgets import QTableView, QWidget
+
+from components.SpreadsheetModel import SpreadsheetModel
+from dataframes.models import Spreadsheet
+from dataframes.profiling import profiler
+from dataframes.recalc import RecalculationEngine
+
+
+class TableView(QTableView):
+    def __init__(self, spreadsheet: Spreadsheet, parent: QWidget | None = None,
+                 engine: RecalculationEngine | None = None):
+        super(TableView, self).__init__(parent)
+        self.setModel(SpreadsheetModel(spreadsheet, self, engine))
+        self.verticalHeader().setDefaultSectionSize(self.verticalHeader().minimumSectionSize())
+
+    def paintEvent(self, event):
+        if not profiler.enabled:
+            return super(TableView, self).paintEvent(event)
+        evaluated = profiler.counter('cells evaluated')
+        with profiler.span('paint', 'render') as args:
+            super(TableView, self).paintEvent(event)
+            args['cells evaluated'] = profiler.counter('cells evaluated') - evaluated
+
+    @property
+    def spreadsheet(self) -> Spreadsheet:
+        return self.model().spreadsheet
+
+    def reset_data(self, data: Spreadsheet):
+        self.model().resetSpreadsheet(data)
@@ -1,8 +1,18 @@
-from PyQt5.QtCore import QDate, QPoint, Qt
-from PyQt5.QtGui import QColor, QPainter, QPixmap, QIcon
+from contextlib import contextmanager
+from datetime import date
+
+from PyQt5.QtCore import QDate, QPoint, Qt, pyqtSignal
+from PyQt5.QtGui import QBrush, QColor, QPainter, QPixmap, QIcon, QRegion
 from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem, QWidget, QCompleter, QDateTimeEdit, QItemDelegate, QLineEdit, QColorDialog, QFontDialog
 
+from components.CompleterModel import CompleterModel
+from dataframes.addresses import column_name
+from dataframes.distinct import DistinctValues
+from dataframes.journal import Journal
 from dataframes.models import Spreadsheet
+from dataframes.profiling import profiler
+from dataframes.recalc import RecalculationEngine
+from visuals.spreadsheetitem import DATE_FORMATS, SpreadSheetItem, display_value, parse_date
 
 
 class SpreadSheetDelegate(QItemDelegate):
@@ -10,21 +20,15 @@ class SpreadSheetDelegate(QItemDelegate):
         super(SpreadSheetDelegate, self).__init__(parent)
 
     def createEditor(self, parent, styleOption, index):
-        if index.column() == 1:
+        if isinstance(self.parent().engine.value(index.row(), index.column()), date):
             editor = QDateTimeEdit(parent)
-            editor.setDisplayFormat(self.parent().currentDateFormat)
+            editor.setDisplayFormat(self.parent().dateFormat)
             editor.setCalendarPopup(True)
             return editor
 
         editor = QLineEdit(parent)
-        # create a completer with the strings in the column as model
-        allStrings = []
-        for i in range(1, index.model().rowCount()):
-            strItem = index.model().data(index.sibling(i, index.column()), Qt.EditRole)
-            if strItem not in allStrings:
-                allStrings.append(strItem)
-
-        autoComplete = QCompleter(allStrings)
+        autoComplete = QCompleter(self.parent().completerModel(index.column()), editor)
+        autoComplete.setModelSorting(QCompleter.CaseSensitivelySortedModel)
         editor.setCompleter(autoComplete)
         editor.editingFinished.connect(self.commitAndCloseEditor)
         return editor
@@ -38,33 +42,187 @@ class SpreadSheetDelegate(QItemDelegate):
         if isinstance(editor, QLineEdit):
             editor.setText(index.model().data(index, Qt.EditRole))
         elif isinstance(editor, QDateTimeEdit):
-            editor.setDate(QDate.fromString(
-                index.model().data(index, Qt.EditRole), self.parent().currentDateFormat))
+            value = self.parent().engine.value(index.row(), index.column())
+            editor.setDate(QDate(value.year, value.month, value.day))
 
     def setModelData(self, editor, model, index):
         if isinstance(editor, QLineEdit):
             model.setData(index, editor.text())
         elif isinstance(editor, QDateTimeEdit):
-            model.setData(index, editor.date().toString(self.parent().currentDateFormat))
+            model.setData(index, editor.date().toString(self.parent().dateFormat))
 
 
 class TableWidget(QTableWidget):
+    cellsChanged = pyqtSignal(int, int, int, int)
+
     def __init__(self, data = [], rows_count: int = -1, columns_count: int = -1, parent: QWidget | None = None):
         super(TableWidget, self).__init__(rows_count, columns_count, parent)
         self.data = data
+        self.spreadsheet = Spreadsheet(columns_count, rows_count)
+        self.engine = RecalculationEngine(self.spreadsheet)
+        self.journal = Journal(self.engine, apply_style=self.applyStyle)
+        self.completerModels: dict[int, CompleterModel] = {}
+        self.bulkCells: set[tuple[int, int]] | None = None
+        self.dateFormat = DATE_FORMATS[0]
         self.resize(rows_count, columns_count)
-        self.setItemPrototype(self.item(rows_count - 1, columns_count - 1))
+        self.setItemPrototype(SpreadSheetItem())
         self.setItemDelegate(SpreadSheetDelegate(self))
         self.currentItemChanged.connect(self.updateItemColor)
+        self.itemChanged.connect(self.updateEngine)
         
     def resize(self, rows_count: int, columns_count: int) -> QWidget:
         for column_index in range(columns_count):
-            character = chr(ord('A') + column_index)
+            character = column_name(column_index)
             if self.data:
                 character = self.data.ALLOWED_Y_CHARACTER[column_index]
 
             self.setHorizontalHeaderItem(column_index, QTableWidgetItem(character))
 
+    def completerModel(self, column: int) -> CompleterModel:
+        model = self.completerModels.get(column)
+        if model is None:
+            values = DistinctValues.from_column(self.spreadsheet.column(column))
+            model = self.completerModels[column] = CompleterModel(values, self)
+        return model
+
+    def updateEngine(self, item):
+        # itemChanged also comes for backgrounds and fonts, only a new text reaches the engine
+        text = item.data(Qt.EditRole)
+        if text == item.committed:
+            return
+        item.committed = text
+        self.updateCells(self.commitCells({(item.row(), item.column()): text}))
+
+    def commitCells(self, values: dict[tuple[int, int], object]):
+        if self.engine.read_only:
+            # the sheet is being exported, the items take back the stored values
+            self.restoreCells(set(values))
+            return set()
+        values = {
+            cell: (parse_date(value, self.dateFormat) or value) if isinstance(value, str) else value
+            for cell, value in values.items()
+        }
+        for (row, column), value in values.items():
+            if column in self.completerModels:
+                self.completerModels[column].replace(self.spreadsheet.get_value(row, column), value)
+        return self.journal.set_values(values)
+
+    def undo(self):
+        if not self.engine.read_only:
+            self.restoreCells(self.journal.undo())
+
+    def redo(self):
+        if not self.engine.read_only:
+            self.restoreCells(self.journal.redo())
+
+    def edit(self, index, trigger, event):
+        if self.engine.read_only:
+            return False
+        return super(TableWidget, self).edit(index, trigger, event)
+
+    def restoreCells(self, cells: set[tuple[int, int]]):
+        # items take the text of the restored values without being journaled again
+        blocked = self.blockSignals(True)
+        try:
+            for row, column in cells:
+                value = self.spreadsheet.get_value(row, column)
+                text = '' if value is None else str(display_value(value, self.dateFormat))
+                item = self.item(row, column)
+                if item is None and text:
+                    item = SpreadSheetItem(text)
+                    self.setItem(row, column, item)
+                elif item is not None and item.formula() != text:
+                    item.setText(text)
+                if item is not None:
+                    item.committed = item.data(Qt.EditRole)
+                self.completerModels.pop(column, None)
+        finally:
+            self.blockSignals(blocked)
+        self.updateCells(cells)
+
+    def applyStyle(self, role: str, styles: dict[tuple[int, int], object]):
+        for (row, column), style in styles.items():
+            item = self.item(row, column)
+            if item is None:
+                continue
+            if role == 'background':
+                item.setBackground(style)
+            else:
+                item.setFont(style)
+        self.updateItemColor(self.currentItem())
+
+    def setDateFormat(self, dateFormat: str):
+        # dates are formatted when painted, switching needs no rewrite of the cells
+        self.dateFormat = dateFormat
+        self.viewport().update()
+
+    @contextmanager
+    def bulkEdit(self):
+        if self.bulkCells is not None:
+            yield
+            return
+        # edits only record their cells, the engine and the view are updated once at the end
+        self.bulkCells = set()
+        blocked = self.blockSignals(True)
+        try:
+            yield
+        finally:
+            cells, self.bulkCells = self.bulkCells, None
+            self.blockSignals(blocked)
+            values = {}
+            for row, column in cells:
+                item = self.item(row, column)
+                if item is None:
+                    values[(row, column)] = None
+                elif item.data(Qt.EditRole) != item.committed:
+                    values[(row, column)] = item.committed = item.data(Qt.EditRole)
+            self.updateCells(self.commitCells(values) | cells)
+            if cells:
+                rows, columns = [row for row, _ in cells], [column for _, column in cells]
+                self.cellsChanged.emit(min(rows), min(columns), max(rows), max(columns))
+
+    def setItem(self, row: int, column: int, item: QTableWidgetItem):
+        super(TableWidget, self).setItem(row, column, item)
+        if self.bulkCells is not None:
+            self.bulkCells.add((row, column))
+
+    def itemEdited(self, item: QTableWidgetItem):
+        if self.bulkCells is not None:
+            self.bulkCells.add((item.row(), item.column()))
+
+    def paintEvent(self, event):
+        if not profiler.enabled:
+            return super(TableWidget, self).paintEvent(event)
+        evaluated = profiler.counter('cells evaluated')
+        with profiler.span('paint', 'render') as args:
+            super(TableWidget, self).paintEvent(event)
+            args['cells evaluated'] = profiler.counter('cells evaluated') - evaluated
+
+    def updateCells(self, cells: set[tuple[int, int]]):
+        # repaint only the visible cells whose value changed
+        viewport = self.viewport()
+        firstRow, lastRow = self.rowAt(0), self.rowAt(viewport.height() - 1)
+        firstColumn, lastColumn = self.columnAt(0), self.columnAt(viewport.width() - 1)
+        lastRow = self.rowCount() - 1 if lastRow < 0 else lastRow
+        lastColumn = self.columnCount() - 1 if lastColumn < 0 else lastColumn
+        region = QRegion()
+        for row, column in cells:
+            if firstRow <= row <= lastRow and firstColumn <= column <= lastColumn:
+                region += self.visualRect(self.model().index(row, column))
+        if not region.isEmpty():
+            viewport.update(region)
+
+    def setBlock(self, firstRow: int, firstColumn: int, values):
+        with self.bulkEdit():
+            for row, rowValues in enumerate(values, firstRow):
+                for column, value in enumerate(rowValues, firstColumn):
+                    text = '' if value is None else str(value)
+                    item = self.item(row, column)
+                    if item is None:
+                        self.setItem(row, column, SpreadSheetItem(text))
+                    else:
+                        item.setText(text)
+
     def reset_data(self, data: Spreadsheet):
         self.resize(data.shape[0], data.shape[1])
         
@@ -96,8 +254,11 @@ class TableWidget(QTableWidget):
         selected = self.selectedItems()
         if not selected:
             return
+        changes = {}
         for i in selected:
-            i and i.setBackground(color)
+            changes[(i.row(), i.column())] = (i.background(), QBrush(color))
+            i.setBackground(color)
+        self.journal.record_styles('background', changes)
         self.updateItemColor(self.currentItem())
 
     def selectFont(self):
@@ -107,8 +268,11 @@ class TableWidget(QTableWidget):
         font, ok = QFontDialog.getFont(self.font(), self)
         if not ok:
             return
+        changes = {}
         for i in selected:
-            i and i.setFont(font)
+            changes[(i.row(), i.column())] = (i.font(), font)
+            i.setFont(font)
+        self.journal.record_styles('font', changes)
 
     def set_table_item(self, pos_x: int, pos_y: int, data: str):
         self.table.setItem(pos_x, pos_y, SpreadSheetItem(data))
@@ -0,0 +1,48 @@
+from PyQt5.QtWidgets import QTabBar, QVBoxLayout, QWidget
+
+from components.SpreadsheetModel import SpreadsheetModel
+from components.TableView import TableView
+from dataframes.workbook import Workbook
+
+
+class WorkbookView(QWidget):
+    def __init__(self, workbook: Workbook, parent: QWidget | None = None):
+        super(WorkbookView, self).__init__(parent)
+        self.workbook = workbook
+        self.sheet: str | None = None
+        self.view: TableView | None = None
+        self.dateFormat: str | None = None
+        self.tabs = QTabBar(self)
+        self.tabs.setShape(QTabBar.RoundedSouth)
+        self.tabs.setExpanding(False)
+        for name in workbook.sheet_names:
+            self.tabs.addTab(name)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+        layout.addWidget(self.tabs)
+        self.tabs.currentChanged.connect(self.showSheet)
+        self.showSheet(self.tabs.currentIndex())
+
+    def model(self) -> SpreadsheetModel | None:
+        return self.view.model() if self.view else None
+
+    def showSheet(self, index: int):
+        if index < 0:
+            return
+        # only the open sheet is pinned, the workbook may evict the others
+        if self.view is not None:
+            self.dateFormat = self.view.model().dateFormat
+            self.workbook.pin(self.sheet, False)
+            self.layout().removeWidget(self.view)
+            self.view.deleteLater()
+        self.sheet = self.tabs.tabText(index)
+        self.workbook.pin(self.sheet)
+        self.view = TableView(self.workbook.spreadsheet(self.sheet), self, self.workbook.engine(self.sheet))
+        if self.dateFormat is not None:
+            self.view.model().setDateFormat(self.dateFormat)
+        self.view.model().valuesChanged.connect(self.propagate)
+        self.layout().insertWidget(0, self.view)
+
+    def propagate(self, cells: set[tuple[int, int]]):
+        self.workbook.propagate(self.sheet, cells)
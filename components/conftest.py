@@ -0,0 +1,10 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(scope='session')
+def application():
+    QtWidgets = pytest.importorskip('PyQt5.QtWidgets')
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
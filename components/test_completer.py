@@ -0,0 +1,24 @@
+import pytest
+
+QtCore = pytest.importorskip('PyQt5.QtCore')
+
+from dataframes.distinct import DistinctValues  # noqa: E402
+
+from .CompleterModel import CompleterModel  # noqa: E402
+
+
+def test_completer_model_changes_rows_in_place(application):
+    model = CompleterModel(DistinctValues(['apple', 'apple', 'pear']))
+    events = []
+    model.rowsInserted.connect(lambda parent, first, last: events.append(('insert', first)))
+    model.rowsRemoved.connect(lambda parent, first, last: events.append(('remove', first)))
+    model.modelReset.connect(lambda: events.append('reset'))
+
+    model.replace('apple', 'plum')
+    assert events == [('insert', 2)]
+    model.replace('apple', None)
+    assert events == [('insert', 2), ('remove', 0)]
+    model.replace('pear', 'pear')
+    model.replace(None, '2')
+    assert events[-1] == ('insert', 0)
+    assert [model.data(model.index(row)) for row in range(model.rowCount())] == ['2', 'pear', 'plum']
@@ -0,0 +1,49 @@
+import pytest
+
+QtGui = pytest.importorskip('PyQt5.QtGui')
+
+from dataframes.models import Spreadsheet  # noqa: E402
+from visuals.printview import PrintView, export_pdf, pdf_printer  # noqa: E402
+
+from .SpreadsheetModel import SpreadsheetModel  # noqa: E402
+
+
+def wide_model(columns: int, rows: int) -> SpreadsheetModel:
+    spreadsheet = Spreadsheet(columns, rows)
+    for column in range(columns):
+        spreadsheet.set_value(0, column, 'long text ' * (column % 3 + 1))
+    spreadsheet.set_block(1, 0, [[row * columns + column for column in range(columns)] for row in range(1, rows)])
+    return SpreadsheetModel(spreadsheet)
+
+
+def test_tiles_cover_every_cell_once(application):
+    model = wide_model(30, 250)
+    view = PrintView(model)
+    width = 400
+    widths = view.columnWidths(QtGui.QFontMetrics(view.font), width)
+    assert len(widths) == 30 and all(0 < columnWidth <= width for columnWidth in widths)
+
+    tiles = list(view.tiles(widths, width, 60))
+    bands = list(dict.fromkeys(columns for _, columns in tiles))
+    assert len(bands) > 1 and len(tiles) == len(bands) * 5
+    # pages go down the rows of a band before the next band starts
+    assert [rows for rows, _ in tiles[:5]] == [range(0, 60), range(60, 120), range(120, 180), range(180, 240),
+                                               range(240, 250)]
+    for band in bands:
+        assert len(band) == 1 or sum(widths[column] for column in band) <= width
+    cells = [(row, column) for rows, columns in tiles for row in rows for column in columns]
+    assert len(cells) == len(set(cells)) == 30 * 250
+
+
+def test_export_pdf(application, tmp_path):
+    model = wide_model(30, 250)
+    filename = str(tmp_path / 'sheet.pdf')
+    pages = export_pdf(model, filename)
+    assert pages > 1
+    with open(filename, 'rb') as file:
+        assert file.read(5) == b'%PDF-'
+
+    printer = pdf_printer(str(tmp_path / 'range.pdf'))
+    printer.setFromTo(2, 3)
+    assert PrintView(model).print_(printer) == 2
+    assert PrintView().print_(printer) == 0
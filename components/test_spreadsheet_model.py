@@ -0,0 +1,111 @@
+from datetime import date
+
+import pytest
+
+QtCore = pytest.importorskip('PyQt5.QtCore')
+
+from PyQt5 import QtGui  # noqa: E402
+
+from dataframes.models import Spreadsheet  # noqa: E402
+
+from .SpreadsheetModel import SpreadsheetModel  # noqa: E402
+from .TableView import TableView  # noqa: E402
+
+
+def test_date_edit_round_trip(application):
+    model = SpreadsheetModel(Spreadsheet(2, 2))
+    index = model.index(0, 0)
+    model.setData(index, '05/1/2024')
+    assert model.spreadsheet.get_value(0, 0) == date(2024, 1, 5)
+    for dateFormat in ['dd/M/yyyy', 'yyyy/M/dd', 'dd.MM.yyyy']:
+        model.setDateFormat(dateFormat)
+        text = model.data(index, QtCore.Qt.EditRole)
+        assert text == model.data(index, QtCore.Qt.DisplayRole)
+        # writing back the editor text keeps the cell a date
+        model.setData(index, text)
+        assert model.spreadsheet.get_value(0, 0) == date(2024, 1, 5)
+    model.setData(index, '2024-01-05')
+    assert model.spreadsheet.get_value(0, 0) == date(2024, 1, 5)
+
+
+def test_model_shape_and_roles(application):
+    spreadsheet = Spreadsheet(3, 2)
+    spreadsheet.set_value(0, 0, -5)
+    spreadsheet.set_value(0, 1, 'text')
+    spreadsheet.set_value(1, 0, '* A1 A1')
+    model = SpreadsheetModel(spreadsheet)
+    assert model.rowCount() == 2 and model.columnCount() == 3
+    assert model.rowCount(model.index(0, 0)) == 0 and model.columnCount(model.index(0, 0)) == 0
+
+    formula = model.index(1, 0)
+    assert model.data(formula) == 25
+    assert model.data(formula, QtCore.Qt.EditRole) == model.data(formula, QtCore.Qt.StatusTipRole) == '* A1 A1'
+    assert model.data(model.index(0, 0), QtCore.Qt.TextColorRole) == QtGui.QColor(QtCore.Qt.red)
+    assert model.data(formula, QtCore.Qt.TextColorRole) == QtGui.QColor(QtCore.Qt.blue)
+    assert model.data(model.index(0, 0), QtCore.Qt.TextAlignmentRole) == QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter
+    assert model.data(model.index(0, 1), QtCore.Qt.TextAlignmentRole) is None
+    assert model.data(model.index(1, 1), QtCore.Qt.EditRole) is None
+    assert model.data(model.index(0, 0), QtCore.Qt.ToolTipRole) is None
+    assert model.data(QtCore.QModelIndex()) is None
+    assert model.flags(formula) & QtCore.Qt.ItemIsEditable
+
+    assert model.headerData(0, QtCore.Qt.Horizontal) == 'A'
+    assert model.headerData(27, QtCore.Qt.Horizontal) == 'AB'
+    assert model.headerData(0, QtCore.Qt.Vertical) == '1'
+    assert model.headerData(0, QtCore.Qt.Horizontal, QtCore.Qt.ToolTipRole) is None
+
+
+def test_set_data_updates_dependents(application):
+    spreadsheet = Spreadsheet(2, 3)
+    spreadsheet.set_value(0, 1, '+ A1 A2')
+    spreadsheet.set_value(1, 1, '* B1 B1')
+    model = SpreadsheetModel(spreadsheet)
+    changed, values = [], []
+    model.dataChanged.connect(lambda first, last: changed.append((first.row(), first.column())))
+    model.valuesChanged.connect(values.append)
+
+    assert model.setData(model.index(0, 0), '3')
+    assert model.data(model.index(1, 1)) == 9
+    assert sorted(changed) == [(0, 0), (0, 1), (1, 1)]
+    assert values == [{(0, 0), (0, 1), (1, 1)}]
+    assert not model.setData(model.index(0, 0), '4', QtCore.Qt.DisplayRole)
+    assert not model.setData(QtCore.QModelIndex(), '4')
+    assert model.data(model.index(0, 0)) == 3
+
+
+def test_append_spreadsheet(application):
+    spreadsheet = Spreadsheet(1, 1)
+    spreadsheet.set_value(0, 0, '=sum A1:A3')
+    model = SpreadsheetModel(spreadsheet)
+    inserted, changed = [], []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append(('rows', first, last)))
+    model.columnsInserted.connect(lambda parent, first, last: inserted.append(('columns', first, last)))
+    model.dataChanged.connect(lambda first, last: changed.append((first.row(), first.column())))
+
+    chunk = Spreadsheet(2, 2)
+    chunk.set_block(0, 0, [[1, 10], [2, 20]])
+    model.appendSpreadsheet(chunk)
+    assert inserted == [('columns', 1, 1), ('rows', 1, 2)]
+    assert model.rowCount() == 3 and model.columnCount() == 2
+    # the formula loaded earlier reads the appended rows
+    assert model.data(model.index(0, 0)) == 3 and changed == [(0, 0)]
+    assert model.data(model.index(2, 1)) == 20
+
+    model.appendSpreadsheet(Spreadsheet(2, 0))
+    assert model.rowCount() == 3 and inserted[-1] == ('rows', 1, 2)
+
+
+def test_table_view(application):
+    spreadsheet = Spreadsheet(2, 2)
+    spreadsheet.set_value(0, 0, 4)
+    view = TableView(spreadsheet)
+    assert view.spreadsheet is spreadsheet
+    assert view.model().data(view.model().index(0, 0)) == 4
+
+    replacement = Spreadsheet(3, 5)
+    resets = []
+    view.model().modelReset.connect(lambda: resets.append(True))
+    view.reset_data(replacement)
+    assert resets and view.spreadsheet is replacement
+    assert view.model().rowCount() == 5 and view.model().engine.spreadsheet is replacement
+    view.deleteLater()
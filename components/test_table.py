@@ -0,0 +1,55 @@
+from datetime import date
+
+import pytest
+
+QtWidgets = pytest.importorskip('PyQt5.QtWidgets')
+
+from PyQt5.QtGui import QColor, QFont  # noqa: E402
+
+from .TableWidget import TableWidget  # noqa: E402
+
+
+@pytest.fixture
+def table(application):
+    window = QtWidgets.QMainWindow()
+    window.colorAction = QtWidgets.QAction(window)
+    table = TableWidget(rows_count=5, columns_count=5, parent=window)
+    yield table
+    window.deleteLater()
+
+
+def test_style_change_keeps_date_after_format_switch(table):
+    table.model().setData(table.model().index(0, 0), '15/6/2006')
+    assert table.engine.value(0, 0) == date(2006, 6, 15)
+    table.setDateFormat('yyyy/M/dd')
+    table.item(0, 0).setBackground(QColor('red'))
+    table.item(0, 0).setFont(QFont('Serif'))
+    assert table.engine.value(0, 0) == date(2006, 6, 15)
+    # the style is not an edit of the value, a single undo takes back the date itself
+    table.undo()
+    assert table.engine.value(0, 0) is None and not table.journal.can_undo
+
+
+def test_edits_reach_the_engine(table):
+    table.model().setData(table.model().index(1, 0), '42')
+    table.model().setData(table.model().index(1, 1), '=sum A2 A2')
+    table.item(1, 0).setText('43')
+    table.setBlock(2, 0, [[1, 2]])
+    assert table.engine.value(1, 1) == 43 and table.engine.value(2, 1) == 2
+    table.undo()
+    assert table.engine.value(2, 1) is None and table.item(2, 1).text() == ''
+
+
+def test_locked_table_takes_no_edits(table):
+    table.model().setData(table.model().index(0, 0), '1')
+    table.engine.lock()
+    table.item(0, 0).setText('2')
+    table.model().setData(table.model().index(1, 0), '3')
+    table.setBlock(2, 0, [['x']])
+    table.undo()
+    assert not table.edit(table.model().index(0, 0), QtWidgets.QAbstractItemView.AllEditTriggers, None)
+    assert table.engine.value(0, 0) == 1 and table.item(0, 0).text() == '1'
+    assert table.item(1, 0).text() == '' and table.item(2, 0).text() == ''
+    table.engine.unlock()
+    table.item(0, 0).setText('2')
+    assert table.engine.value(0, 0) == 2
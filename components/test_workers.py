@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+QtCore = pytest.importorskip('PyQt5.QtCore')
+
+from dataframes import importers  # noqa: E402
+from dataframes.exporters import CHUNK_ROWS  # noqa: E402
+from dataframes.models import Spreadsheet  # noqa: E402
+from dataframes.recalc import RecalculationEngine  # noqa: E402
+
+from .ExportWorker import ExportWorker  # noqa: E402
+from .ImportWorker import ImportWorker  # noqa: E402
+
+
+class Canceller(QtCore.QObject):
+    canceled = QtCore.pyqtSignal()
+
+
+def wait(worker: ImportWorker | ExportWorker):
+    loop = QtCore.QEventLoop()
+    worker.thread.finished.connect(loop.quit)
+    QtCore.QTimer.singleShot(10_000, loop.quit)
+    if not worker.thread.isFinished():
+        loop.exec_()
+    assert worker.thread.wait(1000)
+
+
+def test_import_cancelled_from_gui_thread(tmp_path, monkeypatch, application):
+    monkeypatch.setattr(importers, 'FIRST_CHUNK_ROWS', 10)
+    monkeypatch.setattr(importers, 'CHUNK_ROWS', 10)
+    filename = str(tmp_path / 'data.csv')
+    with open(filename, 'w') as file:
+        file.writelines(f'{row},{row * 2}\n' for row in range(300))
+    worker = ImportWorker(filename)
+    canceller = Canceller()
+    worker.cancelOn(canceller.canceled)
+    chunks = []
+
+    def chunkRead(spreadsheet):
+        chunks.append(spreadsheet)
+        canceller.canceled.emit()
+
+    # the worker waits for each chunk to be handled, the cancel lands while it is still reading
+    worker.chunkRead.connect(chunkRead, QtCore.Qt.BlockingQueuedConnection)
+    worker.start()
+    wait(worker)
+    assert len(chunks) == 1
+
+
+def test_export_cancelled_from_gui_thread(tmp_path, application):
+    spreadsheet = Spreadsheet(1, CHUNK_ROWS * 3)
+    engine = RecalculationEngine(spreadsheet)
+    filename = str(tmp_path / 'values.csv')
+    worker = ExportWorker(spreadsheet, engine, filename)
+    canceller = Canceller()
+    worker.cancelOn(canceller.canceled)
+    steps = []
+
+    def progress(value):
+        steps.append(value)
+        # the worker reads the sheet in place, edits are refused until it is done
+        with pytest.raises(RuntimeError):
+            engine.set_value(CHUNK_ROWS + 1, 0, 'late')
+        canceller.canceled.emit()
+
+    worker.progress.connect(progress, QtCore.Qt.BlockingQueuedConnection)
+    worker.start()
+    wait(worker)
+    assert steps == [33]
+    assert not os.path.exists(filename)
+    assert spreadsheet.get_value(CHUNK_ROWS + 1, 0) is None and not engine.read_only
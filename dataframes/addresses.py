@@ -0,0 +1,113 @@
+import re
+from functools import lru_cache
+from typing import Sequence
+
+import numpy as np
+
+
+MAX_ROWS = 1 << 20
+MAX_COLUMNS = 1 << 14
+ADDRESS_CACHE_SIZE = 1 << 18
+
+Cell = tuple[int, int]
+Range = tuple[int, int, int, int]
+
+INVALID: Cell = (-1, -1)
+
+_ADDRESS = re.compile(r'\$?([A-Za-z]{1,3})\$?([0-9]{1,7})')
+# longest valid address is $XFD$1048576
+_MAX_LENGTH = 12
+
+
+def column_index(name: str) -> int:
+    index = 0
+    for letter in name.upper():
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+
+@lru_cache(maxsize=MAX_COLUMNS)
+def column_name(col: int) -> str:
+    name = ''
+    col += 1
+    while col > 0:
+        col, letter = divmod(col - 1, 26)
+        name = chr(65 + letter) + name
+    return name
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def decode_address(address: str) -> Cell:
+    match = _ADDRESS.fullmatch(address.strip())
+    if match is None:
+        return INVALID
+    row, col = int(match[2]) - 1, column_index(match[1])
+    if not 0 <= row < MAX_ROWS or not 0 <= col < MAX_COLUMNS:
+        return INVALID
+    return row, col
+
+
+def encode_address(row: int, col: int) -> str:
+    return f'{column_name(col)}{row + 1}'
+
+
+def decode_range(text: str) -> Range:
+    first, _, last = text.partition(':')
+    first_row, first_col = decode_address(first)
+    last_row, last_col = decode_address(last) if last else (first_row, first_col)
+    if first_row < 0 or last_row < 0:
+        return (*INVALID, *INVALID)
+    return min(first_row, last_row), min(first_col, last_col), max(first_row, last_row), max(first_col, last_col)
+
+
+def encode_range(first_row: int, first_col: int, last_row: int, last_col: int) -> str:
+    return f'{encode_address(first_row, first_col)}:{encode_address(last_row, last_col)}'
+
+
+def decode_addresses(addresses: Sequence[str] | np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    addresses = np.asarray(addresses)
+    rows = np.full(len(addresses), -1, dtype=np.int64)
+    cols = np.full(len(addresses), -1, dtype=np.int64)
+    if not len(addresses):
+        return rows, cols
+    if addresses.dtype.kind != 'U':
+        addresses = addresses.astype(str)
+    addresses = np.strings.strip(addresses)
+
+    if addresses.dtype.itemsize // 4 > _MAX_LENGTH:
+        addresses = np.where(np.strings.str_len(addresses) <= _MAX_LENGTH, addresses, '').astype(f'U{_MAX_LENGTH}')
+
+    # Horner's scheme over the character positions, one vectorized step per position
+    codes = addresses.view(np.uint32).reshape(len(addresses), -1)
+    row = np.zeros(len(addresses), dtype=np.int64)
+    col = np.zeros(len(addresses), dtype=np.int64)
+    letters = np.zeros(len(addresses), dtype=np.int64)
+    digits = np.zeros(len(addresses), dtype=np.int64)
+    dollars = np.zeros((2, len(addresses)), dtype=np.int64)
+    valid = np.ones(len(addresses), dtype=bool)
+    for position in range(codes.shape[1]):
+        code = codes[:, position].astype(np.int64)
+        code -= 32 * ((code >= 97) & (code <= 122))
+        is_letter = (code >= 65) & (code <= 90)
+        is_digit = (code >= 48) & (code <= 57)
+        # one optional $ before the column and one before the row, as in _ADDRESS
+        is_dollar = code == 36
+        valid &= is_letter | is_digit | is_dollar | (code == 0)
+        valid &= ~((is_letter | is_dollar) & (digits > 0))
+        valid &= ~(is_letter & (dollars[1] > 0) & (letters > 0))
+        dollars[0] += is_dollar & (letters == 0)
+        dollars[1] += is_dollar & (letters > 0)
+        col = np.where(is_letter, col * 26 + code - 64, col)
+        row = np.where(is_digit, row * 10 + code - 48, row)
+        letters += is_letter
+        digits += is_digit
+    row -= 1
+    col -= 1
+    valid &= (dollars <= 1).all(axis=0)
+    # the digit and letter counts of _ADDRESS, leading zeros do not make a longer row valid
+    valid &= (letters >= 1) & (letters <= 3) & (digits >= 1) & (digits <= 7)
+    valid &= (row >= 0) & (row < MAX_ROWS) & (col < MAX_COLUMNS)
+
+    rows[valid] = row[valid]
+    cols[valid] = col[valid]
+    return rows, cols
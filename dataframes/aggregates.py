@@ -0,0 +1,91 @@
+import math
+import re
+
+import numpy as np
+
+
+# plain decimal text, int() and float() also take whitespace, underscores and non-ascii digits
+NUMBER_TEXT = re.compile(r'[+-]?(?:(?P<integer>[0-9]+)|(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?)')
+
+
+def parse_number(text: str) -> int | float | None:
+    match = NUMBER_TEXT.fullmatch(text)
+    if match is None:
+        return None
+    if match['integer'] is not None:
+        return int(text)
+    number = float(text)
+    return number if math.isfinite(number) else None
+
+
+def _python_number(value) -> int | float:
+    value = float(value)
+    if value.is_integer():
+        return int(value)
+    return value
+
+
+def _sum(values: np.ndarray):
+    return _python_number(values.sum())
+
+
+def _average(values: np.ndarray):
+    if not values.size:
+        return 'nan'
+    return _python_number(values.mean())
+
+
+def _min(values: np.ndarray):
+    return _python_number(values.min()) if values.size else 0
+
+
+def _max(values: np.ndarray):
+    return _python_number(values.max()) if values.size else 0
+
+
+def _count(values: np.ndarray):
+    return int(values.size)
+
+
+def _product(values: np.ndarray):
+    return _python_number(values.prod()) if values.size else 0
+
+
+AGGREGATES = {
+    'sum': _sum,
+    'average': _average,
+    'min': _min,
+    'max': _max,
+    'count': _count,
+    'product': _product,
+}
+
+
+def to_float(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        number = parse_number(value)
+        if number is not None:
+            return float(number)
+    return np.nan
+
+
+def to_numeric_array(values) -> np.ndarray:
+    return np.fromiter((to_float(value) for value in values), dtype=np.float64)
+
+
+def masked_aggregate(operator: str, filled: np.ndarray, valid: np.ndarray, mask: np.ndarray) -> int | float | str:
+    # missing values are zeros in filled, a dot product sums the masked cells without selecting them
+    count = int(np.count_nonzero(mask & valid))
+    if operator == 'count':
+        return count
+    if operator == 'average' and not count:
+        return 'nan'
+    total = float(np.dot(filled.ravel(), mask.ravel()))
+    return _python_number(total / count if operator == 'average' else total)
+
+
+def aggregate(operator: str, block: np.ndarray) -> int | float | str:
+    values = block[~np.isnan(block)]
+    return AGGREGATES[operator](values)
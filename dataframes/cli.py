@@ -0,0 +1,92 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .exporters import EXPORT_FORMATS, export
+from .models import Spreadsheet
+from .recalc import RecalculationEngine
+from .storage import SUFFIX, save_workbook
+from .workbook import load_sheet
+
+
+FORMATS = tuple(suffix[1:] for suffix in EXPORT_FORMATS) + (SUFFIX[1:],)
+
+
+def load(filename: str) -> Spreadsheet:
+    return load_sheet(filename)
+
+
+def save(spreadsheet: Spreadsheet, engine: RecalculationEngine, filename: str):
+    if filename.endswith(SUFFIX):
+        for row, col in engine.formula_cells():
+            spreadsheet.set_value(row, col, engine.value(row, col))
+        save_workbook(spreadsheet, filename)
+    else:
+        export(spreadsheet, filename, engine)
+
+
+def recalculate_file(source: str, target: str, max_workers: int | None = None) -> tuple[int, float]:
+    started = time.perf_counter()
+    spreadsheet = load(source)
+    engine = RecalculationEngine(spreadsheet, max_workers=max_workers)
+    save(spreadsheet, engine, target)
+    return len(engine.formula_cells()), time.perf_counter() - started
+
+
+def output_name(source: str, output_dir: str | None, output_format: str) -> str:
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(output_dir or os.path.dirname(source), f'{stem}.out.{output_format}')
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m dataframes',
+        description='Recalculate the formulas of spreadsheet files and write the computed values.',
+    )
+    parser.add_argument('inputs', nargs='+', help=f'{SUFFIX}, csv, json or xlsx files')
+    parser.add_argument('-o', '--output', help='output file, only with a single input')
+    parser.add_argument('-d', '--output-dir', help='directory for the output files')
+    parser.add_argument('-f', '--format', choices=FORMATS, default='csv', help='output format')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='files recalculated in parallel, one job spreads the formulas of a file over the cores')
+    args = parser.parse_args(argv)
+    if args.output and len(args.inputs) > 1:
+        parser.error('--output needs a single input, use --output-dir')
+
+    targets = [args.output or output_name(source, args.output_dir, args.format) for source in args.inputs]
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.jobs) if args.jobs > 1 else _Serial() as executor:
+        # parallel files keep their formulas in their own process
+        max_workers = 1 if args.jobs > 1 else None
+        futures = [executor.submit(recalculate_file, *job, max_workers) for job in zip(args.inputs, targets)]
+        for source, target, future in zip(args.inputs, targets, futures):
+            try:
+                formulas, seconds = future.result()
+            except Exception as e:
+                failed += 1
+                print(f'{source}: {e}', file=sys.stderr)
+                continue
+            print(f'{source} -> {target}: {formulas} formulas in {seconds:.3f}s')
+    return 1 if failed else 0
+
+
+class _Serial():
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def submit(self, function, *args):
+        return _Result(function, *args)
+
+
+class _Result():
+    def __init__(self, function, *args):
+        self._function = function
+        self._args = args
+
+    def result(self):
+        return self._function(*self._args)
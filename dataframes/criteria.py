@@ -0,0 +1,169 @@
+import operator as operators
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Iterable
+
+import numpy as np
+
+
+MAX_CRITERIA_COLUMNS = 64
+MAX_MASKS = 64
+
+COMPARISONS = {
+    '=': operators.eq,
+    '<': operators.lt,
+    '>': operators.gt,
+    '<=': operators.le,
+    '>=': operators.ge,
+}
+# longer prefixes first, '<=' is not '<' followed by '='
+PREFIXES = ('<>', '<=', '>=', '=', '<', '>')
+
+BLANK, NUMBER, DAY, TEXT = range(4)
+
+
+@dataclass(frozen=True)
+class Criterion():
+    comparison: str
+    kind: int
+    operand: object = None
+
+    def matches_text(self, text: str) -> bool:
+        if self.comparison in ('=', '<>'):
+            return _pattern(self.operand).fullmatch(text) is not None
+        return COMPARISONS[self.comparison](text, self.operand)
+
+    def mask(self, column: 'CriteriaColumn', start: int = 0, stop: int | None = None) -> np.ndarray:
+        # '<>' is the complement of '=', it also matches blanks and cells of another kind
+        comparison = '=' if self.comparison == '<>' else self.comparison
+        if self.kind == BLANK:
+            mask = column.empty[start:stop].copy()
+        elif self.kind == NUMBER:
+            mask = COMPARISONS[comparison](column.numbers[start:stop], self.operand)
+        elif self.kind == DAY:
+            mask = COMPARISONS[comparison](column.dates[start:stop], self.operand)
+        else:
+            # each distinct text is tested once, cells that are not text have code -1 and pick the trailing False
+            criterion = Criterion(comparison, TEXT, self.operand)
+            codes = column.codes[start:stop]
+            present = np.unique(codes[codes >= 0]).tolist()
+            hits = np.zeros(len(column.texts) + 1, dtype=bool)
+            hits[present] = [criterion.matches_text(column.texts[code]) for code in present]
+            mask = hits[codes]
+        return ~mask if self.comparison == '<>' else mask
+
+
+@lru_cache(maxsize=1024)
+def _pattern(text: str) -> re.Pattern:
+    # * and ? are wildcards, ~ escapes them
+    parts = re.split(r'(~[*?~]|[*?])', text)
+    wildcards = {'*': '.*', '?': '.'}
+    return re.compile(''.join(
+        wildcards.get(part) or re.escape(part[1:] if part.startswith('~') and len(part) == 2 else part)
+        for part in parts
+    ), re.DOTALL)
+
+
+def _day(value: date) -> np.datetime64:
+    return np.datetime64(value, 'us')
+
+
+@lru_cache(maxsize=4096)
+def parse_criterion(text: str) -> Criterion:
+    comparison = next((prefix for prefix in PREFIXES if text.startswith(prefix)), '')
+    operand = text[len(comparison):]
+    comparison = comparison or '='
+    if not operand:
+        return Criterion(comparison, BLANK)
+    try:
+        return Criterion(comparison, NUMBER, float(operand))
+    except ValueError:
+        pass
+    try:
+        return Criterion(comparison, DAY, _day(date.fromisoformat(operand)))
+    except ValueError:
+        return Criterion(comparison, TEXT, operand.casefold())
+
+
+def criterion(value) -> Criterion:
+    # the criterion of a cell is its value, text may carry a comparison
+    if value is None:
+        return Criterion('=', BLANK)
+    if isinstance(value, str):
+        return parse_criterion(value)
+    if isinstance(value, (date, datetime)):
+        return Criterion('=', DAY, _day(value))
+    if isinstance(value, (int, float)):
+        return Criterion('=', NUMBER, float(value))
+    return parse_criterion(str(value))
+
+
+class CriteriaColumn():
+    # a range of one column as numbers, dates and text codes, masks are cached per criterion
+    def __init__(self, numbers: np.ndarray, dates: np.ndarray, empty: np.ndarray,
+                 offsets: np.ndarray | None = None, texts: Iterable[str] = ()):
+        self.numbers = numbers
+        self.dates = dates
+        self.empty = empty
+        self.codes = np.full(len(numbers), -1, dtype=np.int64)
+        self.texts: list[str] = []
+        self._codes: dict[str, int] = {}
+        if offsets is not None and len(offsets):
+            # equal texts are folded once, then every cell takes the code of its folded text
+            distinct: dict[str, int] = {}
+            codes = [distinct.setdefault(text, len(distinct)) for text in texts]
+            folded = np.array([self._code(text.casefold()) for text in distinct], dtype=np.int64)
+            self.codes[offsets] = folded[codes]
+        self._masks: OrderedDict[Criterion, np.ndarray] = OrderedDict()
+        # numbers with zeros for missing values and where they are valid, made on first use
+        self._filled: np.ndarray | None = None
+        self._valid: np.ndarray | None = None
+
+    @classmethod
+    def from_values(cls, values: list) -> 'CriteriaColumn':
+        column = cls(np.full(len(values), np.nan), np.full(len(values), np.datetime64('NaT'), dtype='datetime64[us]'),
+                     np.ones(len(values), dtype=bool))
+        for offset, value in enumerate(values):
+            column.update(offset, value)
+        return column
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def _code(self, text: str) -> int:
+        code = self._codes.get(text)
+        if code is None:
+            code = self._codes[text] = len(self.texts)
+            self.texts.append(text)
+        return code
+
+    def filled(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._filled is None:
+            self._valid = ~np.isnan(self.numbers)
+            self._filled = np.where(self._valid, self.numbers, 0.0)
+        return self._filled, self._valid
+
+    def mask(self, criterion: Criterion) -> np.ndarray:
+        mask = self._masks.get(criterion)
+        if mask is None:
+            mask = self._masks[criterion] = criterion.mask(self)
+            if len(self._masks) > MAX_MASKS:
+                self._masks.popitem(last=False)
+        else:
+            self._masks.move_to_end(criterion)
+        return mask
+
+    def update(self, offset: int, value):
+        number = isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool)
+        self.numbers[offset] = value if number else np.nan
+        if self._filled is not None:
+            self._filled[offset] = value if number else 0.0
+            self._valid[offset] = number
+        self.dates[offset] = _day(value) if isinstance(value, date) else np.datetime64('NaT')
+        self.codes[offset] = self._code(value.casefold()) if isinstance(value, str) else -1
+        self.empty[offset] = value is None
+        for criterion, mask in self._masks.items():
+            mask[offset] = criterion.mask(self, offset, offset + 1)[0]
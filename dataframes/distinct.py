@@ -0,0 +1,65 @@
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Iterable
+
+from .models import SparseColumn, TypedColumn, parse_value
+
+
+def value_text(value) -> str | None:
+    value = parse_value(value)
+    return None if value is None else str(value)
+
+
+class DistinctValues():
+    def __init__(self, values: Iterable = ()):
+        self._counts = Counter(text for text in map(value_text, values) if text is not None)
+        self.values = sorted(self._counts)
+
+    @classmethod
+    def from_column(cls, column: TypedColumn | SparseColumn) -> 'DistinctValues':
+        # stored values are parsed already, only their text is needed
+        distinct = cls()
+        distinct._counts = Counter(str(value) for value in column.to_list() if value is not None)
+        distinct.values = sorted(distinct._counts)
+        return distinct
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index: int) -> str:
+        return self.values[index]
+
+    def __contains__(self, value) -> bool:
+        return value_text(value) in self._counts
+
+    def add(self, value) -> bool:
+        text = value_text(value)
+        if text is None:
+            return False
+        self._counts[text] += 1
+        if self._counts[text] > 1:
+            return False
+        insort(self.values, text)
+        return True
+
+    def discard(self, value) -> bool:
+        text = value_text(value)
+        if text not in self._counts:
+            return False
+        self._counts[text] -= 1
+        if self._counts[text]:
+            return False
+        del self._counts[text]
+        del self.values[bisect_left(self.values, text)]
+        return True
+
+    def replace(self, old, new) -> bool:
+        removed = self.discard(old)
+        return self.add(new) or removed
+
+    def count(self, value) -> int:
+        return self._counts.get(value_text(value), 0)
+
+    def position(self, value) -> int:
+        # where the text of the value is, or would be inserted, in the sorted values
+        return bisect_left(self.values, value_text(value))
@@ -0,0 +1,145 @@
+import csv
+from importlib.util import find_spec
+from typing import Iterator
+
+import numpy as np
+
+from .addresses import column_name
+from .models import (
+    BLOCK_ROWS, DATE, EMPTY, FLOAT, FORMULA, INTEGER, STRING, SparseColumn, Spreadsheet, TypedColumn, _value_tag,
+)
+from .recalc import RecalculationEngine
+
+
+CHUNK_ROWS = 64 * BLOCK_ROWS
+
+EXPORT_FORMATS = ('.csv', '.xlsx', '.parquet')
+# formats written by an optional package
+EXPORT_MODULES = {'.xlsx': 'openpyxl', '.parquet': 'pyarrow'}
+
+
+def available_formats() -> tuple[str, ...]:
+    return tuple(
+        suffix for suffix in EXPORT_FORMATS if suffix not in EXPORT_MODULES or find_spec(EXPORT_MODULES[suffix])
+    )
+
+
+def iter_value_chunks(spreadsheet: Spreadsheet, engine: RecalculationEngine | None = None,
+                      chunk_rows: int = CHUNK_ROWS) -> Iterator[tuple[int, list[list]]]:
+    # one chunk of columns at a time straight from the typed arrays, formula cells take their computed value
+    rows, cols = spreadsheet.shape
+    for start in range(0, rows, chunk_rows):
+        stop = min(start + chunk_rows, rows)
+        columns = []
+        for col in range(cols):
+            column = spreadsheet.column(col)
+            values = column.to_list(start, stop)
+            for row, value in column.iter_items(FORMULA, start, stop):
+                values[row - start] = engine.value(row, col) if engine else str(value)
+            columns.append(values)
+        yield stop, columns
+
+
+def iter_value_rows(spreadsheet: Spreadsheet, engine: RecalculationEngine | None = None) -> Iterator[tuple]:
+    for _, columns in iter_value_chunks(spreadsheet, engine):
+        yield from zip(*columns)
+
+
+def write_csv_chunks(spreadsheet: Spreadsheet, filename: str,
+                     engine: RecalculationEngine | None = None) -> Iterator[float]:
+    rows = spreadsheet.shape[0]
+    with open(filename, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        for stop, columns in iter_value_chunks(spreadsheet, engine):
+            writer.writerows(zip(*columns))
+            yield stop / rows
+
+
+def write_xlsx_chunks(spreadsheet: Spreadsheet, filename: str,
+                      engine: RecalculationEngine | None = None) -> Iterator[float]:
+    from openpyxl import Workbook
+
+    # a write-only workbook streams its rows to disk instead of keeping cells in memory
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    rows = spreadsheet.shape[0]
+    for stop, columns in iter_value_chunks(spreadsheet, engine):
+        for values in zip(*columns):
+            worksheet.append(values)
+        yield stop / rows
+    workbook.save(filename)
+
+
+def column_kind(column: TypedColumn | SparseColumn, results: set[int] = frozenset()) -> int:
+    # results are the tags of the computed values of the column's formulas
+    kinds = {int(tag) for tag in np.unique(column.tags)} - {EMPTY}
+    if FORMULA in kinds:
+        kinds = (kinds - {FORMULA}) | (set(results) - {EMPTY})
+    if kinds <= {INTEGER}:
+        return INTEGER if kinds else STRING
+    if kinds <= {INTEGER, FLOAT}:
+        return FLOAT
+    if kinds == {DATE}:
+        return DATE
+    return STRING
+
+
+def _column_kinds(spreadsheet: Spreadsheet, engine: RecalculationEngine | None) -> list[int]:
+    results: dict[int, set[int]] = {}
+    for row, col in engine.formula_cells() if engine else ():
+        results.setdefault(col, set()).add(_value_tag(engine.value(row, col)))
+    # formula text is written as is without an engine
+    unknown = {STRING} if engine is None else set()
+    return [
+        column_kind(spreadsheet.column(col), results.get(col, unknown))
+        for col in range(spreadsheet.shape[1])
+    ]
+
+
+def _arrow_array(pa, values: list, kind: int):
+    if kind == INTEGER:
+        return pa.array(values, type=pa.int64())
+    if kind == FLOAT:
+        return pa.array(np.array([np.nan if value is None else value for value in values], dtype=np.float64),
+                        from_pandas=True)
+    if kind == DATE:
+        return pa.array(np.array(values, dtype='datetime64[us]'), from_pandas=True)
+    return pa.array([None if value is None else str(value) for value in values], type=pa.string())
+
+
+def write_parquet_chunks(spreadsheet: Spreadsheet, filename: str,
+                         engine: RecalculationEngine | None = None) -> Iterator[float]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # a column keeps one type in every row group, mixed columns are written as text
+    kinds = _column_kinds(spreadsheet, engine)
+    types = {INTEGER: pa.int64(), FLOAT: pa.float64(), DATE: pa.timestamp('us'), STRING: pa.string()}
+    schema = pa.schema([(column_name(col), types[kind]) for col, kind in enumerate(kinds)])
+    rows = spreadsheet.shape[0]
+    with pq.ParquetWriter(filename, schema) as writer:
+        for stop, columns in iter_value_chunks(spreadsheet, engine):
+            arrays = [_arrow_array(pa, values, kind) for values, kind in zip(columns, kinds)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield stop / rows
+
+
+def export_chunks(spreadsheet: Spreadsheet, filename: str,
+                  engine: RecalculationEngine | None = None) -> Iterator[float]:
+    if filename.endswith('.csv'):
+        return write_csv_chunks(spreadsheet, filename, engine)
+    elif filename.endswith('.xlsx'):
+        return write_xlsx_chunks(spreadsheet, filename, engine)
+    elif filename.endswith('.parquet'):
+        return write_parquet_chunks(spreadsheet, filename, engine)
+    raise ValueError(f'Unsupported file format: {filename}')
+
+
+def export(spreadsheet: Spreadsheet, filename: str, engine: RecalculationEngine | None = None):
+    for _ in export_chunks(spreadsheet, filename, engine):
+        pass
+
+
+def write_csv(spreadsheet: Spreadsheet, filename: str, engine: RecalculationEngine | None = None):
+    for _ in write_csv_chunks(spreadsheet, filename, engine):
+        pass
@@ -0,0 +1,441 @@
+import operator as operators
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Sequence
+
+import numpy as np
+
+from .addresses import Cell, Range, decode_address, decode_addresses, decode_range
+from .aggregates import AGGREGATES, aggregate, masked_aggregate, parse_number, to_numeric_array
+from .criteria import CriteriaColumn, criterion
+from .lookups import NOT_FOUND, ColumnIndex
+
+
+FORMULA_CACHE_SIZE = 65536
+
+BINARY_OPERATORS = {
+    '+': operators.add,
+    '-': operators.sub,
+    '*': operators.mul,
+}
+LOOKUPS = ('vlookup', 'match', 'xlookup')
+# conditional aggregates and the aggregate applied to the matching cells
+CONDITIONALS = {
+    'sumif': 'sum',
+    'countif': 'count',
+    'averageif': 'average',
+    'sumifs': 'sum',
+    'countifs': 'count',
+    'averageifs': 'average',
+}
+MULTIPLE_ARGUMENTS = LOOKUPS + tuple(CONDITIONALS)
+OPERATORS = tuple(AGGREGATES) + tuple(BINARY_OPERATORS) + ('/', '=') + MULTIPLE_ARGUMENTS
+
+
+def to_number(value) -> int | float:
+    if isinstance(value, (int, float)):
+        return value
+    number = parse_number(str(value))
+    return 0 if number is None else number
+
+
+def parse_operator(text: str) -> str:
+    operator = text.split(' ', 1)[0].lower()
+    if len(operator) > 1 and operator.startswith('='):
+        operator = operator[1:]
+    return operator
+
+
+def is_formula(value) -> bool:
+    return isinstance(value, str) and parse_operator(value) in OPERATORS
+
+
+@dataclass(frozen=True)
+class CompiledFormula():
+    text: str
+    operator: str
+    references: tuple[Cell, ...]
+    ranges: tuple[Range, ...]
+    evaluate: Callable
+    # references to other sheets of a workbook, as (sheet, range)
+    external: tuple[tuple[str, Range], ...] = ()
+
+
+def _no_value(row: int, col: int, sheet: str | None = None):
+    return None
+
+
+def _compile_aggregate(operator: str, first: Cell, second: Cell, sheet: str | None = None) -> Callable:
+    (first_row, first_col), (last_row, last_col) = first, second
+    rows = range(max(first_row, 0), last_row + 1)
+    cols = range(max(first_col, 0), last_col + 1)
+    # resolvers of a single sheet are called without the sheet argument
+    extra = () if sheet is None else (sheet,)
+
+    def evaluate(resolve=_no_value, block=None, index=None, criteria=None):
+        if block is not None:
+            return aggregate(operator, block(first_row, first_col, last_row, last_col, *extra))
+        return aggregate(operator, to_numeric_array([resolve(row, col, *extra) for row in rows for col in cols]))
+
+    return evaluate
+
+
+def _compile_operand(cell: Cell, sheet: str | None = None) -> Callable:
+    row, col = cell
+    if row < 0 or col < 0:
+        return lambda resolve: None
+    if sheet is not None:
+        return lambda resolve: resolve(row, col, sheet)
+    return lambda resolve: resolve(row, col)
+
+
+def _compile_binary(operator: str, first: Cell, second: Cell, sheets: list[str | None]) -> Callable:
+    function = BINARY_OPERATORS[operator]
+    first_operand, second_operand = _compile_operand(first, sheets[0]), _compile_operand(second, sheets[1])
+
+    def evaluate(resolve=_no_value, block=None, index=None, criteria=None):
+        return function(to_number(first_operand(resolve)), to_number(second_operand(resolve)))
+
+    return evaluate
+
+
+def _compile_division(first: Cell, second: Cell, sheets: list[str | None]) -> Callable:
+    first_operand, second_operand = _compile_operand(first, sheets[0]), _compile_operand(second, sheets[1])
+
+    def evaluate(resolve=_no_value, block=None, index=None, criteria=None):
+        divisor = to_number(second_operand(resolve))
+        if divisor == 0:
+            return 'nan'
+        return to_number(first_operand(resolve)) / divisor
+
+    return evaluate
+
+
+def _compile_reference(first: Cell, sheet: str | None = None) -> Callable:
+    operand = _compile_operand(first, sheet)
+
+    def evaluate(resolve=_no_value, block=None, index=None, criteria=None):
+        return operand(resolve)
+
+    return evaluate
+
+
+def _literal(token: str) -> int | float | str:
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    try:
+        return float(token)
+    except ValueError:
+        return token
+
+
+def _argument(token: str) -> tuple[str | None, Range | None, object]:
+    # a cell or a range, with an optional sheet, anything else is a literal
+    sheet, mark, address = token.rpartition('!')
+    first, colon, last = address.partition(':')
+    if decode_address(first)[0] < 0 or (colon and decode_address(last)[0] < 0):
+        return None, None, _literal(token)
+    area = decode_range(address) if colon else (*decode_address(first), *decode_address(first))
+    return sheet if mark else None, area, None
+
+
+def _compile_key(argument: tuple[str | None, Range | None, object]) -> Callable:
+    sheet, area, literal = argument
+    if area is None:
+        return lambda resolve: literal
+    return _compile_operand(area[:2], sheet)
+
+
+def _compile_search(sheet: str | None, area: Range, direction: int | None) -> Callable:
+    # finds the offset of a key in the first column of the area, direction is None for an exact match
+    first_row, first_col, last_row, _ = area
+    extra = () if sheet is None else (sheet,)
+
+    def search(key, resolve, index) -> int:
+        if index is None:
+            # without an engine the column is read through resolve on every evaluation
+            rows = range(first_row, last_row + 1)
+            column = ColumnIndex([resolve(row, first_col, *extra) for row in rows])
+        else:
+            column = index(first_row, first_col, last_row, *extra)
+            if column is None:
+                return -1
+        return column.find(key) if direction is None else column.find_nearest(key, direction)
+
+    return search
+
+
+def _compile_lookup(operator: str, arguments: list) -> Callable:
+    while len(arguments) < 4:
+        arguments.append((None, None, None))
+    key = _compile_key(arguments[0])
+    sheet, table, _ = arguments[1]
+    result_sheet, result, literal = arguments[2]
+    mode = arguments[3][2]
+    if table is None:
+        return lambda resolve=_no_value, block=None, index=None, criteria=None: NOT_FOUND
+    extra = () if sheet is None else (sheet,)
+
+    if operator == 'vlookup':
+        search = _compile_search(sheet, table, -1 if mode else None)
+        first_row, first_col, _, last_col = table
+
+        def evaluate(resolve=_no_value, block=None, index=None, criteria=None):
+            if not isinstance(literal, int) or not 0 < literal <= last_col - first_col + 1:
+                return NOT_FOUND
+            offset = search(key(resolve), resolve, index)
+            return NOT_FOUND if offset < 0 else resolve(first_row + offset, first_col + literal - 1, *extra)
+
+        return evaluate
+
+    if operator == 'match':
+        # match types follow the spreadsheet convention, 1 is the largest key not above the value
+        search = _compile_search(sheet, table, {1: -1, -1: 1}.get(literal))
+
+        def evaluate(resolve=_no_value, block=None, index=None, criteria=None):
+            offset = search(key(resolve), resolve, index)
+            return NOT_FOUND if offset < 0 else offset + 1
+
+        return evaluate
+
+    search = _compile_search(sheet, table, {-1: -1, 1: 1}.get(mode))
+    if result is None:
+        return lambda resolve=_no_value, block=None, index=None, criteria=None: NOT_FOUND
+    result_row, result_col, last_row, _ = result
+    result_extra = () if result_sheet is None else (result_sheet,)
+
+    def evaluate(resolve=_no_value, block=None, index=None, criteria=None):
+        offset = search(key(resolve), resolve, index)
+        if offset < 0 or result_row + offset > last_row:
+            return NOT_FOUND
+        return resolve(result_row + offset, result_col, *result_extra)
+
+    return evaluate
+
+
+def _compile_lookup_formula(text: str, operator: str) -> CompiledFormula:
+    arguments = [_argument(token) for token in text.split(' ')[1:] if token]
+    # the third argument of match is its mode
+    areas = arguments[:2] if operator == 'match' else arguments[:3]
+    references, ranges, external = [], [], []
+    for position, (sheet, area, _) in enumerate(areas):
+        if area is None:
+            continue
+        if sheet is not None:
+            external.append((sheet, area))
+        elif position == 0:
+            references.append(area[:2])
+        else:
+            ranges.append(area)
+    return CompiledFormula(
+        text=text,
+        operator=operator,
+        references=tuple(references),
+        ranges=tuple(ranges),
+        evaluate=_compile_lookup(operator, list(arguments)),
+        external=tuple(external),
+    )
+
+
+def _fit(values: np.ndarray, shape: tuple[int, ...], fill=False) -> np.ndarray:
+    # ranges are cut at the end of their sheet, line them up with the criteria area
+    if values.shape == shape:
+        return values
+    fitted = np.full(shape, fill, dtype=values.dtype)
+    overlap = tuple(slice(0, min(size, other)) for size, other in zip(shape, values.shape))
+    fitted[overlap] = values[overlap]
+    return fitted
+
+
+def _stack(columns: list[np.ndarray], fill) -> np.ndarray:
+    height = max(len(column) for column in columns)
+    if len(columns) == 1:
+        return columns[0][:, None]
+    return np.column_stack([_fit(column, (height,), fill) for column in columns])
+
+
+def _criteria_columns(sheet: str | None, area: Range, resolve, criteria) -> list[CriteriaColumn | None]:
+    first_row, first_col, last_row, last_col = area
+    extra = () if sheet is None else (sheet,)
+    if criteria is not None:
+        return [criteria(first_row, col, last_row, *extra) for col in range(first_col, last_col + 1)]
+    # without an engine the columns are read through resolve and nothing is cached
+    rows = range(first_row, last_row + 1)
+    return [
+        CriteriaColumn.from_values([resolve(row, col, *extra) for row in rows])
+        for col in range(first_col, last_col + 1)
+    ]
+
+
+def _compile_condition(area_argument, criterion_argument) -> Callable:
+    sheet, area, _ = area_argument
+    operand = _compile_key(criterion_argument)
+
+    def condition(resolve, criteria) -> np.ndarray:
+        wanted = criterion(operand(resolve))
+        columns = _criteria_columns(sheet, area, resolve, criteria)
+        return _stack([np.zeros(0, dtype=bool) if column is None else column.mask(wanted) for column in columns], False)
+
+    return condition
+
+
+def _conditional_arguments(operator: str, arguments: list) -> tuple[list, tuple | None] | None:
+    # pairs of criteria area and criterion, and the values as (sheet, area) in the shape of the criteria
+    if operator.endswith('ifs'):
+        values = None if operator == 'countifs' else arguments[0] if arguments else None
+        rest = arguments[1:] if operator != 'countifs' else arguments
+        pairs = [(rest[position], rest[position + 1]) for position in range(0, len(rest) - 1, 2)]
+    else:
+        pairs = [(arguments[0], arguments[1])] if len(arguments) > 1 else []
+        values = None if operator == 'countif' else arguments[2] if len(arguments) > 2 else arguments[0]
+    if not pairs or any(area is None for (_, area, _), _ in pairs) or (values is not None and values[1] is None):
+        return None
+    shapes = {(area[2] - area[0], area[3] - area[1]) for (_, area, _), _ in pairs}
+    if len(shapes) > 1:
+        return None
+    if values is not None:
+        (height, width), = shapes
+        sheet, (first_row, first_col, _, _), _ = values
+        values = sheet, (first_row, first_col, first_row + height, first_col + width)
+    return pairs, values
+
+
+def _compile_conditional(operator: str, pairs: list, values: tuple | None) -> Callable:
+    conditions = [_compile_condition(area, operand) for area, operand in pairs]
+    function = CONDITIONALS[operator]
+    if values is not None:
+        sheet, (first_row, first_col, last_row, last_col) = values
+        extra = () if sheet is None else (sheet,)
+
+    def evaluate(resolve=_no_value, block=None, index=None, criteria=None):
+        masks = [condition(resolve, criteria) for condition in conditions]
+        mask = masks[0]
+        for other in masks[1:]:
+            mask = mask & _fit(other, mask.shape)
+        if values is None:
+            return int(np.count_nonzero(mask))
+        if criteria is not None:
+            # the values are cached with the criteria columns and follow the same edits
+            columns = [column.filled() if column else (np.zeros(0), np.zeros(0, dtype=bool))
+                       for column in _criteria_columns(sheet, values[1], resolve, criteria)]
+            filled = _stack([numbers for numbers, _ in columns], 0.0)
+            valid = _stack([valid for _, valid in columns], False)
+        else:
+            if block is not None:
+                numbers = block(first_row, first_col, last_row, last_col, *extra)
+            else:
+                rows, cols = range(first_row, last_row + 1), range(first_col, last_col + 1)
+                numbers = to_numeric_array([resolve(row, col, *extra) for row in rows for col in cols])
+                numbers = numbers.reshape(len(rows), len(cols))
+            valid = ~np.isnan(numbers)
+            filled = np.where(valid, numbers, 0.0)
+        return masked_aggregate(function, _fit(filled, mask.shape, 0.0), _fit(valid, mask.shape), mask)
+
+    return evaluate
+
+
+def _compile_conditional_formula(text: str, operator: str) -> CompiledFormula:
+    arguments = _conditional_arguments(operator, [_argument(token) for token in text.split(' ')[1:] if token])
+    if arguments is None:
+        def evaluate(resolve=_no_value, block=None, index=None, criteria=None):
+            return NOT_FOUND
+
+        return CompiledFormula(text=text, operator=operator, references=(), ranges=(), evaluate=evaluate)
+    pairs, values = arguments
+    areas = [(sheet, area) for (sheet, area, _), _ in pairs]
+    # criteria read from cells
+    cells = [(sheet, (*area[:2], *area[:2])) for _, (sheet, area, _) in pairs if area is not None]
+    if values is not None:
+        areas.append(values)
+    return CompiledFormula(
+        text=text,
+        operator=operator,
+        references=tuple(area[:2] for sheet, area in cells if sheet is None),
+        ranges=tuple(dict.fromkeys(area for sheet, area in areas if sheet is None)),
+        evaluate=_compile_conditional(operator, pairs, values),
+        external=tuple(dict.fromkeys((sheet, area) for sheet, area in areas + cells if sheet is not None)),
+    )
+
+
+def _argument_tokens(text: str) -> tuple[list[str | None], list[str]]:
+    tokens = text.split(' ')[1:3]
+    is_range = len(tokens) == 1 and ':' in tokens[0]
+    if is_range:
+        tokens = tokens[0].split(':', 1)
+    sheets, addresses = [], []
+    for token in tokens:
+        sheet, mark, address = token.rpartition('!')
+        sheets.append(sheet if mark else None)
+        addresses.append(address)
+    # the sheet of a range applies to both of its ends
+    if is_range and sheets[1] is None:
+        sheets[1] = sheets[0]
+    return sheets, addresses
+
+
+@lru_cache(maxsize=FORMULA_CACHE_SIZE)
+def compile_formula(text: str) -> CompiledFormula:
+    operator = parse_operator(text)
+    if operator in LOOKUPS:
+        return _compile_lookup_formula(text, operator)
+    if operator in CONDITIONALS:
+        return _compile_conditional_formula(text, operator)
+    sheets, addresses = _argument_tokens(text)
+    return _compile(text, [decode_address(address) for address in addresses], sheets)
+
+
+def compile_formulas(texts: Sequence[str]) -> list[CompiledFormula]:
+    # lookups and conditional aggregates take more than two arguments and are compiled one by one
+    unique = [text for text in dict.fromkeys(texts) if parse_operator(text) not in MULTIPLE_ARGUMENTS]
+    tokens = [_argument_tokens(text) for text in unique]
+    rows, cols = decode_addresses([address for _, addresses in tokens for address in addresses])
+    cells = zip(rows.tolist(), cols.tolist())
+    compiled = {
+        text: _compile(text, [next(cells) for _ in addresses], sheets)
+        for text, (sheets, addresses) in zip(unique, tokens)
+    }
+    return [compiled[text] if text in compiled else compile_formula(text) for text in texts]
+
+
+def _compile(text: str, arguments: list[Cell], sheets: list[str | None] | None = None) -> CompiledFormula:
+    operator = parse_operator(text)
+    sheets = list(sheets or ())
+    while len(arguments) < 2:
+        arguments.append((-1, -1))
+    while len(sheets) < 2:
+        sheets.append(None)
+    first, second = arguments
+
+    references, ranges, external = (), (), ()
+    if operator in AGGREGATES:
+        if sheets[0] is None:
+            ranges = ((*first, *second),)
+        else:
+            external = ((sheets[0], (*first, *second)),)
+        evaluate = _compile_aggregate(operator, first, second, sheets[0])
+    else:
+        if operator == '=':
+            arguments, sheets = arguments[:1], sheets[:1]
+        valid = [(sheet, cell) for sheet, cell in zip(sheets, arguments) if cell[0] >= 0 and cell[1] >= 0]
+        references = tuple(cell for sheet, cell in valid if sheet is None)
+        external = tuple((sheet, (*cell, *cell)) for sheet, cell in valid if sheet is not None)
+        if operator in BINARY_OPERATORS:
+            evaluate = _compile_binary(operator, first, second, sheets)
+        elif operator == '/':
+            evaluate = _compile_division(first, second, sheets)
+        elif operator == '=':
+            evaluate = _compile_reference(first, sheets[0])
+        else:
+            def evaluate(resolve=_no_value, block=None, index=None, criteria=None):
+                return text
+
+    return CompiledFormula(
+        text=text,
+        operator=operator,
+        references=references,
+        ranges=ranges,
+        evaluate=evaluate,
+        external=external,
+    )
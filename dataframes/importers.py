@@ -0,0 +1,106 @@
+import os
+from typing import Iterator
+
+from pandas import DataFrame, concat, read_csv, read_json
+
+from .models import BLOCK_ROWS
+
+
+FIRST_CHUNK_ROWS = 4 * BLOCK_ROWS
+CHUNK_ROWS = 64 * BLOCK_ROWS
+
+SUPPORTED_FORMATS = ('.csv', '.json', '.jsonl', '.xlsx')
+
+
+def _chunk_sizes() -> Iterator[int]:
+    yield FIRST_CHUNK_ROWS
+    while True:
+        yield CHUNK_ROWS
+
+
+def read_csv_chunks(filename: str) -> Iterator[tuple[DataFrame, float]]:
+    size = os.path.getsize(filename) or 1
+    with open(filename, 'rb') as file:
+        with read_csv(file, header=None, iterator=True) as reader:
+            for rows in _chunk_sizes():
+                try:
+                    chunk = reader.get_chunk(rows)
+                except StopIteration:
+                    return
+                yield chunk, min(file.tell() / size, 1.0)
+
+
+def _with_header(chunk: DataFrame) -> DataFrame:
+    # the keys of the records are the first row, like the header line of a csv
+    return concat([DataFrame([list(chunk.columns)], columns=chunk.columns), chunk], ignore_index=True)
+
+
+def read_json_chunks(filename: str) -> Iterator[tuple[DataFrame, float]]:
+    # a json document is parsed at once, the chunks are row slices of it instead of copies
+    data = read_json(filename)
+    rows = len(data) + 1
+    sizes = _chunk_sizes()
+    stop = next(sizes) - 1
+    yield _with_header(data.iloc[:stop]), min((stop + 1) / rows, 1.0)
+    for size in sizes:
+        if stop >= len(data):
+            return
+        start, stop = stop, stop + size
+        yield data.iloc[start:stop], min((stop + 1) / rows, 1.0)
+
+
+def read_json_lines_chunks(filename: str) -> Iterator[tuple[DataFrame, float]]:
+    size = os.path.getsize(filename) or 1
+    header = None
+    with open(filename, 'rb') as file:
+        with read_json(file, lines=True, chunksize=CHUNK_ROWS) as reader:
+            for chunk in reader:
+                if header is None:
+                    header = chunk.columns
+                    chunk = _with_header(chunk)
+                else:
+                    # records may list their keys in another order, the columns follow the first chunk
+                    chunk = chunk.reindex(columns=header)
+                yield chunk, min(file.tell() / size, 1.0)
+
+
+def xlsx_sheet_names(filename: str) -> list[str]:
+    from openpyxl import load_workbook
+
+    # a read-only workbook only parses the sheet list until a sheet is iterated
+    workbook = load_workbook(filename, read_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def read_xlsx_chunks(filename: str, sheet_name: str | None = None) -> Iterator[tuple[DataFrame, float]]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(filename, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        total = worksheet.max_row or 0
+        read = 0
+        rows = worksheet.iter_rows(values_only=True)
+        for size in _chunk_sizes():
+            chunk = [row for _, row in zip(range(size), rows)]
+            if not chunk:
+                return
+            read += len(chunk)
+            yield DataFrame(chunk), min(read / total, 1.0) if total else 0.0
+    finally:
+        workbook.close()
+
+
+def read_chunks(filename: str) -> Iterator[tuple[DataFrame, float]]:
+    if filename.endswith('.csv'):
+        return read_csv_chunks(filename)
+    elif filename.endswith('.json'):
+        return read_json_chunks(filename)
+    elif filename.endswith('.jsonl'):
+        return read_json_lines_chunks(filename)
+    elif filename.endswith('.xlsx'):
+        return read_xlsx_chunks(filename)
+    raise ValueError(f'Unsupported file format: {filename}')
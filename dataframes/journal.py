@@ -0,0 +1,148 @@
+import sys
+from collections import deque
+from typing import Callable
+
+import numpy as np
+
+from .addresses import Cell
+from .models import TypedColumn, parse_value
+from .recalc import RecalculationEngine
+
+
+JOURNAL_BYTES = 64 << 20
+# a row and a column per cell and a pointer per value on each side
+CELL_BYTES = 32
+
+
+def _values_bytes(values: list) -> int:
+    return sum(sys.getsizeof(value) for value in values if value is not None)
+
+
+def _block(columns: list[TypedColumn]) -> list | np.ndarray:
+    values = [column.to_values() for column in columns]
+    if all(isinstance(column, np.ndarray) for column in values) and len({column.dtype for column in values}) == 1:
+        return np.column_stack(values)
+    return list(zip(*(column.tolist() if isinstance(column, np.ndarray) else column for column in values)))
+
+
+class ValuesDelta():
+    # scattered cells with their values before and after the edit
+    def __init__(self, cells: list[Cell], old: list, new: list):
+        self.rows = np.array([row for row, _ in cells], dtype=np.int64)
+        self.cols = np.array([col for _, col in cells], dtype=np.int64)
+        self.old = old
+        self.new = new
+        self.nbytes = len(cells) * CELL_BYTES + _values_bytes(old) + _values_bytes(new)
+
+    def apply(self, journal: 'Journal', forward: bool) -> set[Cell]:
+        cells = zip(self.rows.tolist(), self.cols.tolist())
+        return journal.engine.set_values(dict(zip(cells, self.new if forward else self.old)))
+
+
+class BlockDelta():
+    # a rectangle kept as typed columns, numbers and empty cells cost a few bytes each
+    def __init__(self, first_row: int, first_col: int, old: list[TypedColumn], new: list[TypedColumn]):
+        self.first_row = first_row
+        self.first_col = first_col
+        self.old = old
+        self.new = new
+        self.nbytes = sum(column.nbytes for column in old + new)
+
+    def apply(self, journal: 'Journal', forward: bool) -> set[Cell]:
+        return journal.engine.set_block(self.first_row, self.first_col, _block(self.new if forward else self.old))
+
+
+class StyleDelta():
+    # styles mean nothing to the journal, its owner applies them
+    def __init__(self, role: str, cells: list[Cell], old: list, new: list):
+        self.role = role
+        self.cells = cells
+        self.old = old
+        self.new = new
+        self.nbytes = len(cells) * CELL_BYTES * 2
+
+    def apply(self, journal: 'Journal', forward: bool) -> set[Cell]:
+        if journal.apply_style is not None:
+            journal.apply_style(self.role, dict(zip(self.cells, self.new if forward else self.old)))
+        return set()
+
+
+Delta = ValuesDelta | BlockDelta | StyleDelta
+
+
+class Journal():
+    def __init__(self, engine: RecalculationEngine, max_bytes: int = JOURNAL_BYTES,
+                 apply_style: Callable[[str, dict[Cell, object]], None] | None = None):
+        self.engine = engine
+        self.max_bytes = max_bytes
+        self.apply_style = apply_style
+        self.nbytes = 0
+        self._undo: deque[Delta] = deque()
+        self._redo: list[Delta] = []
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def set_values(self, values: dict[Cell, object]) -> set[Cell]:
+        cells, old, new = [], [], []
+        for cell, value in values.items():
+            value = parse_value(value)
+            previous = self.engine.spreadsheet.get_value(*cell)
+            if previous != value:
+                cells.append(cell)
+                old.append(previous)
+                new.append(value)
+        changed = self.engine.set_values(dict(zip(cells, new)))
+        if cells:
+            self.record(ValuesDelta(cells, old, new))
+        return changed
+
+    def set_block(self, first_row: int, first_col: int, values) -> set[Cell]:
+        if not isinstance(values, np.ndarray):
+            values = [list(row) for row in values]
+        stop = first_row + len(values)
+        cols = values.shape[1] if isinstance(values, np.ndarray) else max(map(len, values), default=0)
+        columns = [self.engine.spreadsheet.column(col) for col in range(first_col, first_col + cols)]
+        old = [column.copy(first_row, stop) for column in columns]
+        changed = self.engine.set_block(first_row, first_col, values)
+        if stop > first_row and columns:
+            self.record(BlockDelta(first_row, first_col, old, [column.copy(first_row, stop) for column in columns]))
+        return changed
+
+    def record_styles(self, role: str, changes: dict[Cell, tuple[object, object]]):
+        if changes:
+            old, new = zip(*changes.values())
+            self.record(StyleDelta(role, list(changes), list(old), list(new)))
+
+    def record(self, delta: Delta):
+        # a new edit drops the steps that were undone, then the oldest steps go until the journal fits
+        self.nbytes -= sum(undone.nbytes for undone in self._redo)
+        self._redo.clear()
+        self._undo.append(delta)
+        self.nbytes += delta.nbytes
+        while self.nbytes > self.max_bytes and self._undo:
+            self.nbytes -= self._undo.popleft().nbytes
+
+    def undo(self) -> set[Cell]:
+        if not self._undo:
+            return set()
+        delta = self._undo.pop()
+        self._redo.append(delta)
+        return delta.apply(self, forward=False)
+
+    def redo(self) -> set[Cell]:
+        if not self._redo:
+            return set()
+        delta = self._redo.pop()
+        self._undo.append(delta)
+        return delta.apply(self, forward=True)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self.nbytes = 0
@@ -0,0 +1,132 @@
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import date, datetime
+
+import numpy as np
+
+from .aggregates import to_float
+
+
+NOT_FOUND = 'nan'
+MAX_INDEXES = 256
+
+NUMBER, TEXT, TIMESTAMP, DAY = range(4)
+
+
+def lookup_key(value):
+    # text is matched without case, numeric text matches the number
+    if value is None:
+        return None
+    if isinstance(value, str):
+        number = to_float(value)
+        return value.casefold() if number != number else number
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def key_kind(key) -> int | None:
+    if isinstance(key, (int, float, np.integer, np.floating)):
+        return NUMBER
+    if isinstance(key, str):
+        return TEXT
+    if isinstance(key, datetime):
+        return TIMESTAMP
+    if isinstance(key, date):
+        return DAY
+    return None
+
+
+class ColumnIndex():
+    # positions are offsets from the first row of the indexed range
+    def __init__(self, values: list):
+        self.keys = [lookup_key(value) for value in values]
+        self._positions: dict = {}
+        self._duplicates: dict[object, list[int]] = {}
+        # approximate matches search the keys of their own kind, sorted on first use after a change
+        self._sorted: dict[int, tuple[np.ndarray, np.ndarray]] | None = None
+        offsets = [offset for offset, key in enumerate(self.keys) if key is not None]
+        keys = [self.keys[offset] for offset in offsets]
+        # built from the end so that the first occurrence of a key wins
+        self._positions = dict(zip(reversed(keys), reversed(offsets)))
+        if len(self._positions) < len(keys):
+            counts = Counter(keys)
+            for offset, key in zip(offsets, keys):
+                if counts[key] > 1:
+                    self._duplicates.setdefault(key, []).append(offset)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def find(self, value) -> int:
+        key = lookup_key(value)
+        if key is None:
+            return -1
+        return self._positions.get(key, -1)
+
+    def find_nearest(self, value, direction: int) -> int:
+        # a negative direction finds the largest key not above the value, a positive one the smallest not below
+        key = lookup_key(value)
+        kind = key_kind(key)
+        if self._sorted is None:
+            self._sorted = self._sort()
+        if kind not in self._sorted:
+            return -1
+        keys, offsets = self._sorted[kind]
+        if direction < 0:
+            position = int(np.searchsorted(keys, key, 'right')) - 1
+            if position < 0:
+                return -1
+        else:
+            position = int(np.searchsorted(keys, key, 'left'))
+            if position == len(keys):
+                return -1
+        # equal keys keep their row order, the first row holding the key wins
+        position = int(np.searchsorted(keys, keys[position], 'left'))
+        return int(offsets[position])
+
+    def update(self, offset: int, value):
+        key = lookup_key(value)
+        old = self.keys[offset]
+        if key == old and type(key) is type(old):
+            return
+        self.keys[offset] = key
+        self._sorted = None
+        if old is not None:
+            self._remove(old, offset)
+        if key is not None:
+            self._add(key, offset)
+
+    def _add(self, key, offset: int):
+        first = self._positions.get(key)
+        if first is None:
+            self._positions[key] = offset
+            return
+        offsets = self._duplicates.setdefault(key, [first])
+        insort(offsets, offset)
+        self._positions[key] = offsets[0]
+
+    def _remove(self, key, offset: int):
+        offsets = self._duplicates.get(key)
+        if offsets is None:
+            del self._positions[key]
+            return
+        del offsets[bisect_left(offsets, offset)]
+        self._positions[key] = offsets[0]
+        if len(offsets) == 1:
+            del self._duplicates[key]
+
+    def _sort(self) -> dict[int, tuple[np.ndarray, np.ndarray]]:
+        groups: dict[int, tuple[list, list]] = {}
+        for offset, key in enumerate(self.keys):
+            kind = key_kind(key)
+            if kind is not None:
+                keys, offsets = groups.setdefault(kind, ([], []))
+                keys.append(key)
+                offsets.append(offset)
+        result = {}
+        for kind, (keys, offsets) in groups.items():
+            keys = np.array(keys, dtype=np.float64 if kind == NUMBER else object)
+            order = np.argsort(keys, kind='stable')
+            result[kind] = keys[order], np.array(offsets, dtype=np.int64)[order]
+        return result
@@ -1,7 +1,16 @@
-import string
+import sys
 from dataclasses import dataclass
 from datetime import date
-from pandas import DataFrame
+from typing import TYPE_CHECKING, Iterator
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+from .addresses import decode_address
+from .aggregates import parse_number
+from .formulas import OPERATORS, CompiledFormula, compile_formula, is_formula
 
 
 def parse_coordinate(str_coordinate: str, expectex_symbols: list):
@@ -17,16 +26,49 @@ def parse_coordinate(str_coordinate: str, expectex_symbols: list):
 
 
 class Expression():
-    def __init__(self, str_expression: str):
+    OPERATORS = OPERATORS
+
+    def __init__(self, str_expression: str, compiled: CompiledFormula | None = None):
         self._value = str_expression
+        self._compiled = compiled or compile_formula(str_expression)
+
+    @classmethod
+    def is_formula(cls, value) -> bool:
+        return is_formula(value)
+
+    @property
+    def operator(self) -> str:
+        return self._compiled.operator
+
+    @property
+    def references(self) -> tuple[tuple[int, int], ...]:
+        return self._compiled.references
+
+    @property
+    def ranges(self) -> tuple[tuple[int, int, int, int], ...]:
+        return self._compiled.ranges
+
+    @property
+    def external(self) -> tuple[tuple[str, tuple[int, int, int, int]], ...]:
+        return self._compiled.external
+
+    def calculate_value(self, resolve=None, block=None, index=None, criteria=None):
+        if resolve is None:
+            return self._compiled.evaluate(block=block, index=index, criteria=criteria)
+        return self._compiled.evaluate(resolve, block, index, criteria)
+
+    def __str__(self):
+        return self._value
+
+    def __eq__(self, other):
+        return isinstance(other, Expression) and self._value == other._value
+
+    def __hash__(self):
+        return hash(self._value)
 
-    def calculate_value(self):
-        return
 
 @dataclass()
 class Coordinates():
-    EXPECTEX_X_SYMBOLS = string.ascii_lowercase
-    EXPECTEX_Y_SYMBOLS = '1234567890'
     x: int
     y: int
 
@@ -40,13 +82,7 @@ class Coordinates():
             raise ValueError('Coordinate not passed')
 
     def parse_str_coordinate(self, str_coordinate: str) -> (int, int):
-        str_coordinate = str_coordinate.lower().strip()
-        self.y, str_coordinate = parse_coordinate(str_coordinate, self.EXPECTEX_Y_SYMBOLS)
-        self.x, str_coordinate = parse_coordinate(str_coordinate, self.EXPECTEX_X_SYMBOLS)
-
-        self.x -= 1
-        self.y -= 1
-
+        self.y, self.x = decode_address(str_coordinate)
         return self.x, self.y
 
     def is_valid(self, raise_exception: bool = False) -> bool:
@@ -55,19 +91,59 @@ class Coordinates():
         return False
 
 
-@dataclass()
-class CoordinatesRange: 
-    items: list[Coordinates]
+class CoordinatesRange():
+    def __init__(self, from_coordinates: Coordinates, to_coordinates: Coordinates,
+                 row_major: bool = False, indexes: range | None = None):
+        self.from_coordinates = from_coordinates
+        self.to_coordinates = to_coordinates
+        self.row_major = row_major
+        self._columns = range(from_coordinates.x, max(to_coordinates.x, from_coordinates.x))
+        self._rows = range(from_coordinates.y, max(to_coordinates.y, from_coordinates.y))
+        if indexes is None:
+            indexes = range(len(self._columns) * len(self._rows))
+        self._indexes = indexes
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self._rows), len(self._columns)
 
-    def __init__(self, from_coordinates: Coordinates, to_coordinates: Coordinates):
-        self.items = [
-            Coordinates(x=x, y=y)
-            for x in range(from_coordinates.x, to_coordinates.x)
-            for y in range(from_coordinates.y, to_coordinates.y)
-        ]
-    
-    def __getitem__(self, index):
-        return self.items[index]
+    def by_rows(self) -> 'CoordinatesRange':
+        return CoordinatesRange(self.from_coordinates, self.to_coordinates, row_major=True)
+
+    def by_columns(self) -> 'CoordinatesRange':
+        return CoordinatesRange(self.from_coordinates, self.to_coordinates, row_major=False)
+
+    def _position(self, index: int) -> tuple[int, int]:
+        if self.row_major:
+            row, col = divmod(index, len(self._columns))
+        else:
+            col, row = divmod(index, len(self._rows))
+        return self._columns[col], self._rows[row]
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    def __getitem__(self, index: int | slice) -> 'Coordinates | CoordinatesRange':
+        if isinstance(index, slice):
+            return CoordinatesRange(
+                self.from_coordinates, self.to_coordinates,
+                row_major=self.row_major, indexes=self._indexes[index],
+            )
+        x, y = self._position(self._indexes[index])
+        return Coordinates(x=x, y=y)
+
+    def __iter__(self) -> Iterator[Coordinates]:
+        for index in self._indexes:
+            x, y = self._position(index)
+            yield Coordinates(x=x, y=y)
+
+    def __contains__(self, coordinates: Coordinates) -> bool:
+        if coordinates.x not in self._columns or coordinates.y not in self._rows:
+            return False
+        col, row = coordinates.x - self._columns.start, coordinates.y - self._rows.start
+        if self.row_major:
+            return row * len(self._columns) + col in self._indexes
+        return col * len(self._rows) + row in self._indexes
 
 
 @dataclass()
@@ -78,10 +154,10 @@ class SpreadsheetCell():
     def __init__(self, coordinates: Coordinates, value: str | float | int | date | Expression | None):
         self.value = value
         self.coordinates = coordinates
-        if isinstance(self.value, str) and self.value.startswith('='):
+        if Expression.is_formula(self.value):
             self.value = Expression(self.value)
 
-    def calculate_value(self, data_format: str | None):
+    def calculate_value(self, data_format: str | None = None):
         if isinstance(self.value, Expression):
             return self.value.calculate_value()
         return self.value
@@ -91,38 +167,597 @@ class SpreadsheetCell():
         return self.calculate_value()
 
 
+EMPTY, INTEGER, FLOAT, DATE, STRING, FORMULA, OBJECT = range(7)
+
+ROWS_CHUNK = 4096
+BLOCK_ROWS = 1024
+SPARSE_MIN_CELLS = 1 << 20
+SPARSE_DENSITY = 0.25
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d', '%d.%m.%Y')
+DATE_SAMPLE_ROWS = 64
+
+
+def parse_value(value):
+    if value is None or isinstance(value, Expression):
+        return value
+    if isinstance(value, str):
+        if not value:
+            return None
+        if is_formula(value):
+            return Expression(value)
+        number = parse_number(value)
+        return sys.intern(value) if number is None else number
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def _value_tag(value) -> int:
+    if value is None:
+        return EMPTY
+    if isinstance(value, Expression):
+        return FORMULA
+    if isinstance(value, str):
+        return STRING
+    if isinstance(value, bool):
+        return OBJECT
+    if isinstance(value, (int, np.integer)):
+        return INTEGER if -2 ** 63 <= value < 2 ** 63 else OBJECT
+    if isinstance(value, (float, np.floating)):
+        return FLOAT
+    if isinstance(value, (date, np.datetime64)):
+        return DATE
+    return OBJECT
+
+
+def _date_value(value: np.datetime64) -> date:
+    value = value.astype('datetime64[us]').item()
+    if value.hour == value.minute == value.second == value.microsecond == 0:
+        return value.date()
+    return value
+
+
+def _date_values(values: np.ndarray) -> np.ndarray:
+    values = values.astype('datetime64[us]')
+    days = values.astype('datetime64[D]')
+    # midnight values become dates, the rest keep their time
+    return np.where(values == days, days.astype(object), values.astype(object))
+
+
+def _parse_dates(series) -> 'np.ndarray | None':
+    # the format is picked on a sample, the whole column is then parsed in one pass
+    pandas = sys.modules['pandas']
+    sample = series.dropna().head(DATE_SAMPLE_ROWS)
+    if not len(sample) or not any(isinstance(value, str) for value in sample):
+        return None
+    hits, best = max(
+        (int(pandas.to_datetime(sample, format=fmt, errors='coerce').notna().sum()), fmt)
+        for fmt in DATE_FORMATS
+    )
+    if hits * 2 < len(sample):
+        return None
+    return pandas.to_datetime(series, format=best, errors='coerce').to_numpy()
+
+
+class TypedColumn():
+    DTYPES = {
+        INTEGER: np.int64,
+        FLOAT: np.float64,
+        DATE: 'datetime64[us]',
+    }
+
+    def __init__(self, length: int):
+        self.tags = np.zeros(length, dtype=np.uint8)
+        self._arrays: dict[int, np.ndarray] = {}
+        self._object_values: np.ndarray | None = None
+        self._object_loader = None
+
+    @property
+    def _objects(self) -> np.ndarray | None:
+        # strings and formulas of a mapped workbook are decoded on first access
+        if self._object_loader is not None:
+            self._object_values = self._object_loader()
+            self._object_loader = None
+        return self._object_values
+
+    @_objects.setter
+    def _objects(self, values: np.ndarray | None):
+        self._object_loader = None
+        self._object_values = values
+
+    @classmethod
+    def from_array(cls, values: np.ndarray) -> 'TypedColumn':
+        column = cls(len(values))
+        kind = values.dtype.kind
+        if kind in 'iu':
+            column._arrays[INTEGER] = values.astype(np.int64)
+            column.tags[:] = INTEGER
+        elif kind == 'f':
+            column._arrays[FLOAT] = values.astype(np.float64)
+            column.tags[~np.isnan(values)] = FLOAT
+        elif kind == 'M':
+            column._arrays[DATE] = values.astype(cls.DTYPES[DATE])
+            column.tags[~np.isnat(values)] = DATE
+        else:
+            for row, value in enumerate(values):
+                if value is not None:
+                    column.set(row, value)
+        return column
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def _array(self, tag: int) -> np.ndarray:
+        if tag in self.DTYPES:
+            if tag not in self._arrays:
+                self._arrays[tag] = np.zeros(len(self.tags), dtype=self.DTYPES[tag])
+            return self._arrays[tag]
+        if self._objects is None:
+            self._objects = np.empty(len(self.tags), dtype=object)
+        return self._objects
+
+    def get(self, row: int):
+        tag = self.tags[row]
+        if tag == EMPTY:
+            return None
+        if tag == DATE:
+            return _date_value(self._arrays[DATE][row])
+        if tag in self.DTYPES:
+            return self._arrays[tag][row].item()
+        return self._objects[row]
+
+    def set(self, row: int, value):
+        value = parse_value(value)
+        tag = _value_tag(value)
+        array = None if tag == EMPTY else self._array(tag)
+        if self.tags[row] in (STRING, FORMULA, OBJECT):
+            self._objects[row] = None
+        self.tags[row] = tag
+        if array is not None:
+            array[row] = value
+
+    def set_values(self, start: int, values: list | np.ndarray):
+        stop = start + len(values)
+        kind = values.dtype.kind if isinstance(values, np.ndarray) else None
+        if kind not in ('i', 'u', 'f'):
+            for row, value in enumerate(values, start):
+                self.set(row, value)
+            return
+        if self._objects is not None:
+            self._objects[start:stop] = None
+        tag = INTEGER if kind in 'iu' else FLOAT
+        self._array(tag)[start:stop] = values
+        self.tags[start:stop] = tag
+        if tag == FLOAT:
+            self.tags[start:stop][np.isnan(values)] = EMPTY
+
+    def numeric(self, start: int = 0, stop: int | None = None) -> np.ndarray:
+        tags = self.tags[start:stop]
+        values = np.full(len(tags), np.nan)
+        for tag in (INTEGER, FLOAT):
+            if tag in self._arrays:
+                mask = tags == tag
+                values[mask] = self._arrays[tag][start:stop][mask]
+        return values
+
+    def dates(self, start: int = 0, stop: int | None = None) -> np.ndarray:
+        tags = self.tags[start:stop]
+        values = np.full(len(tags), np.datetime64('NaT'), dtype=self.DTYPES[DATE])
+        if DATE in self._arrays:
+            mask = tags == DATE
+            values[mask] = self._arrays[DATE][start:stop][mask]
+        return values
+
+    def texts(self, start: int = 0, stop: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        # offsets from start of the text cells and their strings
+        offsets = np.flatnonzero(self.tags[start:stop] == STRING)
+        if not len(offsets):
+            return offsets, np.empty(0, dtype=object)
+        return offsets, self._objects[start:stop][offsets]
+
+    def resize(self, length: int):
+        extra = length - len(self.tags)
+        if extra <= 0:
+            return
+        self.tags = np.concatenate([self.tags, np.zeros(extra, dtype=np.uint8)])
+        for tag, array in self._arrays.items():
+            self._arrays[tag] = np.concatenate([array, np.zeros(extra, dtype=array.dtype)])
+        if self._objects is not None:
+            self._objects = np.concatenate([self._objects, np.empty(extra, dtype=object)])
+
+    def iter_items(self, tag: int | None = None, start: int = 0,
+                   stop: int | None = None) -> Iterator[tuple[int, object]]:
+        tags = self.tags[start:stop]
+        rows = np.flatnonzero(tags != EMPTY if tag is None else tags == tag) + start
+        for row in rows.tolist():
+            yield row, self.get(row)
+
+    def to_list(self, start: int = 0, stop: int | None = None) -> list:
+        tags = self.tags[start:stop]
+        values = np.empty(len(tags), dtype=object)
+        for tag, array in self._arrays.items():
+            mask = tags == tag
+            if mask.any():
+                array = array[start:stop][mask]
+                values[mask] = _date_values(array) if tag == DATE else array.astype(object)
+        if self._objects is not None:
+            mask = tags >= STRING
+            values[mask] = self._objects[start:stop][mask]
+        return values.tolist()
+
+    def to_values(self, start: int = 0, stop: int | None = None) -> list | np.ndarray:
+        # a range of a single numeric type comes back as an array, writing it back takes the vectorized path
+        tags = self.tags[start:stop]
+        if INTEGER in self._arrays and (tags == INTEGER).all():
+            return self._arrays[INTEGER][start:stop].copy()
+        if not ((tags != EMPTY) & (tags != FLOAT)).any():
+            return self.numeric(start, stop)
+        return self.to_list(start, stop)
+
+    def copy(self, start: int = 0, stop: int | None = None) -> 'TypedColumn':
+        tags = self.tags[start:stop]
+        column = TypedColumn(len(tags))
+        column.tags = tags.copy()
+        column._arrays = {tag: array[start:stop].copy() for tag, array in self._arrays.items() if (tags == tag).any()}
+        if (tags >= STRING).any():
+            column._objects = self._objects[start:stop].copy()
+        return column
+
+    @property
+    def nbytes(self) -> int:
+        size = self.tags.nbytes + sum(array.nbytes for array in self._arrays.values())
+        # text of a mapped workbook that was never read is not in memory yet
+        if self._object_loader is None and self._objects is not None:
+            size += self._objects.nbytes + sum(map(sys.getsizeof, self._objects[self.tags >= STRING]))
+        return size
+
+
+class SparseColumn():
+    def __init__(self, length: int, block_rows: int = BLOCK_ROWS):
+        self._length = length
+        self.block_rows = block_rows
+        self._blocks: dict[int, TypedColumn] = {}
+
+    @classmethod
+    def from_column(cls, column: TypedColumn, block_rows: int = BLOCK_ROWS) -> 'SparseColumn':
+        sparse = cls(len(column), block_rows)
+        for index, start in enumerate(range(0, len(column), block_rows)):
+            stop = min(start + block_rows, len(column))
+            if not column.tags[start:stop].any():
+                continue
+            block = sparse._blocks[index] = TypedColumn(stop - start)
+            block.tags = column.tags[start:stop].copy()
+            block._arrays = {tag: array[start:stop].copy() for tag, array in column._arrays.items()}
+            if column._objects is not None:
+                block._objects = column._objects[start:stop].copy()
+        return sparse
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def tags(self) -> np.ndarray:
+        tags = np.zeros(self._length, dtype=np.uint8)
+        for index, block in self._blocks.items():
+            start = index * self.block_rows
+            tags[start:start + len(block)] = block.tags
+        return tags
+
+    def get(self, row: int):
+        index, offset = divmod(row, self.block_rows)
+        block = self._blocks.get(index)
+        return None if block is None else block.get(offset)
+
+    def set(self, row: int, value):
+        if not 0 <= row < self._length:
+            raise IndexError(row)
+        value = parse_value(value)
+        index, offset = divmod(row, self.block_rows)
+        block = self._blocks.get(index)
+        if block is None:
+            if value is None:
+                return
+            start = index * self.block_rows
+            block = self._blocks[index] = TypedColumn(min(self.block_rows, self._length - start))
+        block.set(offset, value)
+        if value is None and not block.tags.any():
+            del self._blocks[index]
+
+    def set_values(self, start: int, values: list | np.ndarray):
+        stop = start + len(values)
+        if start < 0 or stop > self._length:
+            raise IndexError(stop - 1)
+        if stop <= start:
+            return
+        for index in range(start // self.block_rows, (stop - 1) // self.block_rows + 1):
+            block_start = index * self.block_rows
+            low, high = max(start - block_start, 0), min(stop - block_start, self.block_rows)
+            block = self._blocks.get(index)
+            if block is None:
+                block = self._blocks[index] = TypedColumn(min(self.block_rows, self._length - block_start))
+            block.set_values(low, values[block_start + low - start:block_start + high - start])
+            if not block.tags.any():
+                del self._blocks[index]
+
+    def _overlapping(self, start: int, stop: int) -> Iterator[tuple[TypedColumn, int, int, int]]:
+        for index in range(start // self.block_rows, (stop - 1) // self.block_rows + 1):
+            block = self._blocks.get(index)
+            if block is None:
+                continue
+            block_start = index * self.block_rows
+            low = max(start, block_start) - block_start
+            high = min(stop, block_start + len(block)) - block_start
+            yield block, low, high, block_start + low - start
+
+    def numeric(self, start: int = 0, stop: int | None = None) -> np.ndarray:
+        start, stop, _ = slice(start, stop).indices(self._length)
+        values = np.full(max(stop - start, 0), np.nan)
+        for block, low, high, position in self._overlapping(start, stop):
+            values[position:position + high - low] = block.numeric(low, high)
+        return values
+
+    def dates(self, start: int = 0, stop: int | None = None) -> np.ndarray:
+        start, stop, _ = slice(start, stop).indices(self._length)
+        values = np.full(max(stop - start, 0), np.datetime64('NaT'), dtype=TypedColumn.DTYPES[DATE])
+        for block, low, high, position in self._overlapping(start, stop):
+            values[position:position + high - low] = block.dates(low, high)
+        return values
+
+    def texts(self, start: int = 0, stop: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        start, stop, _ = slice(start, stop).indices(self._length)
+        offsets, values = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=object)]
+        for block, low, high, position in self._overlapping(start, stop):
+            block_offsets, block_values = block.texts(low, high)
+            offsets.append(block_offsets + position)
+            values.append(block_values)
+        return np.concatenate(offsets), np.concatenate(values)
+
+    def to_list(self, start: int = 0, stop: int | None = None) -> list:
+        start, stop, _ = slice(start, stop).indices(self._length)
+        values = [None] * max(stop - start, 0)
+        for block, low, high, position in self._overlapping(start, stop):
+            values[position:position + high - low] = block.to_list(low, high)
+        return values
+
+    def iter_items(self, tag: int | None = None, start: int = 0,
+                   stop: int | None = None) -> Iterator[tuple[int, object]]:
+        start, stop, _ = slice(start, stop).indices(self._length)
+        for index in sorted(self._blocks):
+            block_start = index * self.block_rows
+            if block_start >= stop or block_start + self.block_rows <= start:
+                continue
+            low, high = max(start - block_start, 0), min(stop - block_start, self.block_rows)
+            for row, value in self._blocks[index].iter_items(tag, low, high):
+                yield block_start + row, value
+
+    def extend(self, column: 'TypedColumn | SparseColumn'):
+        start = self._length
+        self._length += len(column)
+        if start % self.block_rows or isinstance(column, SparseColumn):
+            last = self._blocks.get((start - 1) // self.block_rows) if start else None
+            if last is not None:
+                last.resize(min(self.block_rows, self._length - (start - 1) // self.block_rows * self.block_rows))
+            for row, value in column.iter_items():
+                self.set(start + row, value)
+            return
+        first = start // self.block_rows
+        for index, block in SparseColumn.from_column(column, self.block_rows)._blocks.items():
+            self._blocks[first + index] = block
+
+    def copy(self, start: int = 0, stop: int | None = None) -> TypedColumn:
+        start, stop, _ = slice(start, stop).indices(self._length)
+        column = TypedColumn(max(stop - start, 0))
+        for block, low, high, position in self._overlapping(start, stop):
+            column.tags[position:position + high - low] = block.tags[low:high]
+            for tag, array in block._arrays.items():
+                column._array(tag)[position:position + high - low] = array[low:high]
+            if block._objects is not None:
+                column._array(STRING)[position:position + high - low] = block._objects[low:high]
+        return column
+
+    @property
+    def nbytes(self) -> int:
+        return sum(block.nbytes for block in self._blocks.values())
+
+    def to_column(self) -> TypedColumn:
+        column = TypedColumn(self._length)
+        for index, block in self._blocks.items():
+            start = index * self.block_rows
+            stop = start + len(block)
+            column.tags[start:stop] = block.tags
+            for tag, array in block._arrays.items():
+                column._array(tag)[start:stop] = array
+            if block._objects is not None:
+                column._array(STRING)[start:stop] = block._objects
+        return column
+
+
+def _is_dataframe(data) -> bool:
+    # pandas is only loaded by callers that need it, a DataFrame cannot exist before that
+    pandas = sys.modules.get('pandas')
+    return pandas is not None and isinstance(data, pandas.DataFrame)
+
+
 class Spreadsheet():
-    def __init__(self, len_x: int = -1, len_y: int = -1, data: dict | DataFrame | list | None = None):
+    def __init__(self, len_x: int = -1, len_y: int = -1, data: 'dict | DataFrame | list | None' = None,
+                 sparse: bool | None = None):
+        if _is_dataframe(data):
+            self._rows = len(data)
+            if sparse is None:
+                sparse = self._is_sparse(data.size, int(data.notna().to_numpy().sum()))
+            self._columns = [self._column_from_series(data.iloc[:, col], sparse) for col in range(data.shape[1])]
+            return
+        if isinstance(data, dict):
+            data = list(zip(*data.values()))
         if not data:
-            data = [[None for i in range(len_x)] for i in range(len_y)]
-        elif isinstance(data, DataFrame):
-            self._dataframe = data
+            self._rows = max(len_y, 0)
+            columns = max(len_x, 0)
+            if sparse is None:
+                sparse = self._is_sparse(self._rows * columns, 0)
+            self._columns = [self._new_column(self._rows, sparse) for col in range(columns)]
             return
-            
-        self._dataframe = DataFrame(data=data)
+
+        self._rows = len(data)
+        columns = max(len(values) for values in data)
+        if sparse is None:
+            filled = sum(value is not None for values in data for value in values)
+            sparse = self._is_sparse(self._rows * columns, filled)
+        self._columns = [self._new_column(self._rows, sparse) for col in range(columns)]
+        for row, values in enumerate(data):
+            for col, value in enumerate(values):
+                if value is not None:
+                    self._columns[col].set(row, value)
+
+    @classmethod
+    def from_columns(cls, columns: list[TypedColumn | SparseColumn], rows: int) -> 'Spreadsheet':
+        spreadsheet = cls(0, 0)
+        spreadsheet._rows = rows
+        spreadsheet._columns = list(columns)
+        return spreadsheet
+
+    @staticmethod
+    def _is_sparse(size: int, filled: int) -> bool:
+        return size >= SPARSE_MIN_CELLS and filled < size * SPARSE_DENSITY
+
+    @staticmethod
+    def _new_column(length: int, sparse: bool) -> TypedColumn | SparseColumn:
+        return SparseColumn(length) if sparse else TypedColumn(length)
+
+    @staticmethod
+    def _column_from_series(series, sparse: bool = False) -> TypedColumn | SparseColumn:
+        if series.dtype.kind in 'iufM':
+            column = TypedColumn.from_array(series.to_numpy())
+        else:
+            values = series.astype(object).where(series.notna(), None).to_numpy()
+            dates = _parse_dates(series)
+            if dates is None:
+                column = TypedColumn.from_array(values)
+            else:
+                column = TypedColumn.from_array(dates)
+                # cells that are not dates, like a header row, keep their own values
+                for row in np.flatnonzero(np.isnat(dates)).tolist():
+                    if values[row] is not None:
+                        column.set(row, values[row])
+        return SparseColumn.from_column(column) if sparse else column
+
+    @property
+    def sparse(self) -> bool:
+        return any(isinstance(column, SparseColumn) for column in self._columns)
 
     def __getitem__(self, coordinates: Coordinates) -> SpreadsheetCell:
-        value = self._dataframe[coordinates.y][coordinates.x]
         return SpreadsheetCell(
-            coordinates = coordinates,
-            value=value,
+            coordinates=coordinates,
+            value=self.get_value(coordinates.y, coordinates.x),
         )
 
+    def column(self, col: int) -> TypedColumn | SparseColumn:
+        return self._columns[col]
+
+    def get_value(self, row: int, col: int):
+        return self._columns[col].get(row)
+
+    def set_value(self, row: int, col: int, value):
+        self._columns[col].set(row, value)
+
+    def set_block(self, first_row: int, first_col: int, values) -> tuple[int, int]:
+        if not isinstance(values, np.ndarray):
+            values = [list(row) for row in values]
+        rows = len(values)
+        cols = values.shape[1] if isinstance(values, np.ndarray) else max(map(len, values), default=0)
+        if first_row + rows > self.shape[0] or first_col + cols > self.shape[1]:
+            raise IndexError((first_row + rows - 1, first_col + cols - 1))
+        for offset in range(cols):
+            if isinstance(values, np.ndarray):
+                column = values[:, offset]
+            else:
+                column = [row[offset] if offset < len(row) else None for row in values]
+            self._columns[first_col + offset].set_values(first_row, column)
+        return first_row + rows - 1, first_col + cols - 1
+
+    def iter_items(self, tag: int | None = None, first_row: int = 0,
+                   last_row: int | None = None) -> Iterator[tuple[int, int, object]]:
+        stop = None if last_row is None else last_row + 1
+        for col, column in enumerate(self._columns):
+            for row, value in column.iter_items(tag, first_row, stop):
+                yield row, col, value
+
+    def append(self, other: 'Spreadsheet'):
+        rows, columns = other.shape
+        while len(self._columns) < columns:
+            self._columns.append(SparseColumn(self._rows))
+        for col, column in enumerate(self._columns):
+            if not isinstance(column, SparseColumn):
+                column = self._columns[col] = SparseColumn.from_column(column)
+            column.extend(other._columns[col] if col < columns else TypedColumn(rows))
+        self._rows += rows
+
+    def compact(self):
+        filled = sum(int(np.count_nonzero(column.tags)) for column in self._columns)
+        sparse = self._is_sparse(self._rows * len(self._columns), filled)
+        for col, column in enumerate(self._columns):
+            if sparse and isinstance(column, TypedColumn):
+                self._columns[col] = SparseColumn.from_column(column)
+            elif not sparse and isinstance(column, SparseColumn):
+                self._columns[col] = column.to_column()
+
+    def iter_rows(self) -> Iterator[tuple]:
+        for start in range(0, self._rows, ROWS_CHUNK):
+            stop = min(start + ROWS_CHUNK, self._rows)
+            yield from zip(*(column.to_list(start, stop) for column in self._columns))
+
+    def numeric_block(self, first_row: int, first_col: int, last_row: int, last_col: int) -> np.ndarray:
+        first_row, first_col = max(first_row, 0), max(first_col, 0)
+        columns = self._columns[first_col:last_col + 1]
+        if not columns or first_row > min(last_row, self._rows - 1):
+            return np.empty((0, 0), dtype=np.float64)
+        return np.column_stack([column.numeric(first_row, last_row + 1) for column in columns])
+
+    def to_dataframe(self) -> 'DataFrame':
+        from pandas import DataFrame
+
+        return DataFrame({col: column.to_list() for col, column in enumerate(self._columns)})
+
     @property
     def coordinates(self) -> CoordinatesRange:
         return CoordinatesRange(
             Coordinates(x=0, y=0),
-            Coordinates(x=self.shape[0], y=self.shape[1])
+            Coordinates(x=self.shape[1], y=self.shape[0])
         )
 
     @property
-    def values(self) -> list[SpreadsheetCell]:
-        return [self.__getitem__(coordinate) for coordinate in self.coordinates]
+    def values(self) -> Iterator[SpreadsheetCell]:
+        return self.iter_cells()
+
+    def iter_cells(self, row_major: bool = False) -> Iterator[SpreadsheetCell]:
+        if row_major:
+            for y, values in enumerate(self.iter_rows()):
+                for x, value in enumerate(values):
+                    yield SpreadsheetCell(coordinates=Coordinates(x=x, y=y), value=value)
+            return
+        for x, column in enumerate(self._columns):
+            for start in range(0, self._rows, ROWS_CHUNK):
+                for y, value in enumerate(column.to_list(start, start + ROWS_CHUNK), start):
+                    yield SpreadsheetCell(coordinates=Coordinates(x=x, y=y), value=value)
 
     @property
-    def shape(self) -> tuple[int]:
-        return self._dataframe.shape
-        
-    def __setitem__(self, coordinates: Coordinates, cell: SpreadsheetCell) -> SpreadsheetCell:
-        self._dataframe[coordinates] = cell.value
-        return cell.value
+    def shape(self) -> tuple[int, int]:
+        return self._rows, len(self._columns)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self._columns)
+
+    def __setitem__(self, coordinates: Coordinates | CoordinatesRange,
+                    cell: SpreadsheetCell | str | float | int | date | None):
+        if isinstance(coordinates, CoordinatesRange):
+            rows, cols = coordinates.shape
+            if isinstance(cell, np.ndarray):
+                block = cell[:rows, :cols]
+            else:
+                block = [list(row)[:cols] for row in cell][:rows]
+            self.set_block(coordinates.from_coordinates.y, coordinates.from_coordinates.x, block)
+            return cell
+        value = cell.value if isinstance(cell, SpreadsheetCell) else cell
+        self.set_value(coordinates.y, coordinates.x, value)
+        return value
@@ -0,0 +1,154 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from .formulas import MULTIPLE_ARGUMENTS
+from .models import OBJECT, STRING, SparseColumn, Spreadsheet, TypedColumn, _value_tag
+from .recalc import PARALLEL_MIN_FORMULAS, Cell, RecalculationEngine
+
+
+TASKS_PER_WORKER = 4
+
+
+def _share(array: np.ndarray, memories: list[SharedMemory]) -> tuple[str, str, int]:
+    memory = SharedMemory(create=True, size=max(array.nbytes, 1))
+    memories.append(memory)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[:] = array
+    return memory.name, array.dtype.str, len(array)
+
+
+def _attach(description: tuple[str, str, int], memories: list[SharedMemory]) -> np.ndarray:
+    name, dtype, length = description
+    memory = SharedMemory(name=name)
+    memories.append(memory)
+    return np.ndarray((length,), dtype=dtype, buffer=memory.buf)
+
+
+def _share_column(column: TypedColumn, memories: list[SharedMemory]) -> dict:
+    return {
+        'tags': _share(column.tags, memories),
+        'arrays': {tag: _share(array, memories) for tag, array in column._arrays.items()},
+    }
+
+
+def _share_columns(spreadsheet: Spreadsheet, memories: list[SharedMemory]) -> list[dict]:
+    # sparse columns are shared block by block, their empty blocks stay unallocated
+    columns = []
+    for col in range(spreadsheet.shape[1]):
+        column = spreadsheet.column(col)
+        if isinstance(column, SparseColumn):
+            columns.append({
+                'length': len(column),
+                'block_rows': column.block_rows,
+                'blocks': {index: _share_column(block, memories) for index, block in column._blocks.items()},
+            })
+        else:
+            columns.append(_share_column(column, memories))
+    return columns
+
+
+def _attach_column(description: dict, memories: list[SharedMemory]) -> TypedColumn:
+    column = TypedColumn(0)
+    column.tags = _attach(description['tags'], memories)
+    column._arrays = {tag: _attach(array, memories) for tag, array in description['arrays'].items()}
+    column._objects = np.empty(len(column.tags), dtype=object)
+    return column
+
+
+def _attach_spreadsheet(shape: tuple[int, int], columns: list[dict], objects: dict[Cell, object],
+                        memories: list[SharedMemory]) -> Spreadsheet:
+    attached = []
+    for description in columns:
+        if 'blocks' in description:
+            column = SparseColumn(description['length'], description['block_rows'])
+            column._blocks = {
+                index: _attach_column(block, memories) for index, block in description['blocks'].items()
+            }
+        else:
+            column = _attach_column(description, memories)
+        attached.append(column)
+    for (row, col), value in objects.items():
+        # the shared tags already mark these cells, only the values of this process are filled in
+        column = attached[col]
+        if isinstance(column, SparseColumn):
+            index, row = divmod(row, column.block_rows)
+            column = column._blocks[index]
+        column._objects[row] = value
+    return Spreadsheet.from_columns(attached, shape[0])
+
+
+# the sheet of a worker process, attached once and shared by all of its tasks
+_worker: dict = {}
+
+
+def _attach_worker(shape: tuple[int, int], columns: list[dict], objects: dict[Cell, object]):
+    memories = []
+    spreadsheet = _attach_spreadsheet(shape, columns, objects, memories)
+    _worker.update(engine=RecalculationEngine(spreadsheet, load=False, max_workers=1), memories=memories)
+
+
+def _evaluate_components(formulas: list[tuple[Cell, str]]) -> dict[Cell, object]:
+    # the components of a task read no formula of another task, the cells set earlier stay untouched
+    engine = _worker['engine']
+    for cell, text in formulas:
+        engine.set_formula(cell, text)
+    engine.recalculate({cell for cell, _ in formulas})
+    return {cell: engine.value(*cell) for cell, _ in formulas}
+
+
+def _batches(components: list[list[Cell]], count: int) -> list[list[Cell]]:
+    batches = [[] for _ in range(min(count, len(components)))]
+    for component in sorted(components, key=len, reverse=True):
+        min(batches, key=len).extend(component)
+    return batches
+
+
+def recalculate_parallel(engine: RecalculationEngine, max_workers: int | None = None) -> set[Cell]:
+    components = engine.components()
+    formulas = sum(len(component) for component in components)
+    max_workers = max_workers or os.cpu_count() or 1
+    # workers have no workbook, references to other sheets are only resolved here
+    if len(components) < 2 or formulas < PARALLEL_MIN_FORMULAS or max_workers < 2 or engine.has_external_references:
+        return engine.recalculate_serial()
+
+    spreadsheet = engine.spreadsheet
+    memories = []
+    try:
+        columns = _share_columns(spreadsheet, memories)
+        # text is not in the shared arrays, the text cells that formulas read go to every worker once
+        objects = {}
+        text_ranges = set()
+        for cell in engine.formula_cells():
+            formula = engine.formula(*cell)
+            for precedent in formula.references:
+                row, col = precedent
+                if row >= spreadsheet.shape[0] or col >= spreadsheet.shape[1]:
+                    continue
+                value = spreadsheet.get_value(row, col)
+                if _value_tag(value) in (STRING, OBJECT):
+                    objects[precedent] = value
+            # lookups and criteria match text too, their whole ranges are sent
+            if formula.operator in MULTIPLE_ARGUMENTS:
+                text_ranges.update(formula.ranges)
+        for first_row, first_col, last_row, last_col in text_ranges:
+            for col in range(first_col, min(last_col, spreadsheet.shape[1] - 1) + 1):
+                for tag in (STRING, OBJECT):
+                    for row, value in spreadsheet.column(col).iter_items(tag, first_row, last_row + 1):
+                        objects[row, col] = value
+
+        changed = set()
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_attach_worker,
+                                 initargs=(spreadsheet.shape, columns, objects)) as executor:
+            futures = [
+                executor.submit(_evaluate_components, [(cell, str(engine.formula(*cell))) for cell in batch])
+                for batch in _batches(components, max_workers * TASKS_PER_WORKER)
+            ]
+            for future in futures:
+                changed |= engine.update_values(future.result())
+        return changed
+    finally:
+        for memory in memories:
+            memory.close()
+            memory.unlink()
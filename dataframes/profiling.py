@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from .addresses import Cell, encode_address
+
+
+MAX_EVENTS = 100000
+TOP_FORMULAS = 50
+MAX_FORMULAS = 10000
+
+
+class Profiler():
+    def __init__(self):
+        self.enabled = False
+        self.started = time.perf_counter()
+        self.events: deque[dict] = deque(maxlen=MAX_EVENTS)
+        self.counters: dict[str, int] = {}
+        self.formulas: dict[tuple[Cell, object], list] = {}
+
+    def enable(self, enabled: bool = True):
+        self.enabled = enabled
+
+    def reset(self):
+        self.started = time.perf_counter()
+        self.events.clear()
+        self.counters.clear()
+        self.formulas.clear()
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def counter(self, name: str) -> int:
+        return self.counters.get(name, 0)
+
+    def record(self, name: str, category: str, start: float, duration: float, **args):
+        self.events.append({
+            'name': name,
+            'category': category,
+            'start': start - self.started,
+            'duration': duration,
+            'thread': threading.get_ident(),
+            'args': args,
+        })
+
+    @contextmanager
+    def span(self, name: str, category: str, **args):
+        if not self.enabled:
+            yield args
+            return
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.record(name, category, start, time.perf_counter() - start, **args)
+
+    def record_formula(self, cell: Cell, expression, seconds: float):
+        stats = self.formulas.get((cell, expression))
+        if stats is None:
+            if len(self.formulas) >= MAX_FORMULAS:
+                self.trim_formulas()
+            stats = self.formulas[(cell, expression)] = [0, 0.0]
+        stats[0] += 1
+        stats[1] += seconds
+
+    def trim_formulas(self):
+        # a long session profiles more formulas than the summary shows, the faster half goes
+        slowest = sorted(self.formulas.items(), key=lambda item: item[1][1], reverse=True)[:MAX_FORMULAS // 2]
+        self.formulas = dict(slowest)
+
+    def last(self, name: str) -> dict | None:
+        # the import worker records from its own thread, read from a copy
+        for event in reversed(list(self.events)):
+            if event['name'] == name:
+                return event
+        return None
+
+    def throughput(self, name: str = 'import') -> tuple[int, float]:
+        events = [event for event in list(self.events) if event['name'] == name]
+        return sum(event['args'].get('rows', 0) for event in events), sum(event['duration'] for event in events)
+
+    def summary(self) -> dict:
+        spans = {}
+        for event in list(self.events):
+            span = spans.setdefault(event['name'], {'count': 0, 'seconds': 0.0, 'max': 0.0})
+            span['count'] += 1
+            span['seconds'] += event['duration']
+            span['max'] = max(span['max'], event['duration'])
+        rows, seconds = self.throughput('import')
+        slowest = sorted(self.formulas.items(), key=lambda item: item[1][1], reverse=True)[:TOP_FORMULAS]
+        return {
+            'spans': spans,
+            'counters': dict(self.counters),
+            'import': {'rows': rows, 'seconds': seconds, 'rows per second': rows / seconds if seconds else 0.0},
+            'formulas': [
+                {'cell': encode_address(*cell), 'formula': str(expression), 'count': count, 'seconds': total}
+                for (cell, expression), (count, total) in slowest
+            ],
+        }
+
+    def to_json(self) -> dict:
+        return {
+            'summary': self.summary(),
+            'events': [dict(event) for event in list(self.events)],
+        }
+
+    def to_chrome_trace(self) -> dict:
+        pid = os.getpid()
+        events = [
+            {
+                'name': event['name'],
+                'cat': event['category'],
+                'ph': 'X',
+                'ts': event['start'] * 1e6,
+                'dur': event['duration'] * 1e6,
+                'pid': pid,
+                'tid': event['thread'],
+                'args': event['args'],
+            }
+            for event in list(self.events)
+        ]
+        now = (time.perf_counter() - self.started) * 1e6
+        events.extend(
+            {'name': name, 'ph': 'C', 'ts': now, 'pid': pid, 'tid': 0, 'args': {name: value}}
+            for name, value in dict(self.counters).items()
+        )
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': self.summary()}
+
+    def save(self, filename: str, chrome_trace: bool = False):
+        with open(filename, 'w') as file:
+            json.dump(self.to_chrome_trace() if chrome_trace else self.to_json(), file, indent=1)
+
+
+profiler = Profiler()
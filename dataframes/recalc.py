@@ -0,0 +1,508 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, OrderedDict, deque
+from time import perf_counter
+
+import numpy as np
+
+from typing import TYPE_CHECKING, Iterator
+
+from .addresses import Cell, Range
+from .aggregates import to_float
+from .criteria import MAX_CRITERIA_COLUMNS, CriteriaColumn
+from .lookups import MAX_INDEXES, ColumnIndex
+from .models import EMPTY, FORMULA, Expression, Spreadsheet, parse_value
+from .profiling import profiler
+
+if TYPE_CHECKING:
+    from .workbook import Workbook
+
+
+# a write touching more of an indexed range than this is indexed again on its next use
+REINDEX_SHARE = 0.1
+# below this many formulas starting worker processes costs more than it saves
+PARALLEL_MIN_FORMULAS = 10000
+
+
+class RecalculationEngine():
+    def __init__(self, spreadsheet: Spreadsheet, load: bool = True, workbook: 'Workbook | None' = None,
+                 max_workers: int | None = None):
+        self.spreadsheet = spreadsheet
+        # processes for a full recalculation, None takes one per core and 1 keeps it in this process
+        self.max_workers = max_workers
+        # references to other sheets are resolved through the workbook
+        self.workbook = workbook
+        self._external: dict[Cell, tuple[tuple[str, Range], ...]] = {}
+        self._formulas: dict[Cell, Expression] = {}
+        self._values: dict[Cell, object] = {}
+        self._precedents: dict[Cell, set[Cell]] = {}
+        self._dependents: dict[Cell, set[Cell]] = {}
+        self._ranges: dict[Cell, list[tuple[int, int, int, int]]] = {}
+        # the column spans of all ranges, a cell outside them is read by no range
+        self._range_columns: Counter[tuple[int, int]] = Counter()
+        self._formula_rows: dict[int, list[int]] = {}
+        # lookup indexes by (col, first_row, last_row), least recently used first
+        self._indexes: OrderedDict[tuple[int, int, int], ColumnIndex] = OrderedDict()
+        # columns of criteria ranges with their cached masks, keyed the same way
+        self._criteria: OrderedDict[tuple[int, int, int], CriteriaColumn] = OrderedDict()
+        # cells get the generation of their last change, untouched cells share the generation of the load
+        self._generation = 0
+        self._loaded = 0
+        self._versions: dict[Cell, int] = {}
+        # counts writes to the stored cells, recalculated values leave it as is
+        self._revision = 0
+        # exports read the cells from another thread, writes are refused until they are done
+        self._locks = 0
+        if load:
+            self.load()
+
+    def lock(self):
+        self._locks += 1
+
+    def unlock(self):
+        self._locks -= 1
+
+    @property
+    def read_only(self) -> bool:
+        return self._locks > 0
+
+    def _check_writable(self):
+        if self._locks:
+            raise RuntimeError('The sheet is read-only while it is exported')
+
+    def load(self):
+        self._check_writable()
+        self._formulas.clear()
+        self._values.clear()
+        self._precedents.clear()
+        self._dependents.clear()
+        self._ranges.clear()
+        self._range_columns.clear()
+        self._external.clear()
+        self._formula_rows.clear()
+        self._indexes.clear()
+        self._criteria.clear()
+        for row, col, value in self.spreadsheet.iter_items(FORMULA):
+            self._register((row, col), value)
+        self.recalculate_all()
+        self._versions.clear()
+        self._generation += 1
+        self._loaded = self._generation
+
+    def load_rows(self, first_row: int, last_row: int) -> set[Cell]:
+        self._check_writable()
+        self._revision += 1
+        self._indexes.clear()
+        self._criteria.clear()
+        added = set()
+        for row, col, value in self.spreadsheet.iter_items(FORMULA, first_row, last_row):
+            self._unregister((row, col))
+            self._register((row, col), value)
+            added.add((row, col))
+
+        # formulas loaded earlier may reference the new rows
+        added |= self._dependents_in(first_row, 0, last_row, self.spreadsheet.shape[1] - 1)
+        return self.recalculate(added)
+
+    def components(self) -> list[list[Cell]]:
+        parents = {cell: cell for cell in self._formulas}
+
+        def find(cell):
+            while parents[cell] != cell:
+                parents[cell] = parents[parents[cell]]
+                cell = parents[cell]
+            return cell
+
+        def union(first, second):
+            first, second = find(first), find(second)
+            if first != second:
+                parents[second] = first
+
+        for cell, precedents in self._precedents.items():
+            for precedent in precedents:
+                if precedent in parents:
+                    union(cell, precedent)
+        for cell, ranges in self._ranges.items():
+            for first_row, first_col, last_row, last_col in ranges:
+                for col in range(max(first_col, 0), last_col + 1):
+                    formula_rows = self._formula_rows.get(col, [])
+                    start = bisect_left(formula_rows, first_row)
+                    stop = bisect_right(formula_rows, last_row)
+                    for row in formula_rows[start:stop]:
+                        union(cell, (row, col))
+
+        components: dict[Cell, list[Cell]] = {}
+        for cell in self._formulas:
+            components.setdefault(find(cell), []).append(cell)
+        return list(components.values())
+
+    def update_values(self, values: dict[Cell, object]) -> set[Cell]:
+        changed = set()
+        for cell, value in values.items():
+            if cell not in self._values or self._values[cell] != value:
+                self._values[cell] = value
+                changed.add(cell)
+        self._update_indexes(changed)
+        return self._bump(changed)
+
+    def version(self, row: int, col: int) -> int:
+        return self._versions.get((row, col), self._loaded)
+
+    @property
+    def has_external_references(self) -> bool:
+        return bool(self._external)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def revision(self) -> int:
+        return self._revision
+
+    def value(self, row: int, col: int):
+        cell = (row, col)
+        if cell in self._formulas:
+            return self._values.get(cell)
+        return self.spreadsheet.get_value(row, col)
+
+    def formula(self, row: int, col: int) -> Expression | None:
+        return self._formulas.get((row, col))
+
+    def formula_cells(self) -> list[Cell]:
+        return list(self._formulas)
+
+    def set_value(self, row: int, col: int, value) -> set[Cell]:
+        return self.set_values({(row, col): value})
+
+    def set_values(self, values: dict[Cell, object]) -> set[Cell]:
+        self._check_writable()
+        written = set()
+        for cell, value in values.items():
+            value = parse_value(value)
+            if self.spreadsheet.get_value(*cell) == value:
+                continue
+            self.spreadsheet.set_value(*cell, value)
+            self._unregister(cell)
+            if isinstance(value, Expression):
+                self._register(cell, value)
+            written.add(cell)
+        if not written:
+            return set()
+        rows, cols = [row for row, _ in written], [col for _, col in written]
+        return self._recalculate_written(written, (min(rows), min(cols), max(rows), max(cols)))
+
+    def set_block(self, first_row: int, first_col: int, values) -> set[Cell]:
+        self._check_writable()
+        last_row, last_col = self.spreadsheet.set_block(first_row, first_col, values)
+        if last_row < first_row or last_col < first_col:
+            return set()
+        for col in range(first_col, last_col + 1):
+            formula_rows = self._formula_rows.get(col, [])
+            start, stop = bisect_left(formula_rows, first_row), bisect_right(formula_rows, last_row)
+            for row in formula_rows[start:stop]:
+                self._unregister((row, col))
+            for row, value in self.spreadsheet.column(col).iter_items(FORMULA, first_row, last_row + 1):
+                self._register((row, col), value)
+        written = {(row, col) for row in range(first_row, last_row + 1) for col in range(first_col, last_col + 1)}
+        return self._recalculate_written(written, (first_row, first_col, last_row, last_col))
+
+    def set_formula(self, cell: Cell, text: str):
+        self._check_writable()
+        self._unregister(cell)
+        self._register(cell, Expression(text))
+
+    def dependents(self, cells: set[Cell]) -> set[Cell]:
+        found = set(cells)
+        queue = deque(cells)
+        while queue:
+            cell = queue.popleft()
+            for dependent in self._direct_dependents(cell):
+                if dependent not in found:
+                    found.add(dependent)
+                    queue.append(dependent)
+        return found
+
+    def recalculate(self, cells: set[Cell] | None = None) -> set[Cell]:
+        if cells is None:
+            return self.recalculate_all()
+        return set(cells) | self._recalculate_dirty(self.dependents(cells))
+
+    def recalculate_all(self) -> set[Cell]:
+        # worker processes see no other sheet, formulas reading one keep the sheet in this process
+        if self.max_workers != 1 and not self.has_external_references and len(self._formulas) >= PARALLEL_MIN_FORMULAS:
+            from .parallel import recalculate_parallel
+
+            return recalculate_parallel(self, self.max_workers)
+        return self.recalculate_serial()
+
+    def recalculate_serial(self) -> set[Cell]:
+        return self._recalculate_dirty(set(self._formulas))
+
+    def external_dependents(self, sheet: str, cells: set[Cell] | None = None) -> set[Cell]:
+        found = set()
+        for dependent, references in self._external.items():
+            for name, (first_row, first_col, last_row, last_col) in references:
+                if name == sheet and (cells is None or any(
+                        first_row <= row <= last_row and first_col <= col <= last_col for row, col in cells)):
+                    found.add(dependent)
+                    break
+        return found
+
+    def recalculate_external(self, sheet: str, cells: set[Cell] | None = None) -> set[Cell]:
+        # another sheet of the workbook changed, refresh the formulas reading it
+        seeds = self.external_dependents(sheet, cells)
+        return self._recalculate_dirty(self.dependents(seeds)) if seeds else set()
+
+    def lookup_index(self, first_row: int, col: int, last_row: int) -> ColumnIndex | None:
+        return self._column_cache(self._indexes, MAX_INDEXES, self._build_index, first_row, col, last_row)
+
+    def criteria_column(self, first_row: int, col: int, last_row: int) -> CriteriaColumn | None:
+        return self._column_cache(self._criteria, MAX_CRITERIA_COLUMNS, self._build_criteria, first_row, col, last_row)
+
+    def _column_cache(self, cache: OrderedDict, limit: int, build, first_row: int, col: int, last_row: int):
+        rows, cols = self.spreadsheet.shape
+        first_row, last_row = max(first_row, 0), min(last_row, rows - 1)
+        if col >= cols or first_row > last_row:
+            return None
+        key = (col, first_row, last_row)
+        found = cache.get(key)
+        if found is not None:
+            cache.move_to_end(key)
+            return found
+        found = cache[key] = build(col, first_row, last_row)
+        if len(cache) > limit:
+            cache.popitem(last=False)
+        return found
+
+    def _formula_values(self, col: int, first_row: int, last_row: int) -> Iterator[tuple[int, object]]:
+        formula_rows = self._formula_rows.get(col, [])
+        start, stop = bisect_left(formula_rows, first_row), bisect_right(formula_rows, last_row)
+        for row in formula_rows[start:stop]:
+            yield row, self._values.get((row, col))
+
+    def _build_index(self, col: int, first_row: int, last_row: int) -> ColumnIndex:
+        with profiler.span('build index', 'engine', col=col, rows=last_row - first_row + 1):
+            values = self.spreadsheet.column(col).to_list(first_row, last_row + 1)
+            for row, value in self._formula_values(col, first_row, last_row):
+                values[row - first_row] = value
+            return ColumnIndex(values)
+
+    def _build_criteria(self, col: int, first_row: int, last_row: int) -> CriteriaColumn:
+        with profiler.span('build criteria', 'engine', col=col, rows=last_row - first_row + 1):
+            column = self.spreadsheet.column(col)
+            stop = last_row + 1
+            criteria = CriteriaColumn(
+                column.numeric(first_row, stop),
+                column.dates(first_row, stop),
+                column.tags[first_row:stop] == EMPTY,
+                *column.texts(first_row, stop),
+            )
+            for row, value in self._formula_values(col, first_row, last_row):
+                criteria.update(row - first_row, value)
+            return criteria
+
+    def numeric_block(self, first_row: int, first_col: int, last_row: int, last_col: int,
+                      exclude: Cell | None = None) -> np.ndarray:
+        rows, cols = self.spreadsheet.shape
+        first_row, first_col = max(first_row, 0), max(first_col, 0)
+        values = self.spreadsheet.numeric_block(first_row, first_col, last_row, last_col)
+        # formula cells hold their text in the spreadsheet, overlay the computed values
+        for col in range(first_col, min(last_col, cols - 1) + 1):
+            formula_rows = self._formula_rows.get(col, [])
+            start = bisect_left(formula_rows, first_row)
+            stop = bisect_right(formula_rows, last_row)
+            for row in formula_rows[start:stop]:
+                value = np.nan if (row, col) == exclude else to_float(self._values.get((row, col)))
+                values[row - first_row, col - first_col] = value
+        return values
+
+    def _recalculate_written(self, cells: set[Cell], bounds: tuple[int, int, int, int]) -> set[Cell]:
+        # seed from the written formulas and whatever reads the written area, instead of
+        # searching the dependents of every written cell
+        seeds = {cell for cell in cells if cell in self._formulas} | self._dependents_in(*bounds)
+        self._revision += 1
+        self._update_indexes(cells)
+        return self._bump(cells) | self._recalculate_dirty(self.dependents(seeds))
+
+    def _recalculate_dirty(self, dirty: set[Cell]) -> set[Cell]:
+        with profiler.span('recalculate', 'engine', dirty=len(dirty)) as args:
+            changed = set()
+            order, cyclic = self._topological_order(dirty)
+            evaluate = self._evaluate_profiled if profiler.enabled else self._evaluate
+            for cell in order + sorted(cyclic):
+                value = None if cell in cyclic else evaluate(cell, self._formulas[cell])
+                if cell not in self._values or self._values[cell] != value:
+                    self._values[cell] = value
+                    changed.add(cell)
+                    # lookups and conditional aggregates later in the order read the new value
+                    if self._indexes or self._criteria:
+                        self._update_index(cell, value)
+            args.update(evaluated=len(order), cyclic=len(cyclic), changed=len(changed))
+        return self._bump(changed)
+
+    def _evaluate_profiled(self, cell: Cell, expression: Expression):
+        start = perf_counter()
+        value = self._evaluate(cell, expression)
+        profiler.record_formula(cell, expression, perf_counter() - start)
+        profiler.count('formulas evaluated')
+        return value
+
+    def _bump(self, cells: set[Cell]) -> set[Cell]:
+        self._generation += 1
+        for cell in cells:
+            self._versions[cell] = self._generation
+        return cells
+
+    def _update_index(self, cell: Cell, value):
+        row, col = cell
+        for cache in (self._indexes, self._criteria):
+            for (index_col, first_row, last_row), index in cache.items():
+                if index_col == col and first_row <= row <= last_row:
+                    index.update(row - first_row, value)
+
+    def _update_indexes(self, cells: set[Cell]):
+        if not self._indexes and not self._criteria:
+            return
+        columns: dict[int, list[int]] = {}
+        for row, col in cells:
+            columns.setdefault(col, []).append(row)
+        for cache in (self._indexes, self._criteria):
+            for key, index in list(cache.items()):
+                col, first_row, last_row = key
+                rows = [row for row in columns.get(col, ()) if first_row <= row <= last_row]
+                if len(rows) > len(index) * REINDEX_SHARE:
+                    del cache[key]
+                    continue
+                for row in rows:
+                    index.update(row - first_row, self.value(row, col))
+
+    def _evaluate(self, cell: Cell, expression: Expression):
+        rows, cols = self.spreadsheet.shape
+
+        def resolve(row, col, sheet=None):
+            if sheet is not None:
+                return None if self.workbook is None else self.workbook.value(sheet, row, col)
+            if (row, col) == cell or row >= rows or col >= cols:
+                return None
+            return self.value(row, col)
+
+        def block(first_row, first_col, last_row, last_col, sheet=None):
+            if sheet is not None:
+                if self.workbook is None:
+                    return np.empty((0, 0))
+                return self.workbook.numeric_block(sheet, first_row, first_col, last_row, last_col)
+            return self.numeric_block(first_row, first_col, last_row, last_col, cell)
+
+        def index(first_row, col, last_row, sheet=None):
+            if sheet is not None:
+                return None if self.workbook is None else self.workbook.lookup_index(sheet, first_row, col, last_row)
+            return self.lookup_index(first_row, col, last_row)
+
+        def criteria(first_row, col, last_row, sheet=None):
+            if sheet is not None:
+                if self.workbook is None:
+                    return None
+                return self.workbook.criteria_column(sheet, first_row, col, last_row)
+            return self.criteria_column(first_row, col, last_row)
+
+        return expression.calculate_value(resolve, block, index, criteria)
+
+    def _direct_dependents(self, cell: Cell) -> set[Cell]:
+        found = set(self._dependents.get(cell, ()))
+        row, col = cell
+        if not self._range_columns or not any(first <= col <= last for first, last in self._range_columns):
+            return found
+        for dependent, ranges in self._ranges.items():
+            if dependent == cell:
+                continue
+            for first_row, first_col, last_row, last_col in ranges:
+                if first_row <= row <= last_row and first_col <= col <= last_col:
+                    found.add(dependent)
+                    break
+        return found
+
+    def _dependents_in(self, first_row: int, first_col: int, last_row: int, last_col: int) -> set[Cell]:
+        found = set()
+        for (row, col), dependents in self._dependents.items():
+            if first_row <= row <= last_row and first_col <= col <= last_col:
+                found.update(dependents)
+        for cell, ranges in self._ranges.items():
+            for first, left, last, right in ranges:
+                if first <= last_row and last >= first_row and left <= last_col and right >= first_col:
+                    found.add(cell)
+                    break
+        return found
+
+    def _direct_precedents(self, cell: Cell, dirty: set[Cell]) -> set[Cell]:
+        found = self._precedents.get(cell, set()) & dirty
+        if cell not in self._ranges:
+            return found
+        for first_row, first_col, last_row, last_col in self._ranges[cell]:
+            # the formulas inside the range come from the formula rows when there are fewer of them than dirty cells
+            spans = []
+            for col, formula_rows in self._formula_rows.items():
+                if first_col <= col <= last_col:
+                    start, stop = bisect_left(formula_rows, first_row), bisect_right(formula_rows, last_row)
+                    spans.append((col, formula_rows[start:stop]))
+            if sum(len(rows) for _, rows in spans) <= len(dirty):
+                found.update(precedent for col, rows in spans for precedent in zip(rows, [col] * len(rows))
+                             if precedent in dirty)
+            else:
+                for precedent in dirty:
+                    row, col = precedent
+                    if first_row <= row <= last_row and first_col <= col <= last_col:
+                        found.add(precedent)
+        found.discard(cell)
+        return found
+
+    def _topological_order(self, dirty: set[Cell]) -> tuple[list[Cell], set[Cell]]:
+        formulas = {cell for cell in dirty if cell in self._formulas}
+        pending = {cell: self._direct_precedents(cell, formulas) for cell in formulas}
+        waiting: dict[Cell, list[Cell]] = {}
+        for cell, precedents in pending.items():
+            for precedent in precedents:
+                waiting.setdefault(precedent, []).append(cell)
+
+        order = []
+        queue = deque(cell for cell, precedents in pending.items() if not precedents)
+        while queue:
+            cell = queue.popleft()
+            order.append(cell)
+            for dependent in waiting.get(cell, ()):
+                pending[dependent].discard(cell)
+                if not pending[dependent]:
+                    queue.append(dependent)
+
+        # cells left with unresolved precedents are part of a cycle
+        cyclic = {cell for cell, precedents in pending.items() if precedents}
+        return order, cyclic
+
+    def _register(self, cell: Cell, expression: Expression):
+        self._formulas[cell] = expression
+        insort(self._formula_rows.setdefault(cell[1], []), cell[0])
+        precedents = {reference for reference in expression.references if reference != cell}
+        self._precedents[cell] = precedents
+        for precedent in precedents:
+            self._dependents.setdefault(precedent, set()).add(cell)
+        if expression.ranges:
+            self._ranges[cell] = expression.ranges
+            self._range_columns.update((first_col, last_col) for _, first_col, _, last_col in expression.ranges)
+        if expression.external:
+            self._external[cell] = expression.external
+
+    def _unregister(self, cell: Cell):
+        if self._formulas.pop(cell, None) is not None:
+            formula_rows = self._formula_rows[cell[1]]
+            formula_rows.pop(bisect_left(formula_rows, cell[0]))
+        self._values.pop(cell, None)
+        for _, first_col, _, last_col in self._ranges.pop(cell, ()):
+            self._range_columns[first_col, last_col] -= 1
+            if not self._range_columns[first_col, last_col]:
+                del self._range_columns[first_col, last_col]
+        self._external.pop(cell, None)
+        for precedent in self._precedents.pop(cell, ()):
+            dependents = self._dependents.get(precedent)
+            if dependents:
+                dependents.discard(cell)
+                if not dependents:
+                    del self._dependents[precedent]
@@ -0,0 +1,179 @@
+import json
+import struct
+
+import numpy as np
+
+from .formulas import compile_formulas
+from .models import FORMULA, OBJECT, STRING, Expression, SparseColumn, Spreadsheet, TypedColumn
+
+
+MAGIC = b'XXL1'
+VERSION = 1
+ALIGNMENT = 64
+SUFFIX = '.xxl'
+FOOTER = struct.Struct('<Q4s')
+
+
+class _Writer():
+    def __init__(self, file):
+        self.file = file
+        self.file.write(MAGIC)
+        self.offset = len(MAGIC)
+
+    def write(self, array: np.ndarray) -> dict:
+        padding = -self.offset % ALIGNMENT
+        self.file.write(b'\0' * padding)
+        self.offset += padding
+        array = np.ascontiguousarray(array)
+        description = {'offset': self.offset, 'dtype': array.dtype.str, 'length': len(array)}
+        self.file.write(array.view(np.uint8))
+        self.offset += array.nbytes
+        return description
+
+    def write_table(self, values: list[str]) -> dict:
+        encoded = [value.encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return {
+            'offsets': self.write(offsets),
+            'data': self.write(np.frombuffer(b''.join(encoded), dtype=np.uint8)),
+        }
+
+
+class _Table():
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self.offsets = offsets
+        self.data = data
+
+    def __getitem__(self, index: int) -> str:
+        return bytes(self.data[self.offsets[index]:self.offsets[index + 1]]).decode('utf-8')
+
+    def decode(self, indexes: np.ndarray) -> np.ndarray:
+        unique, inverse = np.unique(indexes, return_inverse=True)
+        values = np.empty(len(unique), dtype=object)
+        values[:] = [self[index] for index in unique.tolist()]
+        return values[inverse]
+
+
+def _index(table: dict, value) -> int:
+    index = table.get(value)
+    if index is None:
+        index = table[value] = len(table)
+    return index
+
+
+def _write_column(writer: _Writer, column: TypedColumn, index: int,
+                  strings: dict, formulas: dict, objects: list) -> dict:
+    block = {
+        'index': index,
+        'length': len(column),
+        'tags': writer.write(column.tags),
+        'arrays': {str(tag): writer.write(array) for tag, array in column._arrays.items()},
+        'objects': None,
+    }
+    if column._objects is not None:
+        references = np.full(len(column), -1, dtype=np.int32)
+        for row in np.flatnonzero(column.tags >= STRING).tolist():
+            value, tag = column._objects[row], column.tags[row]
+            if tag == STRING:
+                references[row] = _index(strings, value)
+            elif tag == FORMULA:
+                references[row] = _index(formulas, str(value))
+            else:
+                objects.append(value if isinstance(value, (bool, int, float)) else str(value))
+                references[row] = len(objects) - 1
+        block['objects'] = writer.write(references)
+    return block
+
+
+def save_workbook(spreadsheet: Spreadsheet, filename: str):
+    strings: dict[str, int] = {}
+    formulas: dict[str, int] = {}
+    objects: list = []
+    rows, _ = spreadsheet.shape
+    with open(filename, 'wb') as file:
+        writer = _Writer(file)
+        columns = []
+        for col in range(spreadsheet.shape[1]):
+            column = spreadsheet.column(col)
+            if isinstance(column, SparseColumn):
+                blocks = [
+                    _write_column(writer, block, index, strings, formulas, objects)
+                    for index, block in sorted(column._blocks.items())
+                ]
+                columns.append({'sparse': True, 'block_rows': column.block_rows, 'blocks': blocks})
+            else:
+                blocks = [_write_column(writer, column, 0, strings, formulas, objects)]
+                columns.append({'sparse': False, 'blocks': blocks})
+
+        footer = json.dumps({
+            'version': VERSION,
+            'shape': [rows, len(columns)],
+            'columns': columns,
+            'strings': writer.write_table(list(strings)),
+            'formulas': writer.write_table(list(formulas)),
+            'objects': objects,
+        }).encode('utf-8')
+        file.write(footer)
+        file.write(FOOTER.pack(len(footer), MAGIC))
+
+
+def _object_loader(tags: np.ndarray, references: np.ndarray, strings: _Table, formulas: _Table, objects: list):
+    def load() -> np.ndarray:
+        values = np.empty(len(tags), dtype=object)
+        for tag in (STRING, FORMULA, OBJECT):
+            rows = np.flatnonzero(tags == tag)
+            if not len(rows):
+                continue
+            if tag == STRING:
+                values[rows] = strings.decode(references[rows])
+            elif tag == FORMULA:
+                texts = formulas.decode(references[rows]).tolist()
+                values[rows] = [Expression(text, compiled) for text, compiled in zip(texts, compile_formulas(texts))]
+            else:
+                values[rows] = [objects[reference] for reference in references[rows].tolist()]
+        return values
+
+    return load
+
+
+def open_workbook(filename: str) -> Spreadsheet:
+    # numeric blocks are views into a copy-on-write mapping, nothing is read until it is used
+    buffer = np.memmap(filename, dtype=np.uint8, mode='c')
+    if bytes(buffer[:len(MAGIC)]) != MAGIC or bytes(buffer[-len(MAGIC):]) != MAGIC:
+        raise ValueError(f'Not a workbook file: {filename}')
+    length, _ = FOOTER.unpack(bytes(buffer[-FOOTER.size:]))
+    footer = json.loads(bytes(buffer[-FOOTER.size - length:-FOOTER.size]).decode('utf-8'))
+    if footer['version'] != VERSION:
+        raise ValueError(f'Unsupported workbook version: {footer["version"]}')
+
+    def view(description: dict) -> np.ndarray:
+        dtype = np.dtype(description['dtype'])
+        start = description['offset']
+        return buffer[start:start + description['length'] * dtype.itemsize].view(dtype)
+
+    def table(description: dict) -> _Table:
+        return _Table(view(description['offsets']), view(description['data']))
+
+    strings, formulas = table(footer['strings']), table(footer['formulas'])
+    objects = footer['objects']
+
+    def read_block(block: dict) -> TypedColumn:
+        column = TypedColumn(0)
+        column.tags = view(block['tags'])
+        column._arrays = {int(tag): view(description) for tag, description in block['arrays'].items()}
+        if block['objects'] is not None:
+            column._object_loader = _object_loader(
+                column.tags, view(block['objects']), strings, formulas, objects)
+        return column
+
+    rows, _ = footer['shape']
+    columns = []
+    for description in footer['columns']:
+        if description['sparse']:
+            column = SparseColumn(rows, description['block_rows'])
+            column._blocks = {block['index']: read_block(block) for block in description['blocks']}
+        else:
+            column = read_block(description['blocks'][0])
+        columns.append(column)
+    return Spreadsheet.from_columns(columns, rows)
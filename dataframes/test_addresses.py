@@ -0,0 +1,59 @@
+from .addresses import (
+    column_index, column_name, decode_address, decode_addresses, decode_range, encode_address, encode_range,
+)
+from .formulas import compile_formula, compile_formulas
+from .models import Coordinates
+
+
+def test_column_names():
+    for col, name in [(0, 'A'), (25, 'Z'), (26, 'AA'), (701, 'ZZ'), (702, 'AAA'), (16383, 'XFD')]:
+        assert column_name(col) == name
+        assert column_index(name) == col
+        assert column_index(name.lower()) == col
+
+
+def test_decode_address():
+    assert decode_address('A1') == (0, 0)
+    assert decode_address('A10') == (9, 0)
+    assert decode_address('ab12') == (11, 27)
+    assert decode_address('$C$5') == (4, 2)
+    assert decode_address('XFD1048576') == (1048575, 16383)
+    for address in ['', 'A', '1', 'A0', '1A', 'A1B', 'XFE1', 'A1048577', 'ABCD1']:
+        assert decode_address(address) == (-1, -1)
+    assert encode_address(1048575, 16383) == 'XFD1048576'
+    assert Coordinates('AA10') == Coordinates(x=26, y=9)
+
+
+def test_decode_range():
+    assert decode_range('B3:A1') == (0, 0, 2, 1)
+    assert decode_range('C4') == (3, 2, 3, 2)
+    assert decode_range('A1:?') == (-1, -1, -1, -1)
+    assert encode_range(0, 0, 2, 1) == 'A1:B3'
+
+
+def test_decode_addresses_matches_single_path():
+    addresses = ['A1', 'xfd1048576', '$B$3', ' c5 ', 'AB12', 'A10', '', 'A0', '1A', 'A1B1', 'XFE1', 'A' * 20 + '1']
+    rows, cols = decode_addresses(addresses)
+    assert list(zip(rows.tolist(), cols.tolist())) == [decode_address(address) for address in addresses]
+    rows, cols = decode_addresses([])
+    assert len(rows) == len(cols) == 0
+
+
+def test_decode_addresses_malformed_dollars():
+    addresses = ['$A$1', '$A1', 'A$1', '$$A1', 'A$$1', '$A$$1', 'A1$', '$', 'A$', '$1', 'A$B1', '$a$b$1']
+    addresses += ['$$XFD$1048576', '$XFD$$1048576']
+    addresses += ['A00000001', 'A0000001', '$A$00000001', 'a01', 'A000000001']
+    rows, cols = decode_addresses(addresses)
+    assert list(zip(rows.tolist(), cols.tolist())) == [decode_address(address) for address in addresses]
+    assert decode_address('$$A1') == decode_address('A$$1') == (-1, -1)
+
+
+def test_compile_formulas_batch():
+    texts = ['* A10 AB2', 'sum A1:A3', '* A10 AB2', 'text']
+    compiled = compile_formulas(texts)
+    assert [formula.references for formula in compiled] == [
+        compile_formula(text).references for text in texts
+    ]
+    assert compiled[0].references == ((9, 0), (1, 27))
+    assert compiled[1].ranges == ((0, 0, 2, 0),)
+    assert compiled[0] is compiled[2]
@@ -0,0 +1,67 @@
+import numpy as np
+
+from .aggregates import aggregate, to_float
+from .formulas import to_number
+from .models import Expression, Spreadsheet
+from .recalc import RecalculationEngine
+
+
+def test_numeric_block_masks_text():
+    s = Spreadsheet(2, 3)
+    s.set_value(0, 0, '1')
+    s.set_value(1, 0, 'text')
+    s.set_value(2, 1, 2.5)
+    block = s.numeric_block(0, 0, 2, 1)
+    assert block.shape == (3, 2)
+    assert block[0, 0] == 1
+    assert np.isnan(block[1, 0])
+    assert block[2, 1] == 2.5
+
+
+def test_aggregate():
+    block = np.array([[1, np.nan], [3, 4]])
+    assert aggregate('sum', block) == 8
+    assert aggregate('average', block) == 8 / 3
+    assert aggregate('min', block) == 1
+    assert aggregate('max', block) == 4
+    assert aggregate('count', block) == 3
+    assert aggregate('product', block) == 12
+    assert aggregate('average', np.array([np.nan])) == 'nan'
+
+
+def test_expression_aggregate_without_table():
+    values = {(0, 0): '4', (1, 0): 'x', (2, 0): '6'}
+    expression = Expression('average A1 A3')
+    assert expression.calculate_value(lambda row, col: values.get((row, col))) == 5
+
+
+def test_engine_aggregates_over_formulas():
+    s = Spreadsheet(2, 4)
+    for row in range(3):
+        s.set_value(row, 0, str(row + 1))
+        s.set_value(row, 1, '* A%d A%d' % (row + 1, row + 1))
+    s.set_value(3, 1, 'max B1 B4')
+    s.set_value(3, 0, 'count A1 B4')
+    engine = RecalculationEngine(s)
+    assert engine.value(3, 1) == 9
+    assert engine.value(3, 0) == 7
+
+    engine.set_value(2, 0, '5')
+    assert engine.value(3, 1) == 25
+
+
+def test_operators_and_aggregates_read_text_alike():
+    s = Spreadsheet(2, 4)
+    s.set_value(0, 0, ' 5')
+    s.set_value(1, 0, '3')
+    s.set_value(2, 0, '1_0')
+    s.set_value(0, 1, '+ A1 A2')
+    s.set_value(1, 1, 'sum A1 A2')
+    s.set_value(2, 1, '+ A3 A2')
+    s.set_value(3, 1, 'sum A2 A3')
+    engine = RecalculationEngine(s)
+    assert s.get_value(0, 0) == ' 5'
+    assert engine.value(0, 1) == engine.value(1, 1) == 3
+    assert engine.value(2, 1) == engine.value(3, 1) == 3
+    assert to_number(' 5') == 0 and np.isnan(to_float(' 5'))
+    assert to_number('2.5') == to_float('2.5') == 2.5 and to_number('7') == 7
@@ -0,0 +1,50 @@
+import csv
+import subprocess
+import sys
+
+from .models import Spreadsheet
+from .storage import open_workbook, save_workbook
+
+
+def make_workbook(path):
+    s = Spreadsheet(3, 3)
+    s.set_value(0, 0, '2')
+    s.set_value(1, 0, '3')
+    s.set_value(0, 1, '* A1 A2')
+    s.set_value(2, 1, 'sum A1 B1')
+    s.set_value(2, 2, 'text')
+    save_workbook(s, path)
+
+
+def test_cli_writes_computed_values(tmp_path):
+    source = str(tmp_path / 'book.xxl')
+    make_workbook(source)
+    target = tmp_path / 'values.csv'
+    code = (
+        'import sys\n'
+        'from dataframes.cli import main\n'
+        f'code = main([{source!r}, "-o", {str(target)!r}])\n'
+        'assert "pandas" not in sys.modules and "PyQt5" not in sys.modules\n'
+        'sys.exit(code)\n'
+    )
+    subprocess.run([sys.executable, '-c', code], check=True, capture_output=True)
+    with open(target, newline='') as file:
+        assert list(csv.reader(file)) == [['2', '6', ''], ['3', '', ''], ['', '8', 'text']]
+
+
+def test_cli_workbook_output(tmp_path):
+    from .cli import main
+
+    source = str(tmp_path / 'book.xxl')
+    make_workbook(source)
+    assert main([source, '-f', 'xxl', '-d', str(tmp_path)]) == 0
+    result = open_workbook(str(tmp_path / 'book.out.xxl'))
+    assert result.get_value(0, 1) == 6
+    assert result.get_value(2, 1) == 8
+
+
+def test_cli_reports_missing_input(tmp_path, capsys):
+    from .cli import main
+
+    assert main([str(tmp_path / 'missing.xxl')]) == 1
+    assert 'missing.xxl' in capsys.readouterr().err
@@ -1,5 +1,5 @@
 import string
-from .models import parse_coordinate, Coordinates
+from .models import parse_coordinate, Coordinates, CoordinatesRange
 
 
 def test_parse_coordinate():
@@ -25,3 +25,24 @@ def test_create_coordinate():
 
     coordinate = Coordinates()
     assert not coordinate.is_valid()
+
+
+def test_coordinates_range():
+    coordinates_range = CoordinatesRange(Coordinates(x=1, y=0), Coordinates(x=3, y=3))
+    assert len(coordinates_range) == 6
+    assert coordinates_range.shape == (3, 2)
+    assert [(c.x, c.y) for c in coordinates_range] == [(1, 0), (1, 1), (1, 2), (2, 0), (2, 1), (2, 2)]
+    assert [(c.x, c.y) for c in coordinates_range.by_rows()] == [(1, 0), (2, 0), (1, 1), (2, 1), (1, 2), (2, 2)]
+    assert coordinates_range[-1] == Coordinates(x=2, y=2)
+    assert Coordinates(x=2, y=1) in coordinates_range
+    assert Coordinates(x=0, y=1) not in coordinates_range
+
+
+def test_coordinates_range_slice():
+    coordinates_range = CoordinatesRange(Coordinates(x=0, y=0), Coordinates(x=1000, y=1000))
+    assert len(coordinates_range) == 1000000
+    sliced = coordinates_range.by_rows()[1000:3000:2]
+    assert len(sliced) == 1000
+    assert sliced[0] == Coordinates(x=0, y=1)
+    assert Coordinates(x=2, y=1) in sliced
+    assert Coordinates(x=3, y=1) not in sliced
@@ -0,0 +1,85 @@
+from datetime import date
+
+import numpy as np
+
+from .criteria import BLANK, DAY, NUMBER, TEXT, CriteriaColumn, Criterion, criterion, parse_criterion
+from .models import Expression, Spreadsheet
+from .recalc import RecalculationEngine
+from .workbook import Workbook
+
+
+def test_parse_criterion():
+    assert parse_criterion('>=5') == Criterion('>=', NUMBER, 5.0)
+    assert parse_criterion('<>North') == Criterion('<>', TEXT, 'north')
+    assert parse_criterion('=') == Criterion('=', BLANK)
+    assert parse_criterion('<2024-02-01') == Criterion('<', DAY, np.datetime64('2024-02-01', 'us'))
+    assert criterion(3) == Criterion('=', NUMBER, 3.0)
+    assert criterion(None) == Criterion('=', BLANK)
+
+
+def test_criteria_column_masks():
+    column = CriteriaColumn.from_values(['North', 10, None, 'south', 'north', date(2024, 1, 5), 'n~*'])
+    assert column.mask(parse_criterion('north')).tolist() == [True, False, False, False, True, False, False]
+    assert column.mask(parse_criterion('<>north')).tolist() == [False, True, True, True, False, True, True]
+    assert column.mask(parse_criterion('>5')).tolist() == [False, True, False, False, False, False, False]
+    assert column.mask(parse_criterion('?o*')).tolist() == [True, False, False, True, True, False, False]
+    assert column.mask(parse_criterion('n~~~*')).tolist() == [False] * 6 + [True]
+    assert column.mask(parse_criterion('>2024-01-01')).tolist() == [False] * 5 + [True, False]
+    assert column.mask(criterion(None)).tolist() == [False, False, True, False, False, False, False]
+
+    mask = column.mask(parse_criterion('north'))
+    column.update(2, 'NORTH')
+    column.update(0, 7)
+    assert mask.tolist() == [False, False, True, False, True, False, False]
+    assert column.mask(parse_criterion('>5')).tolist() == [True, True] + [False] * 5
+
+
+def test_expression_conditionals_without_engine():
+    values = {(0, 0): 'a', (1, 0): 'b', (2, 0): 'a', (0, 1): 1, (1, 1): 2, (2, 1): '4', (0, 2): '>1'}
+
+    def resolve(row, col):
+        return values.get((row, col))
+
+    assert Expression('sumif A1:A3 a B1:B3').calculate_value(resolve) == 5
+    assert Expression('sumif B1:B3 C1').calculate_value(resolve) == 2
+    assert Expression('countif A1:A3 <>a').calculate_value(resolve) == 1
+    assert Expression('averageif A1:A3 a B1').calculate_value(resolve) == 2.5
+    assert Expression('averageif A1:A3 z B1').calculate_value(resolve) == 'nan'
+    assert Expression('countifs A1:A3 a B1:B3 <2').calculate_value(resolve) == 1
+    assert Expression('sumifs B1:B3 A1:A3 a B1:B2 >0').calculate_value(resolve) == 'nan'
+    expression = Expression('sumifs B1:B3 A1:A3 C1 A1:A3 a')
+    assert expression.references == ((0, 2),)
+    assert expression.ranges == ((0, 0, 2, 0), (0, 1, 2, 1))
+
+
+def test_engine_conditionals_follow_edits():
+    s = Spreadsheet(5, 5)
+    for row, (region, amount) in enumerate([('north', 10), ('south', 20), ('north', 30), ('east', 40)]):
+        s.set_value(row, 0, region)
+        s.set_value(row, 1, amount)
+    s.set_value(4, 0, '= E1')
+    s.set_value(4, 1, 50)
+    s.set_value(0, 4, 'south')
+    s.set_value(0, 2, 'sumif A1:A5 north B1:B5')
+    s.set_value(1, 2, 'countifs A1:A5 E1 B1:B5 >15')
+    s.set_value(2, 2, 'averageifs B1:B5 A1:A5 <>north')
+    engine = RecalculationEngine(s)
+    assert [engine.value(row, 2) for row in range(3)] == [40, 2, 110 / 3]
+
+    engine.set_value(1, 0, 'North')
+    assert [engine.value(row, 2) for row in range(3)] == [60, 1, 45]
+    engine.set_value(2, 1, 'n/a')
+    assert engine.value(0, 2) == 30
+    # the formula in the criteria range updates the cached masks before the aggregates read them
+    engine.set_value(0, 4, 'north')
+    assert [engine.value(row, 2) for row in range(3)] == [80, 2, 40]
+
+
+def test_workbook_conditionals(tmp_path):
+    workbook = Workbook({
+        'Data': lambda: Spreadsheet(data=[['a', 1], ['b', 2], ['a', 3]]),
+        'Report': lambda: Spreadsheet(data=[['sumif Data!A1:A3 a Data!B1:B3']]),
+    }, spill_dir=str(tmp_path))
+    assert workbook.engine('Report').value(0, 0) == 4
+    workbook.set_value('Data', 1, 0, 'a')
+    assert workbook.engine('Report').value(0, 0) == 6
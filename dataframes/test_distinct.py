@@ -0,0 +1,26 @@
+from .distinct import DistinctValues
+from .models import Spreadsheet
+
+
+def test_distinct_values_from_column():
+    s = Spreadsheet(1, 6)
+    for row, value in enumerate(['apple', '2', 'apricot', None, 'apple', '2.50']):
+        s.set_value(row, 0, value)
+    values = DistinctValues.from_column(s.column(0))
+    assert values.values == ['2', '2.5', 'apple', 'apricot']
+    assert 'apple' in values and 2 in values and '' not in values
+    assert values.count('apple') == 2 and values.count('pear') == 0 and values.count(None) == 0
+    assert values.position('apricot') == 3 and values.position('b') == 4 and values.position(2.5) == 1
+
+
+def test_distinct_values_incremental():
+    values = DistinctValues(['apple', 'apple', 'pear'])
+    assert not values.replace('apple', 'pear')
+    assert values.values == ['apple', 'pear']
+    assert values.replace('apple', 'plum')
+    assert values.values == ['pear', 'plum']
+    assert not values.discard('missing')
+    assert not values.add(None)
+    assert values.discard('pear') is False
+    assert values.discard('pear') is True
+    assert values.values == ['plum']
@@ -0,0 +1,53 @@
+from .formulas import compile_formula, compile_formulas, is_formula
+from .models import Expression
+
+
+def test_is_formula():
+    assert is_formula('* C2 E2')
+    assert is_formula('=sum F2 F9')
+    assert is_formula('= A1')
+    assert not is_formula('Flight (Munich)')
+    assert not is_formula('150')
+    assert not is_formula(150)
+
+
+def test_compile_formula_resolves_references():
+    compiled = compile_formula('=* C2 E2')
+    assert compiled.operator == '*'
+    assert compiled.references == ((1, 2), (1, 4))
+    assert compiled.ranges == ()
+
+    compiled = compile_formula('sum F2 F9')
+    assert compiled.references == ()
+    assert compiled.ranges == ((1, 5, 8, 5),)
+
+
+def test_compile_formula_is_cached():
+    assert compile_formula('+ A1 B1') is compile_formula('+ A1 B1')
+    assert Expression('+ A1 B1')._compiled is Expression('+ A1 B1')._compiled
+
+
+def test_expression_calculate_value():
+    values = {(0, 0): '6', (0, 1): '3'}
+
+    def resolve(row, col):
+        return values.get((row, col))
+
+    assert Expression('+ A1 B1').calculate_value(resolve) == 9
+    assert Expression('- A1 B1').calculate_value(resolve) == 3
+    assert Expression('/ A1 B1').calculate_value(resolve) == 2
+    assert Expression('/ A1 C1').calculate_value(resolve) == 'nan'
+    assert Expression('= B1').calculate_value(resolve) == '3'
+    assert Expression('= B1').references == ((0, 1),)
+    assert Expression('+ A1 B1').calculate_value() == 0
+
+
+def test_compile_formula_sheet_references():
+    compiled = compile_formula('sum Data!A1:B2')
+    assert compiled.ranges == ()
+    assert compiled.external == (('Data', (0, 0, 1, 1)),)
+    compiled = compile_formula('+ Data!A2 B1')
+    assert compiled.references == ((0, 1),)
+    assert compiled.external == (('Data', (1, 0, 1, 0)),)
+    assert compiled.evaluate(lambda row, col, sheet=None: 5 if sheet else 2) == 7
+    assert compile_formulas(['+ Data!A2 B1'])[0].external == compiled.external
@@ -0,0 +1,168 @@
+import json
+from datetime import date
+
+import numpy as np
+import pytest
+
+from .exporters import CHUNK_ROWS, available_formats, column_kind, export, export_chunks
+from . import importers
+from .importers import read_chunks
+from .models import DATE, FLOAT, INTEGER, STRING, Spreadsheet
+from .recalc import RecalculationEngine
+from .storage import SUFFIX, open_workbook, save_workbook
+
+
+def test_read_csv_chunks(tmp_path):
+    path = tmp_path / 'table.csv'
+    path.write_text('a,b\n' + ''.join(f'{i},{i * 2}\n' for i in range(10000)))
+    chunks = list(read_chunks(str(path)))
+    assert len(chunks) > 1
+    assert sum(len(chunk) for chunk, _ in chunks) == 10001
+    assert chunks[-1][1] == 1.0
+
+
+def test_read_json_chunks(tmp_path):
+    path = tmp_path / 'table.json'
+    path.write_text('[{"a": 1, "b": "x"}, {"a": 2, "b": "y"}]')
+    (chunk, progress), = read_chunks(str(path))
+    assert chunk.values.tolist() == [['a', 'b'], [1, 'x'], [2, 'y']]
+    assert progress == 1.0
+
+
+@pytest.mark.parametrize('suffix', ['.json', '.jsonl'])
+def test_read_json_in_chunks(tmp_path, monkeypatch, suffix):
+    monkeypatch.setattr(importers, 'FIRST_CHUNK_ROWS', 4)
+    monkeypatch.setattr(importers, 'CHUNK_ROWS', 3)
+    records = [{'b': f'x{i}', 'a': i} if i % 2 else {'a': i, 'b': f'x{i}'} for i in range(10)]
+    path = tmp_path / f'table{suffix}'
+    if suffix == '.json':
+        path.write_text(json.dumps(records))
+    else:
+        path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+    chunks = list(read_chunks(str(path)))
+    assert len(chunks) > 2 and chunks[-1][1] == 1.0
+    rows = [row for chunk, _ in chunks for row in chunk.values.tolist()]
+    assert rows[0] == ['a', 'b'] and rows[1:] == [[i, f'x{i}'] for i in range(10)]
+    # past the header row the chunks keep the parsed column types
+    assert chunks[1][0].dtypes.iloc[0] == np.int64
+
+
+def test_spreadsheet_append_chunks(tmp_path):
+    path = tmp_path / 'table.csv'
+    path.write_text('sum A2 A5000,\n' + ''.join(f'{i},+ A{i + 2} A{i + 2}\n' for i in range(5000)))
+    s = Spreadsheet(0, 0)
+    engine = RecalculationEngine(s)
+    for chunk, _ in read_chunks(str(path)):
+        rows = s.shape[0]
+        s.append(Spreadsheet(data=chunk, sparse=False))
+        engine.load_rows(rows, s.shape[0] - 1)
+    assert s.shape == (5001, 2)
+    assert engine.value(0, 0) == sum(range(4999))
+    assert engine.value(5000, 1) == 2 * 4999
+
+    s.compact()
+    assert not s.sparse
+    assert s.get_value(4999, 0) == 4998
+
+
+def test_workbook_round_trip(tmp_path):
+    s = Spreadsheet(3, 4)
+    s.set_value(0, 0, '150')
+    s.set_value(1, 0, '2.5')
+    s.set_value(2, 0, date(2006, 6, 15))
+    s.set_value(0, 1, 'NOK')
+    s.set_value(1, 1, 'NOK')
+    s.set_value(2, 1, '* A1 A2')
+    s.set_value(3, 2, True)
+    path = str(tmp_path / ('book' + SUFFIX))
+    save_workbook(s, path)
+
+    opened = open_workbook(path)
+    assert opened.shape == (4, 3)
+    assert list(opened.iter_rows()) == list(s.iter_rows())
+    assert isinstance(opened.column(0).tags, np.memmap)
+    assert RecalculationEngine(opened).value(2, 1) == 375
+
+    opened.set_value(0, 0, '1')
+    assert open_workbook(path).get_value(0, 0) == 150
+
+
+def test_workbook_sparse_round_trip(tmp_path):
+    s = Spreadsheet(100, 20000, sparse=True)
+    s.set_value(15000, 99, 'far away')
+    s.set_value(3, 2, '7')
+    path = str(tmp_path / ('sparse' + SUFFIX))
+    save_workbook(s, path)
+
+    opened = open_workbook(path)
+    assert opened.sparse
+    assert list(opened.iter_items()) == [(3, 2, 7), (15000, 99, 'far away')]
+
+
+def computed_sheet(rows):
+    s = Spreadsheet(3, rows)
+    s.set_block(0, 0, np.arange(rows).reshape(-1, 1))
+    s.set_value(0, 1, date(2006, 6, 15))
+    for row in range(0, rows, 1000):
+        s.set_value(row, 2, f'* A{row + 1} A{row + 1}')
+    return s, RecalculationEngine(s)
+
+
+def test_export_csv_chunks(tmp_path):
+    s, engine = computed_sheet(CHUNK_ROWS + 10)
+    path = str(tmp_path / 'values.csv')
+    assert list(export_chunks(s, path, engine)) == [CHUNK_ROWS / s.shape[0], 1.0]
+    lines = open(path).read().splitlines()
+    assert len(lines) == s.shape[0]
+    assert lines[0] == '0,2006-06-15,0'
+    assert lines[3000] == '3000,,9000000'
+    assert lines[-1] == f'{CHUNK_ROWS + 9},,'
+
+
+def test_engine_is_read_only_while_exported():
+    s, engine = computed_sheet(10)
+    engine.lock()
+    assert engine.read_only
+    writes = [lambda: engine.set_value(0, 0, 7), lambda: engine.set_block(0, 0, [[1]]), lambda: engine.load_rows(0, 9)]
+    for write in writes:
+        with pytest.raises(RuntimeError):
+            write()
+    assert s.get_value(0, 0) == 0 and engine.value(0, 2) == 0
+    engine.unlock()
+    engine.set_value(0, 0, 7)
+    assert not engine.read_only and engine.value(0, 2) == 49
+    assert '.csv' in available_formats()
+
+
+def test_export_column_kinds():
+    s, engine = computed_sheet(10)
+    s.set_value(1, 1, date(2006, 6, 16))
+    assert column_kind(s.column(0)) == INTEGER
+    assert column_kind(s.column(1)) == DATE
+    assert column_kind(s.column(2), {INTEGER}) == INTEGER
+    assert column_kind(s.column(2), {INTEGER, FLOAT}) == FLOAT
+    assert column_kind(s.column(2), {STRING}) == STRING
+    with pytest.raises(ValueError):
+        export(s, 'values.txt', engine)
+
+
+def test_export_xlsx(tmp_path):
+    pytest.importorskip('openpyxl')
+    s, engine = computed_sheet(2001)
+    path = str(tmp_path / 'values.xlsx')
+    export(s, path, engine)
+    (chunk, _), = read_chunks(path)
+    assert chunk.shape == (2001, 3)
+    assert chunk.iloc[2000, 2] == 4000000
+
+
+def test_export_parquet(tmp_path):
+    pd = pytest.importorskip('pandas')
+    pytest.importorskip('pyarrow')
+    s, engine = computed_sheet(2001)
+    path = str(tmp_path / 'values.parquet')
+    export(s, path, engine)
+    data = pd.read_parquet(path)
+    assert list(data.columns) == ['A', 'B', 'C']
+    assert data['A'].tolist() == list(range(2001))
+    assert data['C'].iloc[1000] == 1000000
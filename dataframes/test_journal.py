@@ -0,0 +1,77 @@
+import numpy as np
+
+from .journal import Journal
+from .models import Expression, SparseColumn, Spreadsheet
+from .recalc import RecalculationEngine
+
+
+def test_undo_redo_values_and_formulas():
+    engine = RecalculationEngine(Spreadsheet(3, 3))
+    journal = Journal(engine)
+    journal.set_values({(0, 0): '1', (1, 0): '2', (2, 0): '=sum A1 A2'})
+    journal.set_values({(0, 0): '5', (1, 0): '2'})
+    assert engine.value(2, 0) == 7
+    assert journal.nbytes > 0
+
+    assert (0, 0) in journal.undo() and engine.value(2, 0) == 3
+    assert engine.spreadsheet.get_value(0, 0) == 1
+    journal.undo()
+    assert engine.spreadsheet.get_value(2, 0) is None and engine.value(0, 0) is None
+    assert not journal.can_undo and journal.undo() == set()
+    journal.redo()
+    assert engine.spreadsheet.get_value(2, 0) == Expression('=sum A1 A2')
+    journal.redo()
+    assert engine.value(2, 0) == 7 and not journal.can_redo
+
+    journal.undo()
+    journal.set_values({(1, 1): 'x'})
+    assert not journal.can_redo
+
+
+def test_undo_block_paste():
+    spreadsheet = Spreadsheet(3, 100_000)
+    engine = RecalculationEngine(spreadsheet)
+    engine.set_value(0, 2, '=sum A1 B100000')
+    journal = Journal(engine)
+    journal.set_block(0, 0, np.ones((100_000, 2)))
+    assert engine.value(0, 2) == 200_000
+    # a numeric paste over empty cells is kept as typed arrays, not as python values
+    assert journal.nbytes < 100_000 * 2 * 20
+
+    journal.set_block(10, 0, [['a', '=sum A1 A2'], [None, 7]])
+    assert engine.value(10, 1) == 2
+    journal.undo()
+    assert spreadsheet.get_value(10, 0) == 1.0 and spreadsheet.get_value(11, 1) == 1.0
+    journal.undo()
+    assert engine.value(0, 2) == 0 and spreadsheet.get_value(99_999, 1) is None
+    journal.redo()
+    assert engine.value(0, 2) == 200_000
+
+
+def test_oldest_steps_are_evicted_and_styles_are_applied():
+    engine = RecalculationEngine(Spreadsheet(1, 10))
+    applied = []
+    journal = Journal(engine, max_bytes=200, apply_style=lambda role, styles: applied.append((role, styles)))
+    for row in range(10):
+        journal.set_values({(row, 0): row + 1})
+    assert journal.nbytes <= 200 and journal.can_undo
+    while journal.can_undo:
+        journal.undo()
+    assert engine.spreadsheet.get_value(0, 0) == 1 and engine.spreadsheet.get_value(9, 0) is None
+
+    journal.record_styles('background', {(0, 0): ('white', 'red'), (1, 0): (None, 'red')})
+    journal.undo()
+    journal.redo()
+    assert applied == [('background', {(0, 0): 'white', (1, 0): None}), ('background', {(0, 0): 'red', (1, 0): 'red'})]
+
+    journal.set_block(0, 0, [['x'] * 1] * 10)
+    assert not journal.can_undo and journal.nbytes == 0
+
+
+def test_column_copies():
+    column = SparseColumn(5000, block_rows=1024)
+    column.set_values(1000, [1, 2.5, 'a', None])
+    copy = column.copy(999, 1005)
+    assert copy.to_list() == [None, 1, 2.5, 'a', None, None]
+    assert column.copy(0, 1000).to_values().dtype == np.float64
+    assert copy.copy(1, 2).to_values().tolist() == [1]
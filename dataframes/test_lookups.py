@@ -0,0 +1,69 @@
+from datetime import date
+
+from .lookups import ColumnIndex
+from .models import Expression, Spreadsheet
+from .recalc import RecalculationEngine
+
+
+def test_column_index_exact_and_nearest():
+    index = ColumnIndex(['Apple', 30, None, 'pear', 10, 'apple', '20', date(2024, 1, 5)])
+    assert index.find('APPLE') == 0
+    assert index.find(20) == 6
+    assert index.find('plum') == -1
+    assert index.find(None) == -1
+    assert index.find_nearest(25, -1) == 6
+    assert index.find_nearest(25, 1) == 1
+    assert index.find_nearest(5, -1) == -1
+    assert index.find_nearest('b', -1) == 0
+    assert index.find_nearest(date(2024, 1, 1), 1) == 7
+
+    index.update(0, 'plum')
+    assert index.find('apple') == 5
+    index.update(5, None)
+    assert index.find('apple') == -1
+    assert index.find_nearest(25, -1) == 6
+    index.update(6, 40)
+    assert index.find_nearest(25, -1) == 4
+
+
+def test_expression_lookups_without_engine():
+    values = {(0, 0): 'a', (1, 0): 'b', (2, 0): 'c', (0, 1): 1, (1, 1): 2, (2, 1): 3, (0, 3): 'B'}
+
+    def resolve(row, col):
+        return values.get((row, col))
+
+    assert Expression('vlookup D1 A1:B3 2').calculate_value(resolve) == 2
+    assert Expression('vlookup D1 A1:B3 3').calculate_value(resolve) == 'nan'
+    assert Expression('match c A1:A3').calculate_value(resolve) == 3
+    assert Expression('xlookup 2.5 B1:B3 A1:A3 1').calculate_value(resolve) == 'c'
+    assert Expression('xlookup z A1:A3 B1:B3').calculate_value(resolve) == 'nan'
+    assert Expression('match 2.5 B1:B3 1').references == ()
+    assert Expression('vlookup D1 A1:B3 2').references == ((0, 3),)
+    assert Expression('vlookup D1 A1:B3 2').ranges == ((0, 0, 2, 1),)
+
+
+def test_engine_lookups_follow_edits():
+    s = Spreadsheet(5, 4)
+    for row, (key, value) in enumerate([('x', 10), ('y', 20), ('z', 30)]):
+        s.set_value(row, 0, key)
+        s.set_value(row, 1, value)
+    s.set_value(0, 2, 'y')
+    s.set_value(0, 3, 'vlookup C1 A1:B3 2')
+    s.set_value(1, 3, 'match 25 B1:B3 1')
+    s.set_value(2, 3, 'xlookup D1 B1:B3 A1:A3')
+    s.set_value(3, 0, '= C1')
+    s.set_value(3, 1, 40)
+    s.set_value(2, 4, 'xlookup w A1:A4 B1:B4')
+    engine = RecalculationEngine(s)
+    assert [engine.value(row, 3) for row in range(3)] == [20, 2, 'y']
+    assert engine.value(2, 4) == 'nan'
+
+    assert engine.set_value(0, 2, 'z') >= {(0, 3), (2, 3)}
+    assert [engine.value(row, 3) for row in range(3)] == [30, 2, 'z']
+    engine.set_value(2, 0, 'Y')
+    assert engine.value(0, 3) == 'nan'
+    engine.set_value(1, 1, 26)
+    assert engine.value(1, 3) == 1
+    # the formula in the key column updates the index before the lookup reads it
+    engine.set_value(0, 2, 'w')
+    assert engine.value(2, 4) == 40
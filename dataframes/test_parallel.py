@@ -0,0 +1,64 @@
+from . import parallel, recalc
+from .models import SparseColumn, Spreadsheet
+from .parallel import recalculate_parallel
+from .recalc import RecalculationEngine
+
+
+def make_engine(blocks: int, rows: int) -> RecalculationEngine:
+    s = Spreadsheet(blocks * 3, rows + 1)
+    for block in range(blocks):
+        col = block * 3
+        name, result = chr(ord('A') + col), chr(ord('A') + col + 1)
+        for row in range(rows):
+            s.set_value(row, col, str(row))
+            s.set_value(row, col + 1, '+ %s%d %s%d' % (name, row + 1, name, row + 1))
+        s.set_value(rows, col + 1, 'sum %s1 %s%d' % (result, result, rows))
+        s.set_value(rows, col + 2, '= %s%d' % (name, rows + 1))
+    s.set_value(rows, 0, 'label')
+    return RecalculationEngine(s)
+
+
+def test_components():
+    engine = make_engine(3, 10)
+    components = engine.components()
+    assert len(components) == 3 * 2
+    assert sorted(len(component) for component in components)[-1] == 11
+
+
+def test_recalculate_parallel(monkeypatch):
+    monkeypatch.setattr(parallel, 'PARALLEL_MIN_FORMULAS', 0)
+    engine = make_engine(3, 50)
+    expected = {cell: engine.value(*cell) for cell in engine._formulas}
+    engine._values.clear()
+
+    changed = recalculate_parallel(engine, max_workers=2)
+    assert changed == set(expected)
+    assert {cell: engine.value(*cell) for cell in engine._formulas} == expected
+    assert engine.value(50, 2) == 'label'
+    assert engine.value(50, 1) == 2 * sum(range(50))
+
+
+def test_full_recalculation_uses_workers(monkeypatch):
+    monkeypatch.setattr(recalc, 'PARALLEL_MIN_FORMULAS', 0)
+    monkeypatch.setattr(parallel, 'PARALLEL_MIN_FORMULAS', 0)
+    calls = []
+    monkeypatch.setattr(parallel, 'recalculate_parallel', lambda engine, workers: calls.append(workers) or set())
+    RecalculationEngine(Spreadsheet(1, 1), max_workers=2)
+    RecalculationEngine(Spreadsheet(1, 1), max_workers=1)
+    assert calls == [2]
+
+
+def test_recalculate_parallel_sparse_and_external(monkeypatch):
+    monkeypatch.setattr(parallel, 'PARALLEL_MIN_FORMULAS', 0)
+    dense = make_engine(2, 3000).spreadsheet
+    columns = [SparseColumn.from_column(dense.column(col), block_rows=512) for col in range(dense.shape[1])]
+    engine = RecalculationEngine(Spreadsheet.from_columns(columns, dense.shape[0]), max_workers=1)
+    expected = {cell: engine.value(*cell) for cell in engine.formula_cells()}
+    engine._values.clear()
+    recalculate_parallel(engine, max_workers=2)
+    assert {cell: engine.value(*cell) for cell in engine.formula_cells()} == expected
+
+    # references to another sheet are only resolved by the engine that owns the workbook
+    engine.set_value(0, 2, '= Other!A1')
+    monkeypatch.setattr(engine, 'recalculate_serial', lambda: {'serial'})
+    assert recalculate_parallel(engine, max_workers=2) == {'serial'}
@@ -0,0 +1,45 @@
+import json
+
+from . import profiling
+from .profiling import Profiler, profiler
+from .test_recalc import make_engine
+
+
+def test_profiler_disabled_records_nothing():
+    p = Profiler()
+    with p.span('recalculate', 'engine', dirty=1):
+        pass
+    assert not p.events
+
+
+def test_profiler_engine(tmp_path):
+    profiler.reset()
+    profiler.enable()
+    try:
+        engine = make_engine()
+        engine.set_value(1, 0, '10')
+    finally:
+        profiler.enable(False)
+
+    summary = profiler.summary()
+    assert summary['spans']['recalculate']['count'] == 2
+    assert summary['counters']['formulas evaluated'] == 6
+    assert {formula['cell'] for formula in summary['formulas']} == {'B1', 'B2', 'B4'}
+    assert profiler.last('recalculate')['args']['changed'] == 3
+
+    profiler.save(str(tmp_path / 'trace.json'), chrome_trace=True)
+    with open(tmp_path / 'trace.json') as file:
+        trace = json.load(file)
+    spans = [event for event in trace['traceEvents'] if event['ph'] == 'X']
+    assert [event['name'] for event in spans] == ['recalculate', 'recalculate']
+    assert all(event['dur'] >= 0 for event in spans)
+    profiler.reset()
+
+
+def test_profiler_formulas_are_capped(monkeypatch):
+    monkeypatch.setattr(profiling, 'MAX_FORMULAS', 10)
+    p = Profiler()
+    for row in range(100):
+        p.record_formula((row, 0), 'formula', seconds=row)
+    assert len(p.formulas) <= 10
+    assert [formula['cell'] for formula in p.summary()['formulas'][:2]] == ['A100', 'A99']
@@ -0,0 +1,76 @@
+from .models import Spreadsheet
+from .recalc import RecalculationEngine
+
+
+def make_engine():
+    s = Spreadsheet(3, 4)
+    s.set_value(0, 0, '2')
+    s.set_value(1, 0, '3')
+    s.set_value(0, 1, '* A1 A2')
+    s.set_value(1, 1, '+ B1 A1')
+    s.set_value(3, 1, 'sum B1 B3')
+    return RecalculationEngine(s)
+
+
+def test_engine_initial_values():
+    engine = make_engine()
+    assert engine.value(0, 1) == 6
+    assert engine.value(1, 1) == 8
+    assert engine.value(3, 1) == 14
+    assert engine.value(0, 0) == 2
+
+
+def test_engine_recalculates_only_dependents():
+    engine = make_engine()
+    changed = engine.set_value(1, 0, '10')
+    assert changed == {(1, 0), (0, 1), (1, 1), (3, 1)}
+    assert engine.value(3, 1) == 42
+
+    changed = engine.set_value(2, 2, 'text')
+    assert changed == {(2, 2)}
+
+
+def test_engine_replaces_formula():
+    engine = make_engine()
+    engine.set_value(0, 1, '- A1 A2')
+    assert engine.value(1, 1) == 1
+    engine.set_value(0, 1, None)
+    assert engine.formula(0, 1) is None
+    assert engine.value(1, 1) == 2
+    assert engine.value(3, 1) == 2
+
+
+def test_engine_cycle():
+    engine = make_engine()
+    engine.set_value(0, 0, '+ B2 A2')
+    assert engine.value(0, 0) is None
+    assert engine.value(0, 1) is None
+    assert engine.value(1, 1) is None
+
+
+def test_engine_set_values_and_block():
+    engine = make_engine()
+    changed = engine.set_values({(0, 0): '1', (1, 0): '1', (2, 2): None})
+    assert changed == {(0, 0), (1, 0), (0, 1), (1, 1), (3, 1)}
+    assert engine.value(3, 1) == 3
+
+    changed = engine.set_block(0, 0, [['5', '+ A1 A1'], ['6', None]])
+    assert {(0, 0), (1, 0), (0, 1), (1, 1), (3, 1)} <= changed
+    assert engine.value(0, 1) == 10
+    assert engine.formula(1, 1) is None
+    assert engine.value(3, 1) == 10
+
+
+def test_engine_versions():
+    engine = make_engine()
+    loaded = engine.version(3, 1)
+    assert engine.version(0, 0) == engine.version(2, 2) == loaded
+
+    engine.set_value(1, 0, '10')
+    assert engine.version(1, 0) > loaded
+    assert engine.version(3, 1) > loaded
+    assert engine.version(0, 0) == engine.version(2, 2) == loaded
+
+    version = engine.version(3, 1)
+    engine.set_value(2, 2, 'text')
+    assert engine.version(3, 1) == version
@@ -1,5 +1,11 @@
 import string
-from .models import Spreadsheet, Coordinates
+from datetime import date
+
+import numpy as np
+from pandas import DataFrame
+
+from .models import Spreadsheet, Coordinates, CoordinatesRange, Expression, DATE, EMPTY, FLOAT, FORMULA, INTEGER, STRING
+from .models import parse_value
 
 
 def test_spreadsheet_create():
@@ -12,3 +18,109 @@ def test_spreadsheet_shape():
     s = Spreadsheet(5, 5)
     assert s.shape[0] == 5
     assert s.shape[1] == 5
+
+
+def test_spreadsheet_iter_cells():
+    s = Spreadsheet(2, 3)
+    s[Coordinates('B3')] = 'value'
+    cells = s.iter_cells()
+    assert not isinstance(cells, list)
+    cells = list(cells)
+    assert len(cells) == 6
+    assert cells[-1].coordinates == Coordinates(x=1, y=2)
+    assert cells[-1].value == 'value'
+    rows = list(s.iter_cells(row_major=True))
+    assert [(c.coordinates.x, c.coordinates.y) for c in rows[:3]] == [(0, 0), (1, 0), (0, 1)]
+
+
+def test_spreadsheet_typed_values():
+    s = Spreadsheet(1, 6)
+    s.set_value(0, 0, '150')
+    s.set_value(1, 0, '2.5')
+    s.set_value(2, 0, 'NOK')
+    s.set_value(3, 0, '* C2 E2')
+    s.set_value(4, 0, date(2006, 6, 15))
+    assert s.get_value(0, 0) == 150
+    assert s.get_value(1, 0) == 2.5
+    assert s.get_value(2, 0) == 'NOK'
+    assert isinstance(s.get_value(3, 0), Expression)
+    assert s.get_value(4, 0) == date(2006, 6, 15)
+    assert s.get_value(5, 0) is None
+
+    column = s.column(0)
+    assert list(column.tags) == [INTEGER, FLOAT, STRING, FORMULA, DATE, EMPTY]
+    assert column.to_list() == [150, 2.5, 'NOK', Expression('* C2 E2'), date(2006, 6, 15), None]
+
+    s.set_value(2, 0, None)
+    assert s.get_value(2, 0) is None
+
+
+def test_parse_value_strict_numbers():
+    for text, value in [('-12', -12), ('+7', 7), ('1.', 1.0), ('.5', 0.5), ('1e3', 1000.0), ('-2.5E-1', -0.25)]:
+        assert parse_value(text) == value and type(parse_value(text)) is type(value)
+    for text in ['12_34', ' 5 ', '5\n', '1_0.5', '\u0661\u0662', 'inf', 'nan', '1e999', '0x10', '1e', '.', 'e5']:
+        assert parse_value(text) == text
+
+
+def test_spreadsheet_from_dataframe():
+    data = DataFrame({'a': [1, 2], 'b': [0.5, None], 'c': ['x', None]})
+    s = Spreadsheet(data=data)
+    assert s.shape == (2, 3)
+    assert s.column(0).tags.tolist() == [INTEGER, INTEGER]
+    assert list(s.iter_rows()) == [(1, 0.5, 'x'), (2, None, None)]
+    assert s.numeric_block(0, 0, 1, 1).tolist()[0] == [1.0, 0.5]
+
+
+def test_spreadsheet_sparse():
+    s = Spreadsheet(1000, 100000)
+    assert s.sparse
+    assert s.shape == (100000, 1000)
+    assert s[Coordinates(x=999, y=99999)].value is None
+
+    s[Coordinates(x=999, y=99999)] = '5'
+    s[Coordinates(x=3, y=2048)] = 'text'
+    s[Coordinates(x=3, y=10)] = '* A1 B1'
+    assert s.get_value(99999, 999) == 5
+    assert list(s.iter_items()) == [(10, 3, Expression('* A1 B1')), (2048, 3, 'text'), (99999, 999, 5)]
+    assert list(s.iter_items(FORMULA)) == [(10, 3, Expression('* A1 B1'))]
+    assert s.numeric_block(99990, 999, 99999, 999)[-1, 0] == 5
+    assert s.column(3).to_list(2047, 2050) == [None, 'text', None]
+
+    s[Coordinates(x=3, y=2048)] = None
+    assert list(s.iter_items(STRING)) == []
+
+
+def test_spreadsheet_dense_by_default():
+    assert not Spreadsheet(5, 5).sparse
+    assert Spreadsheet(5, 5, sparse=True).sparse
+
+
+def test_set_block():
+    s = Spreadsheet(4, 5)
+    last = s.set_block(1, 1, [['1', 'text'], ['2.5', None], ['+ B2 B3']])
+    assert last == (3, 2)
+    assert [s.get_value(row, 1) for row in range(5)] == [None, 1, 2.5, Expression('+ B2 B3'), None]
+    assert s.get_value(1, 2) == 'text'
+
+    s.set_block(0, 3, np.array([[1.5], [np.nan], [3.0]]))
+    assert [s.get_value(row, 3) for row in range(4)] == [1.5, None, 3.0, None]
+
+    s[CoordinatesRange(Coordinates('A1'), Coordinates('B3'))] = [['x', 'y'], ['z', 'w'], ['ignored']]
+    assert [s.get_value(row, 0) for row in range(4)] == ['x', 'z', None, None]
+
+
+def test_set_block_sparse():
+    s = Spreadsheet(2, 5000, sparse=True)
+    s.set_block(1000, 1, np.arange(100).reshape(-1, 1))
+    assert s.sparse
+    assert s.get_value(1023, 1) == 23
+    assert s.get_value(1099, 1) == 99
+    s.set_block(1000, 1, [[None]] * 100)
+    assert not s.column(1)._blocks
+
+
+def test_spreadsheet_dates_from_dataframe():
+    s = Spreadsheet(data=DataFrame({0: ['Date', '15/6/2006', None, '1/12/2020'], 1: ['Name', 'a', 'b', '1/2/3']}))
+    assert s.column(0).tags.tolist() == [STRING, DATE, EMPTY, DATE]
+    assert s.column(0).to_list() == ['Date', date(2006, 6, 15), None, date(2020, 12, 1)]
+    assert s.column(1).to_list() == ['Name', 'a', 'b', '1/2/3']
@@ -0,0 +1,87 @@
+import os
+
+from .models import Spreadsheet
+from .workbook import Workbook
+
+
+def make_workbook(tmp_path, **kwargs):
+    loads = []
+
+    def loader(name, rows):
+        def load():
+            loads.append(name)
+            return Spreadsheet(data=rows)
+        return load
+
+    workbook = Workbook({
+        'Data': loader('Data', [[1, 2], [3, 4]]),
+        'Report': loader('Report', [['sum Data!A1:B2', '+ Data!A2 B1'], [None, 10]]),
+        'Other': loader('Other', [['= Report!A1']]),
+    }, spill_dir=str(tmp_path), **kwargs)
+    return workbook, loads
+
+
+def test_workbook_loads_sheets_on_demand(tmp_path):
+    workbook, loads = make_workbook(tmp_path)
+    assert workbook.sheet_names == ['Data', 'Report', 'Other']
+    assert loads == []
+    assert workbook.engine('Report').value(0, 0) == 10
+    assert loads == ['Report', 'Data']
+    assert workbook.engine('Report').value(0, 1) == 3
+    assert workbook.value('Missing', 0, 0) is None
+
+
+def test_workbook_propagates_changes(tmp_path):
+    workbook, _ = make_workbook(tmp_path)
+    assert workbook.engine('Other').value(0, 0) == 10
+    changed = workbook.set_value('Data', 0, 0, '11')
+    assert changed == {'Data': {(0, 0)}, 'Report': {(0, 0)}, 'Other': {(0, 0)}}
+    assert workbook.engine('Other').value(0, 0) == 20
+
+
+def test_workbook_evicts_to_disk(tmp_path):
+    workbook, loads = make_workbook(tmp_path, max_bytes=1)
+    workbook.pin('Report')
+    assert workbook.engine('Report').value(0, 0) == 10
+    assert workbook.loaded == ['Report']
+    workbook.set_value('Data', 1, 1, '14')
+    assert workbook.loaded == ['Report', 'Data']
+    assert workbook.engine('Report').value(0, 0) == 20
+
+    workbook.pin('Report', False)
+    assert workbook.evict_idle(0) == ['Data', 'Report']
+    assert workbook.value('Data', 1, 1) == 14
+    assert workbook.value('Report', 0, 0) == 20
+    assert workbook.loaded == ['Report']
+    # evicted sheets come back from their spill files, not from the source
+    assert loads == ['Report', 'Data']
+
+    spilled = [sheet.spilled for sheet in workbook.sheets.values() if sheet.spilled]
+    assert spilled and all(os.path.exists(filename) for filename in spilled)
+    workbook.close()
+    assert not any(os.path.exists(filename) for filename in spilled)
+
+
+def test_workbook_evicts_by_size(tmp_path):
+    workbook, _ = make_workbook(tmp_path)
+    workbook.engine('Report')
+    size = workbook.loaded_bytes
+    assert size == workbook.sheets['Report'].nbytes + workbook.sheets['Data'].nbytes > 0
+    # the sheet loaded next pushes out the least recently used ones until the budget holds
+    workbook.max_bytes = size
+    workbook.engine('Other')
+    assert workbook.loaded[-1] == 'Other' and 'Data' not in workbook.loaded
+    assert workbook.loaded_bytes <= size
+
+    # recalculated values are not written to the spill file, only new cells are
+    workbook.evict('Report')
+    spilled = workbook.sheets['Report'].spilled
+    workbook.engine('Report')
+    workbook.set_value('Data', 0, 0, '5')
+    assert workbook.engine('Report').value(0, 0) == 14
+    workbook.evict('Report')
+    assert workbook.sheets['Report'].spilled == spilled
+    workbook.engine('Report').set_value(1, 0, 1)
+    workbook.evict('Report')
+    assert workbook.sheets['Report'].spilled != spilled
+    workbook.close()
@@ -0,0 +1,233 @@
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from typing import Callable, Iterator
+
+import numpy as np
+
+from .addresses import Cell
+from .criteria import CriteriaColumn
+from .lookups import ColumnIndex
+from .models import Spreadsheet
+from .profiling import profiler
+from .recalc import RecalculationEngine
+from .storage import SUFFIX, open_workbook, save_workbook
+
+
+# the cells of the loaded sheets, the least recently used sheets are evicted above it
+MAX_LOADED_BYTES = 1 << 30
+
+
+def load_sheet(filename: str, sheet_name: str | None = None) -> Spreadsheet:
+    if filename.endswith(SUFFIX):
+        return open_workbook(filename)
+    # pandas is only needed for text and excel sources
+    from .importers import read_chunks, read_xlsx_chunks
+
+    chunks = read_xlsx_chunks(filename, sheet_name) if sheet_name else read_chunks(filename)
+    with profiler.span('import', 'import', filename=filename, sheet=sheet_name, rows=0) as args:
+        spreadsheet = Spreadsheet(0, 0)
+        for chunk, _ in chunks:
+            spreadsheet.append(Spreadsheet(data=chunk, sparse=False))
+            args['rows'] += len(chunk)
+        spreadsheet.compact()
+    return spreadsheet
+
+
+class Sheet():
+    def __init__(self, name: str, loader: Callable[[], Spreadsheet]):
+        self.name = name
+        self.loader = loader
+        self.spreadsheet: Spreadsheet | None = None
+        self.engine: RecalculationEngine | None = None
+        # an evicted sheet is reopened from its spill file instead of being parsed again
+        self.spilled: str | None = None
+        self.saved: int | None = None
+        self._measured: tuple[RecalculationEngine, int] | None = None
+        self._nbytes = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self.engine is not None
+
+    @property
+    def nbytes(self) -> int:
+        # measured again only after a write to the stored cells
+        if not self.loaded:
+            return 0
+        if self._measured != (self.engine, self.engine.revision):
+            self._measured = (self.engine, self.engine.revision)
+            self._nbytes = self.spreadsheet.nbytes
+        return self._nbytes
+
+
+class Workbook():
+    def __init__(self, loaders: dict[str, Callable[[], Spreadsheet]], max_bytes: int = MAX_LOADED_BYTES,
+                 spill_dir: str | None = None):
+        self.sheets = {name: Sheet(name, loader) for name, loader in loaders.items()}
+        self.max_bytes = max_bytes
+        self._spill_dir = spill_dir
+        self._temporary: str | None = None
+        self._used: OrderedDict[str, None] = OrderedDict()
+        self._loading: set[str] = set()
+        self._pinned: set[str] = set()
+
+    @classmethod
+    def open(cls, filename: str, **kwargs) -> 'Workbook':
+        if filename.endswith('.xlsx'):
+            from .importers import xlsx_sheet_names
+
+            names = xlsx_sheet_names(filename)
+            return cls({name: lambda name=name: load_sheet(filename, name) for name in names}, **kwargs)
+        name = os.path.splitext(os.path.basename(filename))[0]
+        return cls({name: lambda: load_sheet(filename)}, **kwargs)
+
+    @property
+    def sheet_names(self) -> list[str]:
+        return list(self.sheets)
+
+    @property
+    def loaded(self) -> list[str]:
+        return list(self._used)
+
+    @property
+    def loaded_bytes(self) -> int:
+        return sum(self.sheets[name].nbytes for name in self._used)
+
+    def __len__(self) -> int:
+        return len(self.sheets)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.sheets
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.sheets)
+
+    def __enter__(self) -> 'Workbook':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+    def spreadsheet(self, name: str) -> Spreadsheet:
+        return self.sheet(name).spreadsheet
+
+    def engine(self, name: str) -> RecalculationEngine:
+        return self.sheet(name).engine
+
+    def sheet(self, name: str) -> Sheet:
+        sheet = self.sheets[name]
+        if name in self._used:
+            self._used.move_to_end(name)
+        elif name not in self._loading:
+            self._load(sheet)
+        return sheet
+
+    def value(self, name: str, row: int, col: int):
+        # formulas of a sheet that is still loading see its cells as empty, this breaks cycles between sheets
+        if name not in self.sheets or name in self._loading:
+            return None
+        engine = self.sheet(name).engine
+        rows, cols = engine.spreadsheet.shape
+        if row >= rows or col >= cols:
+            return None
+        return engine.value(row, col)
+
+    def numeric_block(self, name: str, first_row: int, first_col: int, last_row: int, last_col: int) -> np.ndarray:
+        if name not in self.sheets or name in self._loading:
+            return np.empty((0, 0))
+        return self.sheet(name).engine.numeric_block(first_row, first_col, last_row, last_col)
+
+    def lookup_index(self, name: str, first_row: int, col: int, last_row: int) -> ColumnIndex | None:
+        if name not in self.sheets or name in self._loading:
+            return None
+        return self.sheet(name).engine.lookup_index(first_row, col, last_row)
+
+    def criteria_column(self, name: str, first_row: int, col: int, last_row: int) -> CriteriaColumn | None:
+        if name not in self.sheets or name in self._loading:
+            return None
+        return self.sheet(name).engine.criteria_column(first_row, col, last_row)
+
+    def set_value(self, name: str, row: int, col: int, value) -> dict[str, set[Cell]]:
+        return self.propagate(name, self.engine(name).set_value(row, col, value))
+
+    def propagate(self, name: str, cells: set[Cell]) -> dict[str, set[Cell]]:
+        # refresh the loaded sheets reading the changed cells, sheets that are not loaded compute on load
+        changed = {name: cells}
+        pending = [name]
+        while pending:
+            source = pending.pop()
+            for sheet in self.sheets.values():
+                if sheet.name in changed or not sheet.loaded:
+                    continue
+                cells = sheet.engine.recalculate_external(source, changed[source])
+                if cells:
+                    changed[sheet.name] = cells
+                    pending.append(sheet.name)
+        return changed
+
+    def pin(self, name: str, pinned: bool = True):
+        if pinned:
+            self._pinned.add(name)
+        else:
+            self._pinned.discard(name)
+
+    def evict(self, name: str) -> bool:
+        sheet = self.sheets[name]
+        if not sheet.loaded or name in self._pinned or name in self._loading:
+            return False
+        if sheet.spilled is None or sheet.saved != sheet.engine.revision:
+            # a new file every time, the old one may still be mapped by the spreadsheet being saved
+            handle, filename = tempfile.mkstemp(suffix=SUFFIX, dir=self._spill_directory())
+            os.close(handle)
+            save_workbook(sheet.spreadsheet, filename)
+            if sheet.spilled is not None:
+                os.remove(sheet.spilled)
+            sheet.spilled = filename
+        sheet.spreadsheet = sheet.engine = None
+        del self._used[name]
+        return True
+
+    def evict_idle(self, max_bytes: int | None = None, current: str | None = None) -> list[str]:
+        # least recently used first, pinned sheets and the current one stay
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        evicted = []
+        for name in list(self._used):
+            if self.loaded_bytes <= max_bytes:
+                break
+            if name != current and self.evict(name):
+                evicted.append(name)
+        return evicted
+
+    def close(self):
+        for sheet in self.sheets.values():
+            sheet.spreadsheet = sheet.engine = None
+            if sheet.spilled is not None and os.path.exists(sheet.spilled):
+                os.remove(sheet.spilled)
+            sheet.spilled = None
+        self._used.clear()
+        if self._temporary is not None:
+            shutil.rmtree(self._temporary, ignore_errors=True)
+            self._temporary = None
+
+    def _spill_directory(self) -> str:
+        if self._spill_dir is not None:
+            return self._spill_dir
+        if self._temporary is None:
+            self._temporary = tempfile.mkdtemp(prefix='workbook-')
+        return self._temporary
+
+    def _load(self, sheet: Sheet):
+        self._loading.add(sheet.name)
+        try:
+            with profiler.span('load sheet', 'workbook', sheet=sheet.name, spilled=sheet.spilled is not None):
+                spreadsheet = open_workbook(sheet.spilled) if sheet.spilled else sheet.loader()
+                engine = RecalculationEngine(spreadsheet, workbook=self)
+        finally:
+            self._loading.discard(sheet.name)
+        sheet.spreadsheet, sheet.engine = spreadsheet, engine
+        sheet.saved = engine.revision if sheet.spilled else None
+        self._used[sheet.name] = None
+        self.evict_idle(current=sheet.name)
@@ -1,29 +1,40 @@
 #!/usr/bin/env python
 
-from pandas import DataFrame, read_excel, read_csv, read_json
-
-from PyQt5.QtCore import QDate, Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QColor, QIcon, QKeySequence, QPixmap
 from PyQt5.QtWidgets import (
     QAction, QActionGroup, QApplication, QFileDialog,
-    QLabel, QLineEdit, QMainWindow, QToolBar, QMessageBox
+    QLabel, QLineEdit, QMainWindow, QToolBar, QMessageBox, QProgressDialog
 )
 from PyQt5.QtPrintSupport import QPrinter, QPrintPreviewDialog
 
 from components.TableWidget import TableWidget
+from components.TableView import TableView
+from components.WorkbookView import WorkbookView
+from components.ExportWorker import ExportWorker
+from components.ImportWorker import ImportWorker
 from components.InputDialog import InputDialog
 from components.AboutWindow import show_about_window
-from visuals.spreadsheetitem import SpreadSheetItem
-from visuals.printview import PrintView
+from components.DiagnosticsDialog import DiagnosticsDialog
+from visuals.spreadsheetitem import DATE_FORMATS, SpreadSheetItem
+from visuals.printview import PrintView, export_pdf
+from dataframes.exporters import available_formats
+from dataframes.importers import SUPPORTED_FORMATS
+from dataframes.models import Spreadsheet
+from dataframes.profiling import profiler
+from dataframes.storage import SUFFIX, open_workbook, save_workbook
+from dataframes.workbook import Workbook
 from util import decode_pos, encode_pos
 
 
 class SpreadSheet(QMainWindow):
 
-    dateFormats = ['dd/M/yyyy', 'yyyy/M/dd', 'dd.MM.yyyy']
+    dateFormats = DATE_FORMATS
 
     currentDateFormat = dateFormats[0]
 
+    exportFormats = {'.csv': 'CSV', '.xlsx': 'Excel', '.parquet': 'Parquet'}
+
     def __init__(self, rows, cols, parent=None):
         super(SpreadSheet, self).__init__(parent)
 
@@ -41,12 +52,21 @@ class SpreadSheet(QMainWindow):
         self.createActions()
         self.table.updateItemColor(0)
         self.setupMenuBar()
-        self.setupContents()
+        with self.table.bulkEdit():
+            self.setupContents()
+        self.table.journal.clear()
         self.setupContextMenu()
         self.setCentralWidget(self.table)
         self.statusBar()
+        self.profileLabel = QLabel(self)
+        self.statusBar().addPermanentWidget(self.profileLabel)
+        self.profileTimer = QTimer(self)
+        self.profileTimer.setInterval(1000)
+        self.profileTimer.timeout.connect(self.updateProfileLabel)
         self.formulaInput.returnPressed.connect(self.returnPressed)
         self.setWindowTitle('ЭксЭксЭль')
+        self.views = []
+        self.workers = []
 
     def setupContextMenu(self):
         self.addAction(self.cell_addAction)
@@ -88,6 +108,14 @@ class SpreadSheet(QMainWindow):
         self.colorAction = QAction(QIcon(QPixmap(16, 16)), 'Цвет &фона...', self)
         self.colorAction.triggered.connect(self.table.selectColor)
 
+        self.undoAction = QAction('&Отменить', self)
+        self.undoAction.setShortcut(QKeySequence.Undo)
+        self.undoAction.triggered.connect(self.table.undo)
+
+        self.redoAction = QAction('&Повторить', self)
+        self.redoAction.setShortcut(QKeySequence.Redo)
+        self.redoAction.triggered.connect(self.table.redo)
+
         self.clearAction = QAction('Очистить', self)
         self.clearAction.setShortcut(Qt.Key_Delete)
         self.clearAction.triggered.connect(self.clear)
@@ -103,9 +131,25 @@ class SpreadSheet(QMainWindow):
         self.printAction.setShortcut(QKeySequence.Print)
         self.printAction.triggered.connect(self.print_)
 
+        self.pdfAction = QAction('Экспорт в &PDF...', self)
+        self.pdfAction.triggered.connect(self.runPdfDialog)
+
         self.importAction = QAction('&Импортировать', self)
         self.importAction.triggered.connect(self.runImportDialog)
 
+        self.saveAction = QAction('&Сохранить', self)
+        self.saveAction.setShortcut(QKeySequence.Save)
+        self.saveAction.triggered.connect(self.runSaveDialog)
+
+        self.exportAction = QAction('&Экспортировать', self)
+        self.exportAction.triggered.connect(self.runExportDialog)
+
+        self.profileAction = QAction('&Профилирование', self, checkable=True)
+        self.profileAction.toggled.connect(self.toggleProfiling)
+
+        self.diagnosticsAction = QAction('&Диагностика...', self)
+        self.diagnosticsAction.triggered.connect(self.showDiagnostics)
+
         self.firstSeparator = QAction(self)
         self.firstSeparator.setSeparator(True)
 
@@ -124,8 +168,16 @@ class SpreadSheet(QMainWindow):
                 action.setChecked(True)
 
         self.fileMenu.addAction(self.importAction)
+        self.fileMenu.addAction(self.saveAction)
+        self.fileMenu.addAction(self.exportAction)
         self.fileMenu.addAction(self.printAction)
+        self.fileMenu.addAction(self.pdfAction)
         self.fileMenu.addAction(self.exitAction)
+        self.editMenu = self.menuBar().addMenu('&Правка')
+        self.editMenu.addAction(self.undoAction)
+        self.editMenu.addAction(self.redoAction)
+        self.editMenu.addSeparator()
+        self.editMenu.addAction(self.clearAction)
         self.cellMenu = self.menuBar().addMenu('&Клетка')
         self.cellMenu.addAction(self.cell_addAction)
         self.cellMenu.addAction(self.cell_subAction)
@@ -135,18 +187,18 @@ class SpreadSheet(QMainWindow):
         self.cellMenu.addSeparator()
         self.cellMenu.addAction(self.colorAction)
         self.cellMenu.addAction(self.fontAction)
+        self.toolsMenu = self.menuBar().addMenu('&Сервис')
+        self.toolsMenu.addAction(self.profileAction)
+        self.toolsMenu.addAction(self.diagnosticsAction)
         self.menuBar().addSeparator()
         self.aboutMenu = self.menuBar().addMenu('&Помощь')
         self.aboutMenu.addAction(self.aboutSpreadSheet)
 
     def changeDateFormat(self):
-        action = self.sender()
-        oldFormat = self.currentDateFormat
-        newFormat = self.currentDateFormat = action.text()
-        for row in range(self.table.rowCount()):
-            item = self.table.item(row, 1)
-            date = QDate.fromString(item.text(), oldFormat)
-            item.setText(date.toString(newFormat))
+        self.currentDateFormat = self.sender().text()
+        self.table.setDateFormat(self.currentDateFormat)
+        for view in self.views:
+            view.model().setDateFormat(self.currentDateFormat)
 
     def updateStatus(self, item):
         if item and item == self.table.currentItem():
@@ -175,7 +227,6 @@ class SpreadSheet(QMainWindow):
             self.table.setItem(row, col, SpreadSheetItem(text))
         else:
             item.setData(Qt.EditRole, text)
-        self.table.viewport().update()
 
     def actionSum(self):
         row_first = 0
@@ -238,8 +289,9 @@ class SpreadSheet(QMainWindow):
         self.actionMath_helper('Division', '/')
 
     def clear(self):
-        for i in self.table.selectedItems():
-            i.setText('')
+        with self.table.bulkEdit():
+            for i in self.table.selectedItems():
+                i.setText('')
 
     def runInputDialog(self, *args, **kwargs):
         addDialog = InputDialog(*args, table=self.table, **kwargs)
@@ -251,25 +303,117 @@ class SpreadSheet(QMainWindow):
         return False, None, None, None
 
     def runImportDialog(self, *args, **kwargs) -> str:
-        filename, _ = QFileDialog.getOpenFileName(self, 'Открыть файл', '', 'Табличные файлы (*.xlsx *.csv *.json)')
-        if filename:
+        filename, _ = QFileDialog.getOpenFileName(
+            self, 'Открыть файл', '', f'Табличные файлы (*{SUFFIX} *.xlsx *.csv *.json *.jsonl)')
+        if not filename:
+            return
+        if filename.endswith(SUFFIX):
             try:
-                self.read_table_file(filename)
+                self.openSpreadsheet(open_workbook(filename), filename)
             except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Произошла ошибка при чтении файла: {e}") 
-
-    def read_table_file(self, filename):
-        with open(filename) as file: 
-            if filename.endswith('.xlsx'):
-                return read_excel(file)
-            elif filename.endswith('.json'):
-                return read_json(filename)
-            elif filename.endswith('.csv'):
-                return read_csv(filename)
-            else:
-                QMessageBox.warning(self, 'Ошибка', 'Неподдерживаемый формат файла.')
+                QMessageBox.critical(self, "Ошибка", f"Произошла ошибка при чтении файла: {e}")
+            return
+        if not filename.endswith(SUPPORTED_FORMATS):
+            QMessageBox.warning(self, 'Ошибка', 'Неподдерживаемый формат файла.')
+            return
+        if filename.endswith('.xlsx'):
+            # sheets of a workbook are parsed when their tab is first opened
+            try:
+                self.openWorkbook(Workbook.open(filename), filename)
+            except Exception as e:
+                QMessageBox.critical(self, "Ошибка", f"Произошла ошибка при чтении файла: {e}")
+            return
+        self.startImport(filename)
 
-            QMessageBox.critical(self, 'Ошибка', f'Ошибка при чтении файла: {e}')
+    def runSaveDialog(self):
+        filename, _ = QFileDialog.getSaveFileName(self, 'Сохранить файл', '', f'Книга ЭксЭксЭль (*{SUFFIX})')
+        if not filename:
+            return
+        if not filename.endswith(SUFFIX):
+            filename += SUFFIX
+        try:
+            save_workbook(self.table.spreadsheet, filename)
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Произошла ошибка при сохранении файла: {e}")
+
+    def runExportDialog(self):
+        # formats whose package is not installed are not offered
+        formats = available_formats()
+        filters = ';;'.join(f'{self.exportFormats[suffix]} (*{suffix})' for suffix in formats)
+        filename, selected = QFileDialog.getSaveFileName(self, 'Экспортировать файл', '', filters)
+        if not filename:
+            return
+        suffix = selected[selected.index('*') + 1:-1]
+        if not filename.endswith(formats):
+            filename += suffix
+        self.startExport(filename)
+
+    def startExport(self, filename: str) -> ExportWorker:
+        worker = ExportWorker(self.table.spreadsheet, self.table.engine, filename)
+        progress = QProgressDialog('Экспорт файла...', 'Отмена', 0, 100, self)
+        progress.setWindowModality(Qt.NonModal)
+        worker.cancelOn(progress.canceled)
+        worker.progress.connect(progress.setValue)
+        worker.failed.connect(
+            lambda e: QMessageBox.critical(self, "Ошибка", f"Произошла ошибка при экспорте файла: {e}"))
+        worker.finished.connect(progress.close)
+        worker.thread.finished.connect(lambda: self.workers.remove(worker))
+        self.workers.append(worker)
+        progress.show()
+        worker.start()
+        return worker
+
+    def runPdfDialog(self):
+        filename, _ = QFileDialog.getSaveFileName(self, 'Экспорт в PDF', '', 'PDF (*.pdf)')
+        if not filename:
+            return
+        if not filename.endswith('.pdf'):
+            filename += '.pdf'
+        try:
+            export_pdf(self.table.model(), filename, self.table.font())
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Произошла ошибка при экспорте файла: {e}")
+
+    def startImport(self, filename: str) -> ImportWorker:
+        view = self.openSpreadsheet(Spreadsheet(0, 0), filename)
+        worker = ImportWorker(filename)
+        progress = QProgressDialog('Импорт файла...', 'Отмена', 0, 100, self)
+        progress.setWindowModality(Qt.NonModal)
+        worker.cancelOn(progress.canceled, view.destroyed)
+        worker.chunkRead.connect(view.model().appendSpreadsheet)
+        worker.progress.connect(progress.setValue)
+        worker.failed.connect(
+            lambda e: QMessageBox.critical(self, "Ошибка", f"Произошла ошибка при чтении файла: {e}"))
+        worker.finished.connect(view.spreadsheet.compact)
+        worker.finished.connect(progress.close)
+        worker.thread.finished.connect(lambda: self.workers.remove(worker))
+        self.workers.append(worker)
+        progress.show()
+        worker.start()
+        return worker
+
+    def openSpreadsheet(self, spreadsheet: Spreadsheet, title: str) -> TableView:
+        view = TableView(spreadsheet)
+        view.setWindowTitle(title)
+        view.model().setDateFormat(self.currentDateFormat)
+        view.resize(self.size())
+        view.setAttribute(Qt.WA_DeleteOnClose)
+        view.destroyed.connect(lambda: self.views.remove(view))
+        self.views.append(view)
+        view.show()
+        return view
+
+    def openWorkbook(self, workbook: Workbook, title: str) -> WorkbookView:
+        view = WorkbookView(workbook)
+        view.setWindowTitle(title)
+        view.resize(self.size())
+        view.setAttribute(Qt.WA_DeleteOnClose)
+        view.model().setDateFormat(self.currentDateFormat)
+        view.destroyed.connect(workbook.close)
+        view.destroyed.connect(lambda: self.views.remove(view))
+        self.views.append(view)
+        view.show()
+        return view
 
     def setupContents(self):
         titleBackground = QColor(Qt.lightGray)
@@ -367,14 +511,42 @@ class SpreadSheet(QMainWindow):
         self.table.setItem(9, 5, SpreadSheetItem('sum F2 F9'))
         self.table.item(9, 5).setBackground(Qt.lightGray)
 
+    def toggleProfiling(self, enabled: bool):
+        profiler.enable(enabled)
+        if enabled:
+            self.profileTimer.start()
+        else:
+            self.profileTimer.stop()
+        self.updateProfileLabel()
+
+    def updateProfileLabel(self):
+        if not profiler.enabled:
+            self.profileLabel.clear()
+            return
+        parts = []
+        recalculation = profiler.last('recalculate')
+        if recalculation:
+            parts.append('Пересчёт: %.1f мс, формул: %d' % (
+                recalculation['duration'] * 1000, recalculation['args']['evaluated']))
+        paint = profiler.last('paint')
+        if paint:
+            parts.append('Отрисовка: %.1f мс, клеток: %d' % (
+                paint['duration'] * 1000, paint['args']['cells evaluated']))
+        rows, seconds = profiler.throughput('import')
+        if seconds:
+            parts.append('Импорт: %d строк/с' % (rows / seconds))
+        self.profileLabel.setText(' | '.join(parts))
+
+    def showDiagnostics(self):
+        DiagnosticsDialog(self).exec_()
+
     def show_about(self):
         return show_about_window(self)
 
     def print_(self):
         printer = QPrinter(QPrinter.ScreenResolution)
         dlg = QPrintPreviewDialog(printer)
-        view = PrintView()
-        view.setModel(self.table.model())
+        view = PrintView(self.table.model(), self.table.font())
         dlg.paintRequested.connect(view.print_)
         dlg.exec_()
 
@@ -1,13 +1,9 @@
-def decode_pos(pos):
-    try:
-        row = int(pos[1:]) - 1
-        col = ord(pos[0]) - ord('A')
-    except ValueError:
-        row = -1
-        col = -1
+from dataframes.addresses import decode_address, encode_address
+
 
-    return row, col
+def decode_pos(pos):
+    return decode_address(pos)
 
 
 def encode_pos(row, col):
-    return chr(col + ord('A')) + str(row + 1)
+    return encode_address(row, col)
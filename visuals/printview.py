@@ -1,14 +1,169 @@
-from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import QTableView
+import argparse
+import os
+import sys
+from typing import Iterator
 
+from PyQt5.QtCore import QAbstractItemModel, QRect, Qt
+from PyQt5.QtGui import QBrush, QColor, QFont, QFontMetrics, QPainter
+from PyQt5.QtPrintSupport import QPrinter
 
-class PrintView(QTableView):
-    def __init__(self):
-        super(PrintView, self).__init__()
+from dataframes.profiling import profiler
 
-        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
 
-    def print_(self, printer):
-        self.resize(printer.width(), printer.height())
-        self.render(printer)
+SAMPLE_ROWS = 100
+MIN_COLUMN_CHARACTERS = 4
+PADDING = 4
+
+Tile = tuple[range, range]
+
+
+class PrintView():
+    # paints the model page by page straight onto the printer, no widget holds the whole sheet
+    def __init__(self, model: QAbstractItemModel | None = None, font: QFont | None = None):
+        self.model = model
+        self.font = font or QFont()
+
+    def setModel(self, model: QAbstractItemModel):
+        self.model = model
+
+    def text(self, row: int, column: int) -> str:
+        value = self.model.data(self.model.index(row, column), Qt.DisplayRole)
+        return '' if value is None else str(value)
+
+    def columnWidths(self, metrics: QFontMetrics, width: int) -> list[int]:
+        # columns are sized on the first rows only, longer texts are elided
+        sample = range(min(self.model.rowCount(), SAMPLE_ROWS))
+        minimum = metrics.horizontalAdvance('W' * MIN_COLUMN_CHARACTERS)
+        widths = []
+        for column in range(self.model.columnCount()):
+            texts = [str(self.model.headerData(column, Qt.Horizontal))] + [self.text(row, column) for row in sample]
+            # advances are rounded down, elision needs the pixel back
+            widest = max(metrics.horizontalAdvance(text) for text in texts) + 2 * PADDING + 1
+            widths.append(min(max(widest, minimum), max(width // 2, minimum)))
+        return widths
+
+    def tiles(self, widths: list[int], width: int, rowsPerPage: int) -> Iterator[Tile]:
+        # pages go down the rows first, then across the column bands
+        bands = []
+        first, used = 0, 0
+        for column, columnWidth in enumerate(widths):
+            if column > first and used + columnWidth > width:
+                bands.append(range(first, column))
+                first, used = column, 0
+            used += columnWidth
+        if first < len(widths):
+            bands.append(range(first, len(widths)))
+        rows = self.model.rowCount()
+        for band in bands:
+            for firstRow in range(0, rows, rowsPerPage):
+                yield range(firstRow, min(firstRow + rowsPerPage, rows)), band
+
+    def print_(self, printer: QPrinter) -> int:
+        if self.model is None:
+            return 0
+        painter = QPainter(printer)
+        painter.setFont(self.font)
+        metrics = painter.fontMetrics()
+        rowHeight = metrics.height() + 2 * PADDING
+        headerWidth = metrics.horizontalAdvance(str(self.model.rowCount())) + 2 * PADDING
+        width, height = printer.width() - headerWidth, printer.height()
+        rowsPerPage = max(height // rowHeight - 1, 1)
+        widths = self.columnWidths(metrics, width)
+        # the page range of the print dialog is 1-based, zero means every page
+        fromPage, toPage = printer.fromPage(), printer.toPage()
+
+        pages = 0
+        with profiler.span('print', 'render', pages=0) as args:
+            for page, (rows, columns) in enumerate(self.tiles(widths, width, rowsPerPage), 1):
+                if fromPage and page < fromPage:
+                    continue
+                if toPage and page > toPage:
+                    break
+                if pages:
+                    printer.newPage()
+                self.paintPage(painter, rows, columns, widths, rowHeight, headerWidth)
+                pages += 1
+            args['pages'] = pages
+        painter.end()
+        return pages
+
+    def paintPage(self, painter: QPainter, rows: range, columns: range, widths: list[int],
+                  rowHeight: int, headerWidth: int):
+        metrics = painter.fontMetrics()
+        lefts = [headerWidth]
+        for column in columns:
+            lefts.append(lefts[-1] + widths[column])
+        bottom = rowHeight * (len(rows) + 1)
+        grid = QColor(Qt.gray)
+
+        painter.fillRect(QRect(0, 0, lefts[-1], rowHeight), QColor(Qt.lightGray))
+        painter.fillRect(QRect(0, 0, headerWidth, bottom), QColor(Qt.lightGray))
+        painter.setPen(QColor(Qt.black))
+        for left, column in zip(lefts, columns):
+            rect = QRect(left, 0, widths[column], rowHeight)
+            painter.drawText(rect, Qt.AlignCenter, str(self.model.headerData(column, Qt.Horizontal)))
+        for top, row in enumerate(rows, 1):
+            rect = QRect(0, top * rowHeight, headerWidth, rowHeight)
+            painter.drawText(rect, Qt.AlignCenter, str(self.model.headerData(row, Qt.Vertical)))
+
+        for top, row in enumerate(rows, 1):
+            for left, column in zip(lefts, columns):
+                rect = QRect(left, top * rowHeight, widths[column], rowHeight)
+                index = self.model.index(row, column)
+                background = self.model.data(index, Qt.BackgroundRole)
+                if background is not None:
+                    painter.fillRect(rect, background)
+                text = self.text(row, column)
+                if not text:
+                    continue
+                alignment = self.model.data(index, Qt.TextAlignmentRole)
+                color = self.model.data(index, Qt.TextColorRole)
+                painter.setPen(QColor(Qt.black) if color is None else QBrush(color).color())
+                painter.drawText(
+                    rect.adjusted(PADDING, 0, -PADDING, 0),
+                    Qt.AlignLeft | Qt.AlignVCenter if alignment is None else int(alignment),
+                    metrics.elidedText(text, Qt.ElideRight, rect.width() - 2 * PADDING),
+                )
+
+        painter.setPen(grid)
+        for top in range(len(rows) + 2):
+            painter.drawLine(0, top * rowHeight, lefts[-1], top * rowHeight)
+        for left in [0] + lefts:
+            painter.drawLine(left, 0, left, bottom)
+
+
+def pdf_printer(filename: str) -> QPrinter:
+    printer = QPrinter(QPrinter.HighResolution)
+    printer.setOutputFormat(QPrinter.PdfFormat)
+    printer.setOutputFileName(filename)
+    return printer
+
+
+def export_pdf(model: QAbstractItemModel, filename: str, font: QFont | None = None) -> int:
+    return PrintView(model, font).print_(pdf_printer(filename))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m visuals.printview',
+        description='Render a spreadsheet file to a paged PDF without a display.',
+    )
+    parser.add_argument('input', help='spreadsheet file')
+    parser.add_argument('output', help='pdf file')
+    args = parser.parse_args(argv)
+
+    # headless by default, an explicit platform still wins
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+
+    from components.SpreadsheetModel import SpreadsheetModel
+    from dataframes.cli import load
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    pages = export_pdf(SpreadsheetModel(load(args.input)), args.output, app.font())
+    print(f'{args.input} -> {args.output}: {pages} pages')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,60 @@
-from PyQt5.QtCore import Qt
+from datetime import date
+
+from PyQt5.QtCore import QDate, Qt
 from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QTableWidgetItem
 
-from util import decode_pos
+from dataframes.profiling import profiler
+
+
+DATE_FORMATS = ['dd/M/yyyy', 'yyyy/M/dd', 'dd.MM.yyyy']
+
+
+def format_date(value: date, dateFormat: str) -> str:
+    return QDate(value.year, value.month, value.day).toString(dateFormat)
+
+
+def parse_date(text: str, dateFormat: str) -> date | None:
+    # a date starts with a digit and has separators, anything else is not worth asking Qt about
+    if not text[:1].isdigit() or text.isdigit():
+        return None
+    for parsed in (QDate.fromString(text, dateFormat), QDate.fromString(text, Qt.ISODate)):
+        if parsed.isValid():
+            return parsed.toPyDate()
+    return None
+
+
+def display_value(value, dateFormat: str):
+    # dates are stored as values, the format is only applied when they are shown
+    if isinstance(value, date):
+        return format_date(value, dateFormat)
+    return value
+
+
+def to_integer(value) -> int | None:
+    try:
+        return int(str(value))
+    except ValueError:
+        return None
+
+
+def number_color(number: int | None) -> QColor:
+    if number is None:
+        return QColor(Qt.black)
+    elif number < 0:
+        return QColor(Qt.red)
+    return QColor(Qt.blue)
+
+
+def text_color(value) -> QColor:
+    return number_color(to_integer(value))
+
+
+def text_alignment(value) -> Qt.Alignment | None:
+    t = str(value)
+    if t and (t[0].isdigit() or t[0] == '-'):
+        return Qt.AlignRight | Qt.AlignVCenter
+    return None
 
 
 class SpreadSheetItem(QTableWidgetItem):
@@ -12,14 +64,12 @@ class SpreadSheetItem(QTableWidgetItem):
             super(SpreadSheetItem, self).__init__(text)
         else:
             super(SpreadSheetItem, self).__init__()
-
-        self.isResolving = False
+        self.cache = None
+        # the text last sent to the engine, a change of style leaves it as is
+        self.committed = None
 
     def clone(self):
-        item = super(SpreadSheetItem, self).clone()
-        item.isResolving = self.isResolving
-
-        return item
+        return SpreadSheetItem(self.formula())
 
     def formula(self):
         return super(SpreadSheetItem, self).data(Qt.DisplayRole)
@@ -29,92 +79,35 @@ class SpreadSheetItem(QTableWidgetItem):
             return self.formula()
         if role == Qt.DisplayRole:
             return self.display()
-        t = str(self.display())
-        try:
-            number = int(t)
-        except ValueError:
-            number = None
         if role == Qt.TextColorRole:
-            if number is None:
-                return QColor(Qt.black)
-            elif number < 0:
-                return QColor(Qt.red)
-            return QColor(Qt.blue)
-
+            return self.cached()[3]
         if role == Qt.TextAlignmentRole:
-            if t and (t[0].isdigit() or t[0] == '-'):
-                return Qt.AlignRight | Qt.AlignVCenter
+            alignment = self.cached()[4]
+            if alignment is not None:
+                return alignment
         return super(SpreadSheetItem, self).data(role)
 
     def setData(self, role, value):
         super(SpreadSheetItem, self).setData(role, value)
         if self.tableWidget():
-            self.tableWidget().viewport().update()
+            self.tableWidget().itemEdited(self)
 
     def display(self):
-        # avoid circular dependencies
-        if self.isResolving:
-            return None
-        self.isResolving = True
-        result = self.computeFormula(self.formula(), self.tableWidget())
-        self.isResolving = False
-        return result
-
-    def computeFormula(self, formula, widget):
-        if formula is None:
-            return None
-        # check if the string is actually a formula or not
-        slist = formula.split(' ')
-        if not slist or not widget:
-            # it is a normal string
-            return formula
-        op = slist[0].lower()
-        firstRow = -1
-        firstCol = -1
-        secondRow = -1
-        secondCol = -1
-        if len(slist) > 1:
-            firstRow, firstCol = decode_pos(slist[1])
-        if len(slist) > 2:
-            secondRow, secondCol = decode_pos(slist[2])
-        start = widget.item(firstRow, firstCol)
-        end = widget.item(secondRow, secondCol)
-        firstVal = 0
-        try:
-            firstVal = start and int(start.text()) or 0
-        except ValueError:
-            pass
-        secondVal = 0
-        try:
-            secondVal = end and int(end.text()) or 0
-        except ValueError:
-            pass
-        result = None
-        if op == "sum":
-            sum_ = 0
-            for r in range(firstRow, secondRow + 1):
-                for c in range(firstCol, secondCol + 1):
-                    tableItem = widget.item(r, c)
-                    if tableItem and tableItem != self:
-                        try:
-                            sum_ += int(tableItem.text())
-                        except ValueError:
-                            pass
-            result = sum_
-        elif op == "+":
-            result = (firstVal + secondVal)
-        elif op == "-":
-            result = (firstVal - secondVal)
-        elif op == "*":
-            result = (firstVal * secondVal)
-        elif op == "/":
-            if secondVal == 0:
-                result = "nan"
-            else:
-                result = (firstVal / secondVal)
-        elif op == "=":
-            if start:
-                result = start.text()
+        return self.cached()[1]
+
+    def cached(self) -> tuple:
+        # (version, value, number, color, alignment), recomputed only when the engine changed the cell
+        # or the date format was switched
+        table = self.tableWidget()
+        if not table:
+            version = None
         else:
-            result = formula
-        return result
+            row, column = self.row(), self.column()
+            version = (table.engine, table.engine.version(row, column), table.dateFormat)
+        if self.cache is None or version is None or self.cache[0] != version:
+            value = display_value(table.engine.value(row, column), table.dateFormat) if table else self.formula()
+            if profiler.enabled:
+                profiler.count('cells evaluated')
+            number = to_integer(value)
+            self.cache = (version, value, number, number_color(number), text_alignment(value))
+        return self.cache